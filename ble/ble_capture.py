@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Aufzeichnung und Wiedergabe von Advertisement-Streams für BLE Tool
+Binärformat: Header (Magic + Version), danach längenpräfixierte Datensätze.
+"""
+
+import asyncio
+import struct
+import time
+from ble_logger import get_logger
+
+logger = get_logger(__name__)
+
+CAPTURE_MAGIC = b"BLEC"
+CAPTURE_VERSION = 1
+
+# Datensatz: <uint32 Länge><Payload>
+# Payload:   <double Zeitstempel><6 Byte Adresse><int16 RSSI>
+#            <uint8 Namenslänge><Name UTF-8>
+#            <uint8 Anzahl Herstellerdaten> je <uint16 Company-ID><uint16 Länge><Daten>
+#            <uint8 Anzahl Servicedaten>    je <uint8 UUID-Länge><UUID><uint16 Länge><Daten>
+#            <uint8 Anzahl Service-UUIDs>   je <uint8 UUID-Länge><UUID>
+_LENGTH = struct.Struct("<I")
+_FIXED = struct.Struct("<d6sh")
+_U8 = struct.Struct("<B")
+_U16 = struct.Struct("<H")
+_MANUFACTURER = struct.Struct("<HH")
+
+
+class CaptureRecord:
+    """Ein aufgezeichnetes Advertisement."""
+
+    __slots__ = ("timestamp", "address", "rssi", "name", "manufacturer_data", "service_data", "service_uuids")
+
+    def __init__(self, timestamp, address, rssi, name, manufacturer_data, service_data, service_uuids):
+        self.timestamp = timestamp
+        self.address = address
+        self.rssi = rssi
+        self.name = name
+        self.manufacturer_data = manufacturer_data
+        self.service_data = service_data
+        self.service_uuids = service_uuids
+
+
+def _pack_str(value):
+    raw = (value or "").encode("utf-8")[:255]
+    return _U8.pack(len(raw)) + raw
+
+def _unpack_str(payload, offset):
+    (length,) = _U8.unpack_from(payload, offset)
+    offset += _U8.size
+    return payload[offset:offset + length].decode("utf-8", errors="replace"), offset + length
+
+def encode_record(record):
+    """Kodiert einen CaptureRecord in die Payload (ohne Längenpräfix)."""
+    parts = [
+        _FIXED.pack(record.timestamp, bytes.fromhex(record.address.replace(":", "")), record.rssi),
+        _pack_str(record.name),
+        _U8.pack(len(record.manufacturer_data))
+    ]
+    for company_id, data in record.manufacturer_data.items():
+        parts.append(_MANUFACTURER.pack(company_id, len(data)) + bytes(data))
+    parts.append(_U8.pack(len(record.service_data)))
+    for uuid, data in record.service_data.items():
+        parts.append(_pack_str(uuid) + _U16.pack(len(data)) + bytes(data))
+    parts.append(_U8.pack(len(record.service_uuids)))
+    for uuid in record.service_uuids:
+        parts.append(_pack_str(uuid))
+    return b"".join(parts)
+
+def decode_record(payload):
+    """Dekodiert eine Payload in einen CaptureRecord."""
+    timestamp, address_raw, rssi = _FIXED.unpack_from(payload, 0)
+    offset = _FIXED.size
+    address = ":".join(f"{b:02X}" for b in address_raw)
+    name, offset = _unpack_str(payload, offset)
+
+    manufacturer_data = {}
+    (count,) = _U8.unpack_from(payload, offset)
+    offset += _U8.size
+    for _ in range(count):
+        company_id, length = _MANUFACTURER.unpack_from(payload, offset)
+        offset += _MANUFACTURER.size
+        manufacturer_data[company_id] = payload[offset:offset + length]
+        offset += length
+
+    service_data = {}
+    (count,) = _U8.unpack_from(payload, offset)
+    offset += _U8.size
+    for _ in range(count):
+        uuid, offset = _unpack_str(payload, offset)
+        (length,) = _U16.unpack_from(payload, offset)
+        offset += _U16.size
+        service_data[uuid] = payload[offset:offset + length]
+        offset += length
+
+    service_uuids = []
+    (count,) = _U8.unpack_from(payload, offset)
+    offset += _U8.size
+    for _ in range(count):
+        uuid, offset = _unpack_str(payload, offset)
+        service_uuids.append(uuid)
+
+    return CaptureRecord(timestamp, address, rssi, name or None, manufacturer_data, service_data, service_uuids)
+
+
+class CaptureWriter:
+    """Schreibt Advertisements (aus einem Bleak-detection_callback) in eine Capture-Datei."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = open(path, "wb")
+        self._file.write(CAPTURE_MAGIC + _U8.pack(CAPTURE_VERSION))
+
+    def write(self, device, advertisement_data, timestamp=None):
+        record = CaptureRecord(
+            time.time() if timestamp is None else timestamp,
+            device.address,
+            advertisement_data.rssi,
+            advertisement_data.local_name or device.name,
+            advertisement_data.manufacturer_data,
+            advertisement_data.service_data,
+            advertisement_data.service_uuids
+        )
+        payload = encode_record(record)
+        self._file.write(_LENGTH.pack(len(payload)) + payload)
+        self.count += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_capture(path):
+    """Liest alle Datensätze einer Capture-Datei (bricht bei abgeschnittenem Ende sauber ab)."""
+    records = []
+    with open(path, "rb") as f:
+        header = f.read(len(CAPTURE_MAGIC) + _U8.size)
+        if header[:len(CAPTURE_MAGIC)] != CAPTURE_MAGIC:
+            raise ValueError(f"{path} ist keine BLE-Capture-Datei")
+        version = header[len(CAPTURE_MAGIC)]
+        if version != CAPTURE_VERSION:
+            raise ValueError(f"Nicht unterstützte Capture-Version {version} in {path}")
+        while True:
+            prefix = f.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                break
+            (length,) = _LENGTH.unpack(prefix)
+            payload = f.read(length)
+            if len(payload) < length:
+                logger.warning("Capture %s endet mit unvollständigem Datensatz. Ignoriere Rest.", path)
+                break
+            records.append(decode_record(payload))
+    return records
+
+
+# --- Wiedergabe ---
+class ReplayDevice:
+    """Ersatz für bleak.backends.device.BLEDevice."""
+
+    __slots__ = ("address", "name")
+
+    def __init__(self, address, name):
+        self.address = address
+        self.name = name
+
+
+class ReplayAdvertisement:
+    """Ersatz für bleak.backends.scanner.AdvertisementData."""
+
+    __slots__ = ("rssi", "local_name", "manufacturer_data", "service_data", "service_uuids")
+
+    def __init__(self, record):
+        self.rssi = record.rssi
+        self.local_name = record.name
+        self.manufacturer_data = record.manufacturer_data
+        self.service_data = record.service_data
+        self.service_uuids = record.service_uuids
+
+
+class ReplayScanner:
+    """
+    Verhält sich wie ein BleakScanner (start/stop), spielt aber aufgezeichnete
+    Advertisements mit Originaltiming geteilt durch 'speed' an den Callback aus.
+    start_ts ist der Capture-Zeitpunkt, der dem Start des Scanners entspricht
+    (bei Fenstern deren Beginn, sonst das erste Advertisement).
+    """
+
+    def __init__(self, records, detection_callback, speed=1.0, start_ts=None):
+        self.records = records
+        self.detection_callback = detection_callback
+        self.speed = speed
+        self.start_ts = start_ts
+        self.delivered = 0
+        self._task = None
+
+    async def _run(self):
+        if not self.records:
+            return
+        start_ts = self.records[0].timestamp if self.start_ts is None else self.start_ts
+        start_wall = time.monotonic()
+        for record in self.records:
+            delay = (record.timestamp - start_ts) / self.speed - (time.monotonic() - start_wall)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.detection_callback(ReplayDevice(record.address, record.name), ReplayAdvertisement(record))
+            self.delivered += 1
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        # Die Datensätze sind bereits auf das Fenster zugeschnitten. Restliche
+        # (durch Timing-Jitter verspätete) Datensätze werden noch zugestellt,
+        # damit jede Wiedergabe dieselben Callbacks erzeugt.
+        await self._task
+        self._task = None
+
+
+def split_windows(records, window_seconds):
+    """
+    Teilt eine Aufzeichnung in aufeinanderfolgende Scan-Fenster (Capture-Zeit) auf.
+    Gibt eine Liste von (Fensterbeginn, Datensätze) zurück.
+    """
+    if not records:
+        return []
+    windows = []
+    current = []
+    window_start = records[0].timestamp
+    for record in records:
+        while record.timestamp >= window_start + window_seconds:
+            windows.append((window_start, current))
+            current = []
+            window_start += window_seconds
+        current.append(record)
+    windows.append((window_start, current))
+    return windows
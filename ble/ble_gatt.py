@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+GATT-Leseprofile für BLE Tool
+Liest mehrere Characteristics in einer Verbindung und cached statische
+Werte (Hersteller, Firmware, ...) in gatt_cache.json.
+"""
+
+import os
+import json
+import time
+import struct
+from ble_logger import get_logger, get_bluetooth_logger
+
+logger = get_logger(__name__)
+bt_logger = get_bluetooth_logger()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+GATT_CACHE_FILE = os.path.join(BASE_DIR, "gatt_cache.json")
+
+DEFAULT_READ_PROFILE = "battery"
+DEFAULT_STATIC_REFRESH_DAYS = 30
+
+
+# --- Decoder ---
+def decode_uint8(value):
+    return int(value[0])
+
+def decode_uint16(value):
+    return struct.unpack_from("<H", bytes(value))[0]
+
+def decode_percent255(value):
+    # Batterie als 0..255 statt 0..100 (einige Tags und Eigenbauten)
+    return round(value[0] * 100 / 255)
+
+def decode_utf8(value):
+    return bytes(value).decode("utf-8", errors="replace").rstrip("\x00").strip()
+
+def decode_temperature(value):
+    # org.bluetooth.characteristic.temperature: sint16, Auflösung 0.01 °C
+    return struct.unpack_from("<h", bytes(value))[0] / 100.0
+
+DECODERS = {
+    "uint8": decode_uint8,
+    "uint16": decode_uint16,
+    "percent255": decode_percent255,
+    "utf8": decode_utf8,
+    "temperature": decode_temperature,
+}
+
+# --- Bekannte Characteristics ---
+# Name im Profil: (UUID, Decoder, statisch?)
+CHARACTERISTICS = {
+    "battery": ("00002a19-0000-1000-8000-00805f9b34fb", "uint8", False),
+    "temperature": ("00002a6e-0000-1000-8000-00805f9b34fb", "temperature", False),
+    "manufacturer": ("00002a29-0000-1000-8000-00805f9b34fb", "utf8", True),
+    "model": ("00002a24-0000-1000-8000-00805f9b34fb", "utf8", True),
+    "firmware": ("00002a26-0000-1000-8000-00805f9b34fb", "utf8", True),
+    "hardware": ("00002a27-0000-1000-8000-00805f9b34fb", "utf8", True),
+    "software": ("00002a28-0000-1000-8000-00805f9b34fb", "utf8", True),
+}
+
+
+# BlueZ exportiert den GAP-Service (0x1800, Gerätename 0x2A00) nicht über D-Bus. Der Name kommt
+# daher aus Device1 Name/Alias (Discover-Ergebnis), 'device_name' im Profil wird ignoriert.
+NAME_FROM_BLUEZ = ("device_name",)
+
+
+def parse_read_profile(profile_str):
+    """
+    Wandelt "battery, device_name, firmware" in eine Liste bekannter Characteristic-Namen um.
+    'battery' ist immer enthalten, da der Batterie-Read darauf aufbaut.
+    """
+    names = ["battery"]
+    for name in (profile_str or "").split(","):
+        name = name.strip().lower()
+        if not name or name in names or name in NAME_FROM_BLUEZ:
+            continue
+        if name not in CHARACTERISTICS:
+            logger.warning("Unbekannte Characteristic '%s' im Leseprofil. Bekannt: %s", name, ", ".join(CHARACTERISTICS))
+            continue
+        names.append(name)
+    return names
+
+
+def parse_decoders(decoder_str):
+    """
+    Wandelt die Geräte-Option 'decoder' in {Characteristic: Decoder} um.
+    "percent255" gilt für 'battery', "battery:uint16, temperature:temperature" pro Characteristic.
+    """
+    decoders = {}
+    for item in (decoder_str or "").split(","):
+        name, _, decoder = item.strip().lower().rpartition(":")
+        name = name.strip() or "battery"
+        decoder = decoder.strip()
+        if not decoder:
+            continue
+        if name not in CHARACTERISTICS or decoder not in DECODERS:
+            logger.warning("Unbekannter Decoder '%s' (Characteristics: %s; Decoder: %s)",
+                           item.strip(), ", ".join(CHARACTERISTICS), ", ".join(DECODERS))
+            continue
+        decoders[name] = decoder
+    return decoders
+
+
+class GattCache:
+    """Persistenter Cache für statische Werte pro Gerät."""
+
+    def __init__(self, cache_file=GATT_CACHE_FILE):
+        self.cache_file = cache_file
+        self._data = {}
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, "r") as f:
+                    self._data = json.load(f)
+                # Ältere Versionen cachten Characteristic-Handles und den per GATT gelesenen Namen
+                for device in self._data.values():
+                    if device.pop("handles", None) is not None:
+                        self._dirty = True
+                    if device.get("static", {}).pop("device_name", None) is not None:
+                        self._dirty = True
+        except Exception as e:
+            logger.warning("Konnte %s nicht lesen: %s", self.cache_file, e)
+            self._data = {}
+
+    def save(self):
+        if not self._dirty:
+            return
+        tmp_file = self.cache_file + ".tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump(self._data, f, indent=4)
+            os.replace(tmp_file, self.cache_file)
+            self._dirty = False
+        except Exception as e:
+            logger.error("Fehler beim Schreiben von %s: %s", self.cache_file, e)
+
+    def _device(self, mac):
+        return self._data.setdefault(mac, {"static": {}})
+
+    def get_static(self, mac, name, max_age_seconds):
+        """
+        Gibt (gefunden, Wert) für einen gecachten statischen Wert zurück, solange er nicht
+        älter als max_age_seconds ist. Wert None bedeutet: Gerät bietet die Characteristic nicht an.
+        """
+        entry = self._data.get(mac, {}).get("static", {}).get(name)
+        if entry and (time.time() - entry.get("timestamp", 0)) < max_age_seconds:
+            return True, entry.get("value")
+        return False, None
+
+    def set_static(self, mac, name, value):
+        self._device(mac)["static"][name] = {"value": value, "timestamp": int(time.time())}
+        self._dirty = True
+
+
+def cached_static_values(mac, profile, cache, refresh_days=DEFAULT_STATIC_REFRESH_DAYS, ignore_age=False):
+    """Liefert alle gecachten statischen Werte eines Profils (z.B. für Offline-Meldungen)."""
+    max_age = float("inf") if ignore_age else refresh_days * 86400
+    values = {}
+    for name in profile:
+        if CHARACTERISTICS[name][2]:
+            found, value = cache.get_static(mac, name, max_age)
+            if found:
+                values[name] = value
+    return values
+
+async def read_profile(client, mac, profile, cache, refresh_days=DEFAULT_STATIC_REFRESH_DAYS, decoders=None):
+    """
+    Liest alle Characteristics eines Profils über eine bestehende Verbindung.
+    Statische Werte kommen aus dem Cache, solange sie jünger als refresh_days sind.
+    decoders ersetzt den Standard-Decoder pro Characteristic (Geräte-Option 'decoder').
+    'battery' muss lesbar sein (Exception wird weitergereicht), alle anderen sind optional.
+    """
+    decoders = decoders or {}
+    values = cached_static_values(mac, profile, cache, refresh_days)
+    for name in profile:
+        if name in values:
+            continue
+        uuid, decoder, is_static = CHARACTERISTICS[name]
+        decoder = decoders.get(name, decoder)
+        try:
+            raw = await client.read_gatt_char(uuid)
+            values[name] = DECODERS[decoder](raw)
+        except Exception as e:
+            if name == "battery":
+                raise
+            bt_logger.info("Characteristic '%s' von %s nicht lesbar: %s", name, mac, e)
+            if is_static:
+                # Nicht erneut bei jeder Verbindung versuchen, erst nach Ablauf von refresh_days
+                cache.set_static(mac, name, None)
+            continue
+        if is_static:
+            cache.set_static(mac, name, values[name])
+    # Nicht angebotene statische Characteristics nicht melden
+    return {name: value for name, value in values.items() if value is not None}
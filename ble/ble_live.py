@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Live-Update-Stream für die WebUI
+Der Scan-Daemon stellt auf localhost einen Server-Sent-Events-Endpunkt bereit,
+der beim Verbinden einen Snapshot und danach nur Änderungen (Presence, RSSI,
+Batterie) sendet. live.php reicht den Stream an den Browser weiter.
+"""
+
+import asyncio
+import json
+import time
+from ble_logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_LIVE_HOST = "127.0.0.1"
+DEFAULT_LIVE_PORT = 8765
+DEFAULT_CLIENT_BUFFER = 100
+DEFAULT_MAX_CLIENTS = 50
+KEEPALIVE_SECONDS = 15
+REQUEST_TIMEOUT_SECONDS = 5
+
+_RESYNC = None # Marker in der Client-Queue: Puffer übergelaufen, Snapshot neu senden
+
+
+class LiveClient:
+    __slots__ = ("queue", "overflows")
+
+    def __init__(self, buffer_size):
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        self.overflows = 0
+
+
+class LiveHub:
+    """Hält den aktuellen Zustand aller Geräte und verteilt Änderungen an verbundene Clients."""
+
+    def __init__(self, client_buffer=DEFAULT_CLIENT_BUFFER, max_clients=DEFAULT_MAX_CLIENTS):
+        self.client_buffer = client_buffer
+        self.max_clients = max_clients
+        self._state = {}    # { "MAC": {Feld: Wert} }
+        self._clients = set()
+        self._server = None
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.getint('Live', 'client_buffer', fallback=DEFAULT_CLIENT_BUFFER),
+            config.getint('Live', 'max_clients', fallback=DEFAULT_MAX_CLIENTS)
+        )
+
+    # --- Zustand ---
+    def update(self, mac, **fields):
+        """Übernimmt Felder für ein Gerät und sendet nur tatsächlich geänderte Werte."""
+        state = self._state.setdefault(mac, {})
+        changed = {key: value for key, value in fields.items() if state.get(key) != value}
+        if not changed:
+            return
+        state.update(changed)
+        self._broadcast("delta", {"address": mac, **changed})
+
+    def remove(self, mac):
+        if self._state.pop(mac, None) is not None:
+            self._broadcast("removed", {"address": mac})
+
+    def snapshot(self):
+        return {"timestamp": int(time.time()), "devices": self._state}
+
+    def _broadcast(self, event, data):
+        if not self._clients:
+            return
+        # Einmal serialisieren, an alle Clients dieselben Bytes verteilen
+        message = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+        for client in self._clients:
+            try:
+                client.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Langsamer Client: Puffer verwerfen, er bekommt stattdessen einen frischen Snapshot
+                client.overflows += 1
+                while not client.queue.empty():
+                    client.queue.get_nowait()
+                client.queue.put_nowait(_RESYNC)
+
+    # --- Server ---
+    async def start(self, host=DEFAULT_LIVE_HOST, port=DEFAULT_LIVE_PORT):
+        try:
+            self._server = await asyncio.start_server(self._handle_connection, host, port)
+            logger.info("Live-Stream erreichbar unter http://%s:%d/events", host, port)
+        except OSError as e:
+            logger.error("Live-Stream konnte nicht auf %s:%d starten: %s", host, port, e)
+            self._server = None
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _snapshot_message(self):
+        return f"event: snapshot\ndata: {json.dumps(self.snapshot())}\n\n".encode("utf-8")
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            try:
+                request_line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT_SECONDS)
+                # Header werden nicht benötigt, müssen aber gelesen werden
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT_SECONDS)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+            except asyncio.TimeoutError:
+                return
+
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?", 1)[0] if len(parts) >= 2 else ""
+            if len(parts) < 2 or parts[0] != "GET":
+                await self._send_simple(writer, "405 Method Not Allowed", "text/plain", b"")
+            elif path == "/snapshot":
+                body = json.dumps(self.snapshot()).encode("utf-8")
+                await self._send_simple(writer, "200 OK", "application/json", body)
+            elif path == "/events":
+                await self._stream_events(writer)
+            else:
+                await self._send_simple(writer, "404 Not Found", "text/plain", b"")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send_simple(self, writer, status, content_type, body):
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    async def _stream_events(self, writer):
+        if len(self._clients) >= self.max_clients:
+            await self._send_simple(writer, "503 Service Unavailable", "text/plain", b"")
+            return
+        client = LiveClient(self.client_buffer)
+        self._clients.add(client)
+        logger.debug("Live-Client verbunden (%d aktiv)", len(self._clients))
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                b"Connection: keep-alive\r\nX-Accel-Buffering: no\r\n\r\n" + self._snapshot_message()
+            )
+            await writer.drain()
+            while True:
+                try:
+                    message = await asyncio.wait_for(client.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    message = b": keepalive\n\n"
+                if message is _RESYNC:
+                    message = self._snapshot_message()
+                writer.write(message)
+                await writer.drain()
+        finally:
+            self._clients.discard(client)
+            logger.debug("Live-Client getrennt (%d aktiv, %d Überläufe)", len(self._clients), client.overflows)
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Gelerntes Sichtungs-Intervall pro Gerät für die Abwesenheitserkennung
+BlueZ meldet ein Gerät wegen des Duplikat-Filters (DuplicateData aus, dazu der
+Filter im Controller) nur etwa einmal pro Scan-Fenster, Abstände zwischen den
+Callbacks sagen daher nichts über das Advertising-Intervall. Gelernt wird pro
+Gerät nur, in welchem Anteil der Fenster es gesehen wurde. Daraus ergibt sich
+als Poisson-Prozess die Sichtungsrate pro Sekunde Scan-Zeit.
+Ein Gerät gilt als abwesend, wenn während der Scan-Zeit 'missed_advertisements'
+erwartete Sichtungen (Intervall am Quantil 'confidence') ausgeblieben sind,
+frühestens nach einem ganzen Fenster ohne Sichtung.
+"""
+
+import os
+import json
+import math
+import time
+from ble_logger import get_logger
+
+logger = get_logger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PRESENCE_MODEL_FILE = os.path.join(BASE_DIR, "presence_model.json")
+
+# --- Abwesenheits-Modi ([Presence] departure_mode) ---
+DEPARTURE_WINDOW = "window"     # Offline, wenn im Scan-Fenster nicht gesehen (bisheriges Verhalten)
+DEPARTURE_LEARNED = "learned"   # Offline nach N verpassten erwarteten Sichtungen
+DEPARTURE_MODES = (DEPARTURE_WINDOW, DEPARTURE_LEARNED)
+
+DEFAULT_MISSED_ADVERTISEMENTS = 3
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MIN_SAMPLES = 5
+DEFAULT_MAX_DEPARTURE_SECONDS = 120     # Obergrenze (Scan-Zeit) auch für sehr langsame Advertiser
+DEFAULT_FALSE_OFFLINE_SECONDS = 60      # Wieder gesehen innerhalb dieser Zeit = falscher Offline-Wechsel
+RATE_DECAY = 0.98                       # Gewicht älterer Fenster (ca. 50 Fenster Gedächtnis)
+SAVE_INTERVAL_SECONDS = 300
+
+
+class DeviceModel:
+    __slots__ = ("windows", "seen_windows", "scan_time", "last_seen", "last_window", "unseen", "missed_windows",
+                 "online", "departed_at", "departures", "false_departures")
+
+    def __init__(self, windows=0.0, seen_windows=0.0, scan_time=0.0, departures=0, false_departures=0):
+        self.windows = windows          # Fenster, Fenster mit Sichtung und Scan-Zeit während der Anwesenheit (abklingend)
+        self.seen_windows = seen_windows
+        self.scan_time = scan_time
+        self.last_seen = None   # monotonic, nur im laufenden Prozess gültig
+        self.last_window = None
+        self.unseen = 0.0       # Scan-Zeit seit dem letzten Fenster mit Sichtung (ohne Pausen zwischen Fenstern)
+        self.missed_windows = 0 # Fenster ohne Sichtung seitdem, noch nicht gelernt
+        self.online = None
+        self.departed_at = None
+        self.departures = departures
+        self.false_departures = false_departures
+
+    @classmethod
+    def from_dict(cls, data):
+        # Ältere Versionen lernten Abstände zwischen Callbacks (mean/var/samples/arrivals), nur die Zähler bleiben
+        keys = ("windows", "seen_windows", "scan_time") if "windows" in data else ()
+        return cls(**{key: data[key] for key in keys + ("departures", "false_departures") if key in data})
+
+    def learn_window(self, seen, window_seconds):
+        self.windows = self.windows * RATE_DECAY + 1
+        self.seen_windows = self.seen_windows * RATE_DECAY + seen
+        self.scan_time = self.scan_time * RATE_DECAY + window_seconds
+
+    def learn_missed(self):
+        """Übernimmt die Fenster ohne Sichtung seit der letzten Sichtung auf einmal (wie einzeln gelernt)."""
+        decay = RATE_DECAY ** self.missed_windows
+        weight = (1 - decay) / (1 - RATE_DECAY)
+        self.windows = self.windows * decay + weight
+        self.seen_windows *= decay
+        self.scan_time = self.scan_time * decay + self.unseen / self.missed_windows * weight
+        self.missed_windows = 0
+
+    def to_dict(self):
+        return {"windows": self.windows, "seen_windows": self.seen_windows, "scan_time": self.scan_time,
+                "departures": self.departures, "false_departures": self.false_departures}
+
+
+class PresenceModel:
+    """Lernt die Sichtungsraten aller bekannten Geräte und entscheidet über Abwesenheit."""
+
+    def __init__(self, model_file=PRESENCE_MODEL_FILE):
+        self.model_file = model_file
+        self.mode = DEPARTURE_WINDOW
+        self.missed_advertisements = DEFAULT_MISSED_ADVERTISEMENTS
+        self.confidence = DEFAULT_CONFIDENCE
+        self.min_samples = DEFAULT_MIN_SAMPLES
+        self.max_departure_seconds = DEFAULT_MAX_DEPARTURE_SECONDS
+        self.false_offline_seconds = DEFAULT_FALSE_OFFLINE_SECONDS
+        self._devices = {}
+        self._window = 0
+        self._window_start = None
+        self._window_open = False
+        self._last_save = time.monotonic()
+        self.load()
+
+    def configure(self, config):
+        """Übernimmt [Presence] aus der (neu geladenen) Konfiguration."""
+        mode = config.get('Presence', 'departure_mode', fallback=DEPARTURE_WINDOW).strip().lower()
+        if mode not in DEPARTURE_MODES:
+            logger.warning("Unbekannter departure_mode '%s'. Verwende '%s'.", mode, DEPARTURE_WINDOW)
+            mode = DEPARTURE_WINDOW
+        self.mode = mode
+        self.missed_advertisements = max(1, config.getint('Presence', 'missed_advertisements', fallback=DEFAULT_MISSED_ADVERTISEMENTS))
+        self.confidence = min(0.999, max(0.5, config.getfloat('Presence', 'confidence', fallback=DEFAULT_CONFIDENCE)))
+        self.min_samples = max(1, config.getint('Presence', 'min_samples', fallback=DEFAULT_MIN_SAMPLES))
+        self.max_departure_seconds = config.getfloat('Presence', 'max_departure_seconds', fallback=DEFAULT_MAX_DEPARTURE_SECONDS)
+        self.false_offline_seconds = config.getfloat('Presence', 'false_offline_seconds', fallback=DEFAULT_FALSE_OFFLINE_SECONDS)
+
+    # --- Persistenz (nur Raten und Zähler, Zeitpunkte gelten nur im laufenden Prozess) ---
+    def load(self):
+        try:
+            if os.path.exists(self.model_file):
+                with open(self.model_file, "r") as f:
+                    self._devices = {mac: DeviceModel.from_dict(data) for mac, data in json.load(f).items()}
+        except Exception as e:
+            logger.warning("Konnte %s nicht lesen: %s", self.model_file, e)
+            self._devices = {}
+
+    def save(self):
+        self._last_save = time.monotonic()
+        tmp_file = self.model_file + ".tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump({mac: device.to_dict() for mac, device in self._devices.items()}, f, indent=4)
+            os.replace(tmp_file, self.model_file)
+        except Exception as e:
+            logger.error("Fehler beim Schreiben von %s: %s", self.model_file, e)
+
+    def save_if_due(self):
+        if time.monotonic() - self._last_save >= SAVE_INTERVAL_SECONDS:
+            self.save()
+
+    # --- Erfassung ---
+    def start_window(self, now=None):
+        """Vor dem Start des Scanners aufrufen, sonst fehlen die ersten Advertisements des Fensters."""
+        self._window += 1
+        self._window_start = time.monotonic() if now is None else now
+        self._window_open = True
+
+    def observe(self, mac, now=None):
+        """
+        Für jede Meldung eines bekannten Geräts. Wie oft ein Gerät pro Fenster gemeldet wird
+        (Duplikat-Filter, ADV_IND und SCAN_RSP), spielt keine Rolle, nur ob es gesehen wurde.
+        """
+        if not self._window_open:
+            # Außerhalb eines Fensters (z.B. beim Stoppen des Scanners) zählt keine Sichtung
+            return
+        now = time.monotonic() if now is None else now
+        device = self._devices.get(mac)
+        if device is None:
+            device = self._devices[mac] = DeviceModel()
+        if device.last_window == self._window:
+            return
+        false_departure = device.online is False and device.departed_at is not None and \
+            now - device.departed_at <= self.false_offline_seconds
+        if false_departure:
+            device.false_departures += 1
+            logger.info("Falscher Offline-Wechsel: %s nach %.0fs wieder gesehen.", mac, now - device.departed_at)
+        if device.missed_windows:
+            # Fenster ohne Sichtung zählen erst jetzt, und nur, wenn das Gerät nicht wirklich weg war.
+            # Sonst würde jede Abwesenheit die Rate senken und die Schwelle während der Abwesenheit wachsen.
+            if device.online is not False or false_departure:
+                device.learn_missed()
+            device.missed_windows = 0
+        device.last_seen = now
+        device.last_window = self._window
+        device.unseen = 0.0
+        device.online = True
+
+    def end_window(self, now=None):
+        """Schließt das Scan-Fenster ab und aktualisiert Sichtungsrate und Scan-Zeit ohne Sichtung."""
+        now = time.monotonic() if now is None else now
+        self._window_open = False
+        window_seconds = now - self._window_start
+        for device in self._devices.values():
+            # Der Zeitpunkt im Fenster ist wegen des Duplikat-Filters nur die erste Meldung, daher ganze Fenster zählen
+            if device.last_window == self._window:
+                device.learn_window(True, window_seconds)
+                device.unseen = 0.0
+            else:
+                device.missed_windows += 1
+                device.unseen += window_seconds
+
+    # --- Entscheidung ---
+    def rate(self, device):
+        """Sichtungen pro Sekunde Scan-Zeit (None = noch nicht gelernt)."""
+        if device.windows < self.min_samples or device.scan_time <= 0:
+            return None
+        # Anteil der Fenster mit Sichtung, mit +0.5/+1 nie genau 1 (sonst unendliche Rate)
+        detection = (device.seen_windows + 0.5) / (device.windows + 1)
+        # Poisson: P(in einem Fenster der Länge w nicht gesehen) = exp(-rate * w)
+        return -math.log(1 - detection) * device.windows / device.scan_time
+
+    def interval(self, device):
+        """Abstand zwischen Sichtungen am Quantil 'confidence' (None = noch nicht gelernt)."""
+        rate = self.rate(device)
+        if rate is None:
+            return None
+        # Exponentialverteilte Abstände: Quantil = -ln(1 - confidence) * mittleres Intervall
+        return -math.log(1 - self.confidence) / rate
+
+    def mean_interval(self, mac):
+        """Mittlerer Abstand zwischen Sichtungen eines Geräts (None = noch nicht gelernt)."""
+        device = self._devices.get(mac)
+        rate = self.rate(device) if device is not None else None
+        return 1 / rate if rate else None
+
+    def departure_seconds(self, device):
+        """Scan-Zeit ohne Sichtung, ab der das Gerät als abwesend gilt (None = noch nicht gelernt)."""
+        interval = self.interval(device)
+        if interval is None:
+            return None
+        return min(self.max_departure_seconds, self.missed_advertisements * interval)
+
+    def is_departed(self, mac, seen, now=None):
+        """
+        Entscheidet nach dem Scan-Fenster über Abwesenheit und zählt Offline-Wechsel.
+        Im Fenster gesehene Geräte sind nie abwesend. Ohne ausreichend gelernte Rate gilt
+        das bisherige Verhalten (im Fenster nicht gesehen).
+        """
+        device = self._devices.get(mac)
+        if device is None:
+            device = self._devices[mac] = DeviceModel()
+        if seen:
+            return False
+        threshold = self.departure_seconds(device) if self.mode == DEPARTURE_LEARNED else None
+        departed = threshold is None or device.unseen > threshold
+        if departed and device.online is not False:
+            if device.online:
+                device.departures += 1
+            device.online = False
+            device.departed_at = time.monotonic() if now is None else now
+        return departed
+
+    def stats(self):
+        result = {}
+        for mac, device in self._devices.items():
+            result[mac] = device.to_dict()
+            result[mac]["detection"] = device.seen_windows / device.windows if device.windows else None
+            result[mac]["mean_interval"] = self.mean_interval(mac)
+            result[mac]["departure_seconds"] = self.departure_seconds(device)
+        return result
+
+    def remove(self, mac):
+        self._devices.pop(mac, None)
+
+
+def format_presence_stats(stats, aliases=None):
+    """Formatiert das Modell als Tabelle für die Konsole."""
+    aliases = aliases or {}
+    lines = [f"{'MAC':<17}  {'Alias':<20} {'Intervall':>9} {'Gesehen':>8} {'Fenster':>7} {'Offline ab':>10} {'Offline':>7} {'Falsch':>6}"]
+    for mac in sorted(stats):
+        data = stats[mac]
+        mean = f"{data['mean_interval']:.2f}s" if data["mean_interval"] is not None else "-"
+        detection = f"{100 * data['detection']:.0f}%" if data["detection"] is not None else "-"
+        threshold = f"{data['departure_seconds']:.1f}s" if data["departure_seconds"] is not None else "Fenster"
+        lines.append(
+            f"{mac:<17}  {aliases.get(mac, '-')[:20]:<20} {mean:>9} {detection:>8} {data['windows']:7.1f} "
+            f"{threshold:>10} {data['departures']:>7} {data['false_departures']:>6}"
+        )
+    return "\n".join(lines)
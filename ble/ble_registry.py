@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Geräte-Registry für BLE Tool
+Lädt known_devices.txt (MAC,Alias,Flag) und device_options.ini einmalig,
+indiziert nach MAC, Batterie-Flag und Gruppe und lädt nur bei Änderungen neu.
+"""
+
+import os
+import time
+import configparser
+from ble_logger import get_logger
+
+logger = get_logger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+KNOWN_DEVICES_FILE = os.path.join(BASE_DIR, "known_devices.txt")
+# Pro-Gerät-Optionen liegen separat, da die PHP-Seiten known_devices.txt
+# immer komplett im Format MAC,Alias,Flag neu schreiben.
+DEVICE_OPTIONS_FILE = os.path.join(BASE_DIR, "device_options.ini")
+
+# --- Publish-Policies ---
+PUBLISH_ALWAYS = "always"   # Jeder Scan meldet Online/Offline (bisheriges Verhalten)
+PUBLISH_CHANGES = "changes" # Nur bei Zustandswechsel Online <-> Offline
+PUBLISH_ONLINE = "online"   # Nur Online-Meldungen, keine Offline-Berichte
+PUBLISH_NEVER = "never"     # Gerät wird nur intern geführt
+PUBLISH_POLICIES = (PUBLISH_ALWAYS, PUBLISH_CHANGES, PUBLISH_ONLINE, PUBLISH_NEVER)
+
+
+def normalize_mac(mac):
+    """Vereinheitlicht eine MAC-Adresse (Großbuchstaben, ':' als Trenner)."""
+    return mac.strip().upper().replace("-", ":")
+
+
+class DeviceEntry:
+    """Ein bekanntes Gerät inkl. optionaler Pro-Gerät-Einstellungen."""
+
+    __slots__ = ("mac", "alias", "battery", "group", "options", "last_online")
+
+    def __init__(self, mac, alias, battery=False, group=None, options=None):
+        self.mac = mac
+        self.alias = alias
+        self.battery = battery
+        self.group = group
+        self.options = options or {}
+        self.last_online = None # Letzter gemeldeter Zustand (None = unbekannt)
+
+    def signature(self):
+        return (self.alias, self.battery, self.group, tuple(sorted(self.options.items())))
+
+    def get_float(self, key, fallback=None):
+        try:
+            return float(self.options[key])
+        except (KeyError, ValueError):
+            return fallback
+
+    def get_option(self, key, fallback=None):
+        return self.options.get(key, fallback)
+
+    def __repr__(self):
+        return f"DeviceEntry({self.mac}, {self.alias!r}, battery={self.battery}, group={self.group!r})"
+
+
+class RegistryDiff:
+    """Ergebnis eines Reloads: hinzugefügte, entfernte und geänderte MACs."""
+
+    __slots__ = ("added", "removed", "changed")
+
+    def __init__(self, added=None, removed=None, changed=None):
+        self.added = added or []
+        self.removed = removed or []
+        self.changed = changed or []
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        return f"RegistryDiff(+{len(self.added)} -{len(self.removed)} ~{len(self.changed)})"
+
+
+class DeviceRegistry:
+    """
+    Index über alle bekannten Geräte.
+    reload() prüft nur mtime/Größe der Dateien und parst ausschließlich bei Änderungen.
+    Das spart nur das Parsen: die Offline-Prüfung nach jedem Scan läuft weiterhin über alle Geräte.
+    """
+
+    def __init__(self, devices_file=KNOWN_DEVICES_FILE, options_file=DEVICE_OPTIONS_FILE):
+        self.devices_file = devices_file
+        self.options_file = options_file
+        self._devices = {}       # { "MAC": DeviceEntry }
+        self._battery = []       # MACs mit aktivem Batterie-Flag (Reihenfolge wie in known_devices.txt)
+        self._groups = {}        # { "Gruppe": set(MACs) }
+        self._file_state = None  # (mtime_ns, size) beider Dateien beim letzten Laden
+
+    # --- Zugriff ---
+    def __contains__(self, mac):
+        return mac in self._devices
+
+    def __len__(self):
+        return len(self._devices)
+
+    def __iter__(self):
+        return iter(self._devices.values())
+
+    def get(self, mac):
+        return self._devices.get(mac)
+
+    def alias(self, mac, fallback=None):
+        entry = self._devices.get(mac)
+        return entry.alias if entry else fallback
+
+    def macs(self):
+        return self._devices.keys()
+
+    def battery_macs(self):
+        return list(self._battery)
+
+    def group(self, name):
+        return self._groups.get(name, set())
+
+    def groups(self):
+        return self._groups.keys()
+
+    # --- Laden ---
+    def _stat(self, path):
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def _read_options(self):
+        options = {}
+        if not os.path.exists(self.options_file):
+            return options
+        parser = configparser.ConfigParser(interpolation=None)
+        try:
+            parser.read(self.options_file)
+        except configparser.Error as e:
+            logger.error("Fehler beim Lesen von %s: %s", self.options_file, e)
+            return options
+        for section in parser.sections():
+            options[normalize_mac(section)] = dict(parser.items(section))
+        return options
+
+    def _read_devices(self, options):
+        entries = {}
+        with open(self.devices_file, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line or "," not in line:
+                    continue
+                parts = line.split(",", 2)
+                mac = normalize_mac(parts[0])
+                alias = parts[1].strip()
+                battery = len(parts) == 3 and parts[2].strip() == '1'
+                device_options = dict(options.get(mac, {}))
+                group = device_options.pop("group", None)
+                entries[mac] = DeviceEntry(mac, alias, battery, group, device_options)
+        return entries
+
+    def reload(self, force=False):
+        """Lädt die Geräteliste neu, falls sich eine der Dateien geändert hat. Gibt ein RegistryDiff zurück."""
+        file_state = (self._stat(self.devices_file), self._stat(self.options_file))
+        if not force and file_state == self._file_state:
+            return RegistryDiff()
+
+        if file_state[0] is None:
+            if self._file_state is None or self._file_state[0] is not None:
+                logger.warning("%s nicht gefunden. 'scan' wird keine Geräte melden.", self.devices_file)
+            new_entries = {}
+        else:
+            try:
+                new_entries = self._read_devices(self._read_options())
+            except OSError as e:
+                # Alten Stand behalten und beim nächsten Durchlauf erneut versuchen
+                logger.error("Fehler beim Lesen von %s: %s", self.devices_file, e)
+                return RegistryDiff()
+            if not new_entries:
+                logger.warning("%s ist leer oder im falschen Format (MAC,Alias,Flag).", self.devices_file)
+        self._file_state = file_state
+
+        diff = RegistryDiff()
+        old_entries = self._devices
+        for mac, entry in new_entries.items():
+            old = old_entries.get(mac)
+            if old is None:
+                diff.added.append(mac)
+            elif old.signature() != entry.signature():
+                entry.last_online = old.last_online
+                diff.changed.append(mac)
+            else:
+                # Unverändert: bestehendes Objekt (inkl. Laufzeit-Zustand) weiterverwenden
+                new_entries[mac] = old
+        diff.removed = [mac for mac in old_entries if mac not in new_entries]
+
+        if diff:
+            self._devices = new_entries
+            self._rebuild_indexes()
+            logger.info("Geräteliste neu geladen: %d Geräte (%d neu, %d entfernt, %d geändert)",
+                        len(new_entries), len(diff.added), len(diff.removed), len(diff.changed))
+        return diff
+
+    def _rebuild_indexes(self):
+        self._battery = [mac for mac, entry in self._devices.items() if entry.battery]
+        groups = {}
+        for mac, entry in self._devices.items():
+            if entry.group:
+                groups.setdefault(entry.group, set()).add(mac)
+        self._groups = groups
+
+
+# --- Benchmark (python3 ble_registry.py [Anzahl]) ---
+def _benchmark(count=10000):
+    import sys
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        devices_file = os.path.join(tmp_dir, "known_devices.txt")
+        options_file = os.path.join(tmp_dir, "device_options.ini")
+        macs = [":".join(f"{(i >> shift) & 0xFF:02X}" for shift in (40, 32, 24, 16, 8, 0)) for i in range(count)]
+
+        def write_devices(suffix=""):
+            with open(devices_file, "w") as f:
+                for i, mac in enumerate(macs):
+                    alias = f"Geraet_{i}{suffix if i % 100 == 0 else ''}"
+                    f.write(f"{mac},{alias},{i % 2}\n")
+
+        write_devices()
+        with open(options_file, "w") as f:
+            for i, mac in enumerate(macs[::10]):
+                f.write(f"[{mac}]\ngroup = gruppe_{i % 20}\nconnect_timeout = 15\n\n")
+
+        registry = DeviceRegistry(devices_file, options_file)
+
+        def measure(label, func, repeat=1):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                result = func()
+            elapsed = (time.perf_counter() - start) / repeat
+            print(f"{label:<40} {elapsed * 1000:10.3f} ms")
+            return result
+
+        print(f"DeviceRegistry-Benchmark mit {count} Geräten (Python {sys.version.split()[0]})")
+        diff = measure("Erstes Laden", registry.reload)
+        print(f"  -> {diff}")
+        measure("Reload ohne Änderung (nur stat)", registry.reload, repeat=1000)
+        write_devices("_neu")
+        diff = measure("Reload mit 1% geänderten Aliasen", registry.reload)
+        print(f"  -> {diff}")
+        measure(f"{count} Lookups per MAC", lambda: [registry.alias(mac) for mac in macs], repeat=10)
+        measure("Batterie-MACs abfragen", registry.battery_macs, repeat=100)
+        measure("Gruppe abfragen", lambda: registry.group("gruppe_3"), repeat=1000)
+
+
+if __name__ == "__main__":
+    import sys
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
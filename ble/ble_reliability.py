@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Verbindungs-Statistik und Circuit-Breaker für BLE Tool
+Speichert pro Gerät Erfolgsquote, Verbindungsdauer und letzten Fehler in
+connection_stats.json und überspringt dauerhaft fehlschlagende Geräte mit
+exponentiellem Backoff.
+"""
+
+import os
+import json
+import time
+from ble_logger import get_logger
+
+logger = get_logger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CONNECTION_STATS_FILE = os.path.join(BASE_DIR, "connection_stats.json")
+
+# --- Breaker-Zustände ---
+BREAKER_CLOSED = "closed"       # Normalbetrieb
+BREAKER_OPEN = "open"           # Gerät wird bis open_until übersprungen
+BREAKER_HALF_OPEN = "half_open" # Backoff abgelaufen: ein einzelner Probe-Versuch
+
+DEFAULT_BREAKER_THRESHOLD = 3        # Fehlgeschlagene Abfragen in Folge bis zum Öffnen
+DEFAULT_BREAKER_BACKOFF_HOURS = 24   # Erster Backoff, verdoppelt sich bei jedem Fehlschlag
+DEFAULT_BREAKER_MAX_BACKOFF_HOURS = 336
+
+
+def _new_stats():
+    return {
+        "attempts": 0,
+        "successes": 0,
+        "failures": 0,
+        "connect_time_total": 0.0,
+        "consecutive_failures": 0,
+        "last_success": None,
+        "last_failure": None,
+        "last_failure_reason": None,
+        "breaker_state": BREAKER_CLOSED,
+        "breaker_trips": 0,
+        "open_until": None
+    }
+
+
+class ReliabilityTracker:
+    """Persistente Verbindungs-Statistik pro Gerät inkl. Circuit-Breaker."""
+
+    def __init__(self, stats_file=CONNECTION_STATS_FILE, threshold=DEFAULT_BREAKER_THRESHOLD,
+                 backoff_hours=DEFAULT_BREAKER_BACKOFF_HOURS, max_backoff_hours=DEFAULT_BREAKER_MAX_BACKOFF_HOURS):
+        self.stats_file = stats_file
+        self.threshold = threshold
+        self.backoff_seconds = backoff_hours * 3600
+        self.max_backoff_seconds = max_backoff_hours * 3600
+        self._data = {}
+        self.load()
+
+    @classmethod
+    def from_config(cls, config, stats_file=CONNECTION_STATS_FILE):
+        return cls(
+            stats_file,
+            config.getint('General', 'breaker_threshold', fallback=DEFAULT_BREAKER_THRESHOLD),
+            config.getfloat('General', 'breaker_backoff_hours', fallback=DEFAULT_BREAKER_BACKOFF_HOURS),
+            config.getfloat('General', 'breaker_max_backoff_hours', fallback=DEFAULT_BREAKER_MAX_BACKOFF_HOURS)
+        )
+
+    def load(self):
+        try:
+            if os.path.exists(self.stats_file):
+                with open(self.stats_file, "r") as f:
+                    self._data = json.load(f)
+        except Exception as e:
+            logger.warning("Konnte %s nicht lesen: %s", self.stats_file, e)
+            self._data = {}
+
+    def save(self):
+        tmp_file = self.stats_file + ".tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump(self._data, f, indent=4)
+            os.replace(tmp_file, self.stats_file)
+        except Exception as e:
+            logger.error("Fehler beim Schreiben von %s: %s", self.stats_file, e)
+
+    def _device(self, mac):
+        stats = self._data.get(mac)
+        if stats is None:
+            stats = self._data[mac] = _new_stats()
+        return stats
+
+    def all_stats(self):
+        return self._data
+
+    # --- Circuit-Breaker ---
+    def check(self, mac, now=None):
+        """Gibt den aktuellen Breaker-Zustand zurück; ein abgelaufenes 'open' wird zu 'half_open'."""
+        stats = self._data.get(mac)
+        if stats is None or stats["breaker_state"] == BREAKER_CLOSED:
+            return BREAKER_CLOSED
+        now = time.time() if now is None else now
+        if stats["breaker_state"] == BREAKER_OPEN and now >= (stats["open_until"] or 0):
+            stats["breaker_state"] = BREAKER_HALF_OPEN
+        return stats["breaker_state"]
+
+    def reset(self, mac):
+        """Schließt den Breaker manuell (z.B. nach erneutem Pairing)."""
+        stats = self._data.get(mac)
+        if stats is None:
+            return False
+        stats["breaker_state"] = BREAKER_CLOSED
+        stats["consecutive_failures"] = 0
+        stats["breaker_trips"] = 0
+        stats["open_until"] = None
+        return True
+
+    # --- Erfassung ---
+    def record_attempt(self, mac, success, connect_seconds=None, reason=None, now=None):
+        """Erfasst einen einzelnen Verbindungsversuch."""
+        stats = self._device(mac)
+        now = int(time.time() if now is None else now)
+        stats["attempts"] += 1
+        if success:
+            stats["successes"] += 1
+            stats["connect_time_total"] += connect_seconds or 0.0
+            stats["last_success"] = now
+        else:
+            stats["failures"] += 1
+            stats["last_failure"] = now
+            stats["last_failure_reason"] = reason
+
+    def record_result(self, mac, success, now=None):
+        """Erfasst das Ergebnis einer kompletten Abfrage (alle Versuche) und schaltet den Breaker."""
+        stats = self._device(mac)
+        now = time.time() if now is None else now
+        if success:
+            if stats["breaker_state"] != BREAKER_CLOSED:
+                logger.info("Circuit-Breaker für %s geschlossen (Gerät wieder erreichbar).", mac)
+            stats["consecutive_failures"] = 0
+            stats["breaker_state"] = BREAKER_CLOSED
+            stats["breaker_trips"] = 0
+            stats["open_until"] = None
+            return
+
+        stats["consecutive_failures"] += 1
+        if stats["breaker_state"] == BREAKER_HALF_OPEN or stats["consecutive_failures"] >= self.threshold:
+            stats["breaker_trips"] += 1
+            backoff = min(self.backoff_seconds * (2 ** (stats["breaker_trips"] - 1)), self.max_backoff_seconds)
+            stats["breaker_state"] = BREAKER_OPEN
+            stats["open_until"] = int(now + backoff)
+            logger.warning("Circuit-Breaker für %s geöffnet (%d Fehlschläge in Folge). Nächster Versuch in %.1fh.",
+                           mac, stats["consecutive_failures"], backoff / 3600)
+
+
+def format_stats(stats_data, aliases=None, now=None):
+    """Formatiert die Statistik als Tabelle für die Konsole."""
+    now = time.time() if now is None else now
+    aliases = aliases or {}
+    lines = [f"{'MAC':<17}  {'Alias':<20} {'Erfolg':>7} {'Versuche':>8} {'Ø Verb.':>8} {'Folge-F.':>8}  {'Breaker':<10} {'Bis':<16}  Letzter Fehler"]
+    for mac in sorted(stats_data):
+        stats = stats_data[mac]
+        rate = 100.0 * stats["successes"] / stats["attempts"] if stats["attempts"] else 0.0
+        mean_connect = stats["connect_time_total"] / stats["successes"] if stats["successes"] else 0.0
+        state = stats["breaker_state"]
+        if state == BREAKER_OPEN and now >= (stats["open_until"] or 0):
+            state = BREAKER_HALF_OPEN
+        until = time.strftime("%Y-%m-%d %H:%M", time.localtime(stats["open_until"])) if state == BREAKER_OPEN else "-"
+        lines.append(
+            f"{mac:<17}  {aliases.get(mac, '-')[:20]:<20} {rate:6.1f}% {stats['attempts']:>8} {mean_connect:7.1f}s "
+            f"{stats['consecutive_failures']:>8}  {state:<10} {until:<16}  {stats['last_failure_reason'] or '-'}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Shared-Memory-Ringpuffer für BLE Tool
+Ein Scanner-Prozess schreibt Erkennungen als Datensätze fester Größe, mehrere
+Worker-Prozesse lesen sie mit eigenem Lesezeiger (jeder Worker sieht jeden
+Datensatz). Überholt der Scanner einen Worker, werden die verlorenen Datensätze
+gezählt statt den Scanner zu blockieren.
+"""
+
+import sys
+import struct
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+# --- Datensatz-Arten ---
+KIND_ONLINE = 1
+KIND_OFFLINE = 2
+
+# --- Flags ---
+FLAG_PUBLISH = 0x01 # Publish-Policy verlangt eine Meldung per UDP/MQTT
+
+DEFAULT_RING_CAPACITY = 4096
+MAX_CONSUMERS = 8
+
+# Header: <Kapazität><Datensatzgröße><Anzahl Consumer><Shutdown><Schreib-Sequenz>
+#         danach je Consumer <Lese-Sequenz><Überläufe>
+_HEADER = struct.Struct("<IIII Q")
+_CONSUMER = struct.Struct("<QQ")
+_HEADER_SIZE = _HEADER.size + MAX_CONSUMERS * _CONSUMER.size
+# Datensatz (64 Byte): <Sequenz><Zeitstempel><MAC><RSSI><Art><Flags><Name>
+_RECORD = struct.Struct("<Qd6shBB38s")
+_SEQ = struct.Struct("<Q")
+_WRITE_SEQ_OFFSET = 16
+_SLOT_BUSY = 0xFFFFFFFFFFFFFFFF   # Sequenz im Slot, während der Producer ihn beschreibt
+
+# Python kennt keine Speicherbarrieren. Lock-Operationen enthalten eine volle
+# Barriere (auch auf ARM), daher trennt ein unbenutzter Lock die Schreib- bzw.
+# Lesezugriffe auf Slot-Sequenz und Nutzdaten.
+_fence_lock = threading.Lock()
+
+
+def _fence():
+    _fence_lock.acquire()
+    _fence_lock.release()
+
+
+def _attach_untracked(name):
+    """
+    Öffnet ein bestehendes Segment, ohne es beim resource_tracker anzumelden.
+    Sonst meldet der Tracker beim Ende des Workers ein Leck bzw. gibt das Segment
+    frei. Ein nachträgliches unregister() ginge bei spawn schief: Worker teilen sich
+    den Tracker mit dem Elternprozess und würden dessen Anmeldung entfernen.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class Detection:
+    """Ein gelesener Datensatz."""
+
+    __slots__ = ("seq", "timestamp", "address", "rssi", "kind", "flags", "name")
+
+    def __init__(self, seq, timestamp, address, rssi, kind, flags, name):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.address = address
+        self.rssi = rssi
+        self.kind = kind
+        self.flags = flags
+        self.name = name
+
+
+class DetectionRing:
+    """
+    Single-Producer/Multi-Consumer-Ringpuffer in Shared Memory.
+    Ohne Locks, pro Slot ein Seqlock: der Producer markiert den Slot als belegt,
+    schreibt die Nutzdaten, trägt dann die Sequenz des Datensatzes ein und erhöht
+    erst danach die Schreib-Sequenz. Consumer übernehmen einen Datensatz nur, wenn
+    die Slot-Sequenz vor und nach dem Kopieren der erwarteten Sequenz entspricht.
+    """
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self._buf = shm.buf
+        self._owner = owner
+        self.capacity, self.record_size, self.consumers, _, _ = _HEADER.unpack_from(self._buf, 0)
+
+    @classmethod
+    def create(cls, capacity=DEFAULT_RING_CAPACITY, consumers=1):
+        if not 1 <= consumers <= MAX_CONSUMERS:
+            raise ValueError(f"consumers muss zwischen 1 und {MAX_CONSUMERS} liegen")
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER_SIZE + capacity * _RECORD.size)
+        _HEADER.pack_into(shm.buf, 0, capacity, _RECORD.size, consumers, 0, 0)
+        for index in range(MAX_CONSUMERS):
+            _CONSUMER.pack_into(shm.buf, _HEADER.size + index * _CONSUMER.size, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        return cls(_attach_untracked(name), owner=False)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    # --- Header ---
+    def _write_seq(self):
+        return _SEQ.unpack_from(self._buf, _WRITE_SEQ_OFFSET)[0]
+
+    def _consumer_offset(self, consumer):
+        return _HEADER.size + consumer * _CONSUMER.size
+
+    def consumer_state(self, consumer):
+        """(Lese-Sequenz, Überläufe) eines Consumers."""
+        return _CONSUMER.unpack_from(self._buf, self._consumer_offset(consumer))
+
+    def lag(self, consumer):
+        return self._write_seq() - self.consumer_state(consumer)[0]
+
+    def written(self):
+        return self._write_seq()
+
+    def request_shutdown(self):
+        struct.pack_into("<I", self._buf, 12, 1)
+
+    def shutdown_requested(self):
+        return struct.unpack_from("<I", self._buf, 12)[0] == 1
+
+    # --- Producer ---
+    def write(self, kind, address, rssi, name=None, flags=0, timestamp=None):
+        seq = self._write_seq()
+        offset = _HEADER_SIZE + (seq % self.capacity) * _RECORD.size
+        _SEQ.pack_into(self._buf, offset, _SLOT_BUSY)
+        _fence()
+        _RECORD.pack_into(
+            self._buf, offset, _SLOT_BUSY, time.time() if timestamp is None else timestamp,
+            bytes.fromhex(address.replace(":", "")), max(-32768, min(32767, rssi)), kind, flags,
+            (name or "").encode("utf-8")[:38]
+        )
+        _fence()
+        _SEQ.pack_into(self._buf, offset, seq)
+        _fence()
+        _SEQ.pack_into(self._buf, _WRITE_SEQ_OFFSET, seq + 1)
+
+    # --- Consumer ---
+    def read(self, consumer, max_records=256):
+        """Liest bis zu max_records neue Datensätze für diesen Consumer."""
+        read_seq, overflows = self.consumer_state(consumer)
+        write_seq = self._write_seq()
+        # Vom Producer überholt: älteste noch gültige Position ist write_seq - capacity
+        if write_seq - read_seq > self.capacity:
+            lost = write_seq - self.capacity - read_seq
+            overflows += lost
+            read_seq += lost
+
+        records = []
+        end_seq = min(write_seq, read_seq + max_records)
+        _fence()
+        seq = read_seq
+        while seq < end_seq:
+            offset = _HEADER_SIZE + (seq % self.capacity) * _RECORD.size
+            before = _SEQ.unpack_from(self._buf, offset)[0]
+            _fence()
+            record_seq, timestamp, raw_address, rssi, kind, flags, raw_name = _RECORD.unpack_from(self._buf, offset)
+            _fence()
+            after = _SEQ.unpack_from(self._buf, offset)[0]
+            if before == after == seq:
+                records.append(Detection(
+                    seq, timestamp, ":".join(f"{b:02X}" for b in raw_address),
+                    rssi, kind, flags, raw_name.rstrip(b"\x00").decode("utf-8", errors="replace") or None
+                ))
+            elif seq < before != _SLOT_BUSY or self._write_seq() - seq >= self.capacity:
+                # Slot wurde während des Lesens (teilweise) überschrieben
+                overflows += 1
+            else:
+                # Datensatz noch nicht sichtbar: beim nächsten Aufruf erneut lesen
+                break
+            seq += 1
+        _CONSUMER.pack_into(self._buf, self._consumer_offset(consumer), seq, overflows)
+        return records
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+# --- Benchmark (python3 ble_ring.py) ---
+def _benchmark(rate=300, duration=10.0, publish_cost=0.0005):
+    """
+    Synthetische Last: 'rate' Erkennungen pro Sekunde, jede Veröffentlichung
+    blockiert 'publish_cost' Sekunden. Gemessen wird die Verzögerung der Event-Loop
+    im Scanner, also wie lange neue Advertisements auf ihre Verarbeitung warten.
+    Die Standardwerte entsprechen einer belebten Umgebung mit lokalem Broker.
+    Ab rate * publish_cost >= 1 ist ein einzelner Prozess überlastet; dann wächst
+    die Verzögerung unbegrenzt, während im Mehrprozess-Betrieb der Worker überläuft.
+    """
+    import asyncio
+    import multiprocessing
+
+    async def measure(handle_detection):
+        lags = []
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / rate
+        start = loop.time()
+        next_tick = start
+        count = 0
+        while loop.time() - start < duration:
+            next_tick += interval
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            lags.append(max(0.0, loop.time() - next_tick))
+            handle_detection(count)
+            count += 1
+        lags.sort()
+        return count, lags[len(lags) // 2], lags[int(len(lags) * 0.99)], lags[-1]
+
+    def report(label, result, extra=""):
+        count, p50, p99, worst = result
+        print(f"{label:<16} {count:>7} Erkennungen  Loop-Verzögerung p50 {p50 * 1000:7.2f} ms  "
+              f"p99 {p99 * 1000:8.2f} ms  max {worst * 1000:8.2f} ms {extra}")
+
+    def single_process():
+        async def run():
+            def handle(i):
+                async def publish():
+                    time.sleep(publish_cost)
+                asyncio.get_running_loop().create_task(publish())
+            return await measure(handle)
+        return asyncio.run(run())
+
+    def multi_process():
+        ring = DetectionRing.create(consumers=1)
+        worker = multiprocessing.get_context("spawn").Process(
+            target=_benchmark_consumer, args=(ring.name, publish_cost), daemon=True
+        )
+        worker.start()
+        try:
+            result = asyncio.run(measure(lambda i: ring.write(KIND_ONLINE, "AA:BB:CC:DD:EE:FF", -60, "bench", FLAG_PUBLISH)))
+            _, overflows = ring.consumer_state(0)
+            return result, overflows, ring.lag(0), ring.written()
+        finally:
+            ring.request_shutdown()
+            worker.join(5)
+            ring.close()
+
+    print(f"Ringpuffer-Benchmark: {rate:g}/s Erkennungen für {duration:.0f}s, Publish blockiert {publish_cost * 1000:.1f} ms "
+          f"(Auslastung {rate * publish_cost:.0%})")
+    report("Ein Prozess", single_process())
+    result, overflows, lag, written = multi_process()
+    report("Mehrere Prozesse", result, f"(Worker: {overflows} Überläufe, {lag} Rückstand von {written})")
+
+
+def _benchmark_consumer(ring_name, publish_cost):
+    ring = DetectionRing.attach(ring_name)
+    try:
+        while not ring.shutdown_requested():
+            records = ring.read(0)
+            if not records:
+                time.sleep(0.01)
+            for _ in records:
+                time.sleep(publish_cost)
+    finally:
+        ring.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Vergleicht process_mode single und multi unter synthetischer Last.")
+    parser.add_argument("--rate", type=float, default=300, help="Erkennungen pro Sekunde (Standard: 300)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Dauer je Modus in Sekunden (Standard: 10)")
+    parser.add_argument("--publish-ms", type=float, default=0.5, help="Blockierende Zeit je Veröffentlichung in ms (Standard: 0.5)")
+    args = parser.parse_args()
+    _benchmark(args.rate, args.duration, args.publish_ms / 1000)
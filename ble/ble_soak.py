@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Soak-Test für den Scan-Daemon
+Lässt die echte Daemon-Schleife (Config-Reload, Geräteliste, Live-Stream, Scan,
+Online/Offline-Berichte) und regelmäßige Batterie-Jobs (GATT-Lesen, Cache,
+Circuit-Breaker) mit simuliertem Scanner, GATT-Client und MQTT-Client im
+Zeitraffer laufen und misst dabei RSS, Python-Heap (tracemalloc), offene
+Dateideskriptoren und laufende Tasks. Wächst ein Wert stärker als erlaubt,
+endet der Test mit Exitcode 1 und zeigt die wachsenden Allokationsstellen.
+
+Beispiel: python3 ble_soak.py --days 3 --devices 30 --foreign 200
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+# Ohne bleak/paho (z.B. auf dem Entwicklungsrechner) ist kein Soak-Test möglich
+import ble_tool
+from ble_registry import DeviceRegistry
+from ble_live import LiveHub
+from ble_capture import ReplayDevice
+from ble_window import WindowController, WINDOW_MODES, WINDOW_FIXED, END_COMPLETE
+from ble_gatt import GattCache, CHARACTERISTICS
+from ble_reliability import ReliabilityTracker, BREAKER_OPEN
+from ble_presence import PresenceModel, DEPARTURE_MODES, DEPARTURE_WINDOW
+
+SIMULATED_CYCLE_SECONDS = 15    # 10s Scan-Fenster + 5s Pause im Normalbetrieb
+TIME_SCALE = 1e6                # Zeitraffer: Fenster und Pausen schrumpfen auf wenige µs
+
+
+class SoakAdvertisement:
+    __slots__ = ("rssi", "local_name", "manufacturer_data", "service_data", "service_uuids")
+
+    def __init__(self, rssi, name):
+        self.rssi = rssi
+        self.local_name = name
+        self.manufacturer_data = {}
+        self.service_data = {}
+        self.service_uuids = []
+
+
+class SoakScanner:
+    """
+    Ersatz für BleakScanner: meldet beim Start die anwesenden bekannten Geräte und
+    'foreign' fremde Geräte mit zufälliger (wie bei RPAs ständig neuer) Adresse.
+    Wie BlueZ mit Duplikat-Filter kommt pro Fenster höchstens eine Meldung je Gerät,
+    bei jedem zweiten bekannten Gerät zusätzlich die Scan Response (ADV_IND + SCAN_RSP).
+    Wie im Daemon wird pro Durchlauf eine neue Instanz erzeugt.
+    """
+
+    def __init__(self, detection_callback, known_macs, foreign, presence, rng):
+        self._callback = detection_callback
+        self._known_macs = known_macs
+        self._foreign = foreign
+        self._presence = presence
+        self._rng = rng
+
+    async def start(self):
+        rng = self._rng
+        for index, mac in enumerate(self._known_macs):
+            if rng.random() < self._presence:
+                rssi = rng.randint(-95, -40)
+                self._callback(ReplayDevice(mac, "Soak"), SoakAdvertisement(rssi, None))
+                if index % 2:
+                    self._callback(ReplayDevice(mac, "Soak"), SoakAdvertisement(rssi, "Soak"))
+        for _ in range(self._foreign):
+            mac = "%02X:%02X:%02X:%02X:%02X:%02X" % tuple(rng.getrandbits(48).to_bytes(6, "big"))
+            self._callback(ReplayDevice(mac, None), SoakAdvertisement(rng.randint(-100, -60), None))
+
+    async def stop(self):
+        pass
+
+
+class SoakGattClient:
+    """
+    Ersatz für BleakClient im Batterie-Job: liefert Batterie und Firmware, alle anderen
+    Characteristics fehlen. Verbindungen scheitern zufällig mit failure_rate, Geräte aus
+    'unreachable' nie (damit öffnet sich deren Circuit-Breaker).
+    """
+
+    def __init__(self, stats, unreachable, failure_rate, rng, mac, timeout=10.0):
+        self._stats = stats
+        self._unreachable = unreachable
+        self._failure_rate = failure_rate
+        self._rng = rng
+        self.address = mac
+        self.is_connected = False
+
+    async def __aenter__(self):
+        self._stats["connects"] += 1
+        await asyncio.sleep(0)
+        if self.address in self._unreachable or self._rng.random() < self._failure_rate:
+            self._stats["failures"] += 1
+            raise ble_tool.BleakError(f"Gerät {self.address} nicht gefunden (simuliert)")
+        self.is_connected = True
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.is_connected = False
+
+    async def read_gatt_char(self, uuid):
+        self._stats["reads"] += 1
+        if uuid == CHARACTERISTICS["battery"][0]:
+            return bytearray([self._rng.randint(0, 100)])
+        if uuid == CHARACTERISTICS["firmware"][0]:
+            return bytearray(b"1.0.0\x00")
+        raise ble_tool.BleakError(f"Characteristic {uuid} nicht gefunden (simuliert)")
+
+
+class SoakMqttClient:
+    """Ersatz für den paho-Client: zählt nur die Veröffentlichungen."""
+
+    def __init__(self):
+        self.published = 0
+
+    def is_connected(self):
+        return True
+
+    def publish(self, topic, payload, qos=0):
+        self.published += 1
+
+    def loop_stop(self):
+        pass
+
+    def disconnect(self):
+        pass
+
+
+# --- Messwerte ---
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 # Linux: Spitzenwert in KiB
+
+
+def _open_fds():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return -1
+
+
+def _sample(cycle, battery_tasks=0):
+    return {
+        "cycle": cycle,
+        "simulated_hours": cycle * SIMULATED_CYCLE_SECONDS / 3600,
+        "rss": _rss_bytes(),
+        "heap": tracemalloc.get_traced_memory()[0],
+        "fds": _open_fds(),
+        "tasks": len(asyncio.all_tasks()) - 1 - battery_tasks,   # ohne den Soak-Task und einen laufenden Batterie-Job
+        "battery_tasks": battery_tasks,
+        "publish_tasks": len(ble_tool.publish_tasks)
+    }
+
+
+class SoakWindowController(WindowController):
+    """WindowController, der zusätzlich Kennzahlen über den ganzen Lauf sammelt (ohne je Fenster Speicher zu belegen)."""
+
+    def __init__(self, base_seconds):
+        super().__init__(base_seconds)
+        self.run_totals = {"cycles": 0, "shortest": None, "longest": None, "completed": 0, "extended": 0,
+                           "window_seconds": 0.0, "cycle_seconds": 0.0}
+
+    def record_cycle(self, window, cycle_seconds, granted_seconds=0.0):
+        super().record_cycle(window, cycle_seconds, granted_seconds)
+        totals = self.run_totals
+        totals["cycles"] += 1
+        totals["shortest"] = window["seconds"] if totals["shortest"] is None else min(totals["shortest"], window["seconds"])
+        totals["longest"] = window["seconds"] if totals["longest"] is None else max(totals["longest"], window["seconds"])
+        totals["completed"] += window["reason"] == END_COMPLETE
+        totals["extended"] += window["extended"]
+        totals["window_seconds"] += window["seconds"]
+        totals["cycle_seconds"] += cycle_seconds
+
+
+class SoakRun:
+    """Steuert die Durchläufe über den cycle_hook der Daemon-Schleife und sammelt Messwerte."""
+
+    def __init__(self, args, work_dir, known_macs, rng):
+        self.args = args
+        self.work_dir = work_dir
+        self.known_macs = known_macs
+        self.rng = rng
+        self.total_cycles = max(1, int(args.days * 86400 / SIMULATED_CYCLE_SECONDS))
+        self.warmup_cycles = max(1, int(self.total_cycles * args.warmup))
+        self.sample_every = max(1, self.total_cycles // args.samples)
+        self.samples = []
+        self.baseline = None
+        self.baseline_snapshot = None
+        self.started = time.monotonic()
+        # Batterie-Job: jedes vierte Batterie-Gerät ist nie erreichbar
+        self.battery_job = None
+        self.battery_tasks = set()
+        self.battery_stats = {"jobs": 0, "connects": 0, "failures": 0, "reads": 0}
+        self.unreachable = set(self.battery_macs()[::4])
+
+    def battery_macs(self):
+        return [mac for index, mac in enumerate(self.known_macs) if index % 2]
+
+    def on_cycle(self, cycle):
+        if cycle % self.args.edit_every == 0:
+            self._touch_inputs(cycle)
+        # Erster Job gleich im ersten Durchlauf, damit GATT-Cache und Statistik vor der Baseline gefüllt sind
+        if self.args.battery_every and (cycle - 1) % self.args.battery_every == 0 and \
+                (self.battery_job is None or self.battery_job.done()):
+            self.battery_job = asyncio.get_running_loop().create_task(self._run_battery_job())
+        if cycle == self.warmup_cycles:
+            # Caches (Geräteliste, Live-Zustand, Logger, GATT-Cache) sind gefüllt: ab hier zählt jedes Wachstum
+            self.baseline = _sample(cycle, self._running_battery_tasks())
+            self.baseline_snapshot = _snapshot()
+            self.samples.append(self.baseline)
+        elif cycle > self.warmup_cycles and (cycle % self.sample_every == 0 or cycle >= self.total_cycles):
+            sample = _sample(cycle, self._running_battery_tasks())
+            self.samples.append(sample)
+            if not self.args.quiet:
+                print(_format_sample(sample), flush=True)
+        return cycle < self.total_cycles
+
+    def _running_battery_tasks(self):
+        running = sum(not task.done() for task in self.battery_tasks)
+        return running + (self.battery_job is not None and not self.battery_job.done())
+
+    async def _run_battery_job(self):
+        """Wie 'read_enabled_batteries': Lock-Datei für den Daemon, parallele Abfragen mit Circuit-Breaker."""
+        self.battery_stats["jobs"] += 1
+        config = ble_tool.load_config()
+        registry = DeviceRegistry(ble_tool.KNOWN_DEVICES_FILE, os.path.join(self.work_dir, "device_options.ini"))
+        registry.reload()
+        semaphore = asyncio.Semaphore(config.getint('General', 'max_parallel_reads', fallback=1))
+
+        def client_factory(mac, timeout=10.0):
+            return SoakGattClient(self.battery_stats, self.unreachable, self.args.battery_failure, self.rng, mac, timeout)
+
+        open(ble_tool.BATTERY_JOB_LOCK, "a").close()
+        try:
+            self.battery_tasks = {
+                asyncio.ensure_future(ble_tool.read_battery_and_report(
+                    mac, config, self.mqtt_client, registry, semaphore, use_breaker=True,
+                    client_factory=client_factory, time_scale=TIME_SCALE))
+                for mac in registry.battery_macs()
+            }
+            await asyncio.gather(*self.battery_tasks)
+        finally:
+            self.battery_tasks = set()
+            os.remove(ble_tool.BATTERY_JOB_LOCK)
+
+    def _touch_inputs(self, cycle):
+        """Ändert wie im Betrieb Geräteliste und Batteriestatus (WebUI bzw. Batterie-Job)."""
+        with open(os.path.join(self.work_dir, "known_devices.txt"), "w") as f:
+            for index, mac in enumerate(self.known_macs):
+                f.write(f"{mac},Soak_{index}_{cycle % 7},{index % 2}\n")
+        with open(ble_tool.BATTERY_STATUS_FILE, "w") as f:
+            json.dump({mac: {"battery_percent": (cycle + index) % 100, "status": "success", "timestamp": int(time.time())}
+                       for index, mac in enumerate(self.known_macs)}, f)
+
+
+def _format_sample(sample):
+    return (f"{sample['simulated_hours'] / 24:6.2f} Tage  Durchlauf {sample['cycle']:>7}  "
+            f"RSS {sample['rss'] / 1048576:7.1f} MB  Heap {sample['heap'] / 1048576:7.2f} MB  "
+            f"FDs {sample['fds']:>4}  Tasks {sample['tasks']:>3} (Publish {sample['publish_tasks']})")
+
+
+def _evaluate(run, args):
+    """Vergleicht den letzten Messwert mit der Baseline nach dem Warmup."""
+    first, last = run.baseline, run.samples[-1]
+    days = max((last["simulated_hours"] - first["simulated_hours"]) / 24, 1e-9)
+    checks = [
+        ("RSS", (last["rss"] - first["rss"]) / 1048576, args.max_rss_growth_mb, "MB"),
+        ("Heap", (last["heap"] - first["heap"]) / 1048576, args.max_heap_growth_mb, "MB"),
+        ("FDs", last["fds"] - first["fds"], args.max_fd_growth, ""),
+        ("Tasks", last["tasks"] - first["tasks"], args.max_task_growth, "")
+    ]
+    return [{"metric": metric, "growth": growth, "per_day": growth / days, "limit": limit,
+             "unit": unit, "ok": growth <= limit} for metric, growth, limit, unit in checks]
+
+
+def _check_windows(controller, args):
+    """Plausibilität der Fensterstatistik: Längen in den konfigurierten Grenzen, Duty-Cycle, Vollständigkeit."""
+    totals = controller.run_totals
+    cycles = totals["cycles"]
+    shortest = controller.min_seconds if controller.adaptive else controller.base_seconds
+    checks = [
+        ("Durchläufe", cycles, cycles > 0),
+        ("Fensterlänge", f"{totals['shortest'] or 0:.2f}-{totals['longest'] or 0:.2f}s "
+                         f"(erlaubt {shortest:g}-{controller.longest_seconds():g}s)",
+         cycles > 0 and shortest - 1e-6 <= totals["shortest"] and totals["longest"] <= controller.longest_seconds() + 1e-6),
+    ]
+    duty_cycle = totals["window_seconds"] / totals["cycle_seconds"] if totals["cycle_seconds"] else 0.0
+    checks.append(("Duty-Cycle", f"{100 * duty_cycle:.0f}%", 0.0 < duty_cycle <= 1.0))
+    if controller.adaptive and args.presence >= 1.0:
+        # Alle bekannten Geräte senden sofort: jedes Fenster endet nach min_window_seconds
+        checks.append(("Vollständig", f"{totals['completed']}/{cycles}, {totals['extended']} verlängert",
+                       totals["completed"] == cycles and totals["extended"] == 0))
+    return [{"check": check, "value": str(value), "ok": bool(ok)} for check, value, ok in checks]
+
+
+def _check_battery(run):
+    """Der Batterie-Job lief, las Werte und hat die Breaker der unerreichbaren Geräte geöffnet."""
+    stats = run.battery_stats
+    tracker = ble_tool.reliability_tracker
+    opened = sum(tracker.check(mac) == BREAKER_OPEN for mac in run.unreachable) if tracker else 0
+    checks = [
+        ("Jobs", stats["jobs"], stats["jobs"] > 0),
+        ("Verbindungen", f"{stats['connects']} ({stats['failures']} fehlgeschlagen), {stats['reads']} Reads",
+         stats["reads"] > 0),
+        ("Breaker offen", f"{opened}/{len(run.unreachable)} unerreichbare Geräte", opened == len(run.unreachable)),
+    ]
+    return [{"check": check, "value": str(value), "ok": bool(ok)} for check, value, ok in checks]
+
+
+def _snapshot():
+    """tracemalloc-Snapshot ohne die Allokationen von tracemalloc selbst und vom Import-System."""
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>")
+    ])
+
+
+def _growing_sites(run, top):
+    key_type = "traceback" if run.args.traceback_depth > 1 else "lineno"
+    stats = _snapshot().compare_to(run.baseline_snapshot, key_type)
+    sites = []
+    for stat in stats:
+        if stat.size_diff <= 0:
+            continue
+        sites.append({
+            "size_diff": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+        })
+        if len(sites) >= top:
+            break
+    return sites
+
+
+async def run_soak(args):
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory(prefix="ble_soak_") as work_dir:
+        known_macs = [f"D0:50:AC:{i >> 16 & 0xFF:02X}:{i >> 8 & 0xFF:02X}:{i & 0xFF:02X}" for i in range(args.devices)]
+        with open(os.path.join(work_dir, "config.ini"), "w") as f:
+            # MQTT aktiv (geht an SoakMqttClient), UDP aus, kein Live-Server, Einzelprozess
+            f.write("[General]\nbattery_pause_duration = 30\nmax_parallel_reads = 2\nbattery_retries = 2\n"
+                    "read_profile = battery, firmware, model\n[MQTT]\nenabled = true\nscan_topic = soak/scan\n"
+                    "[UDP]\nenabled = false\n[Scan]\npublish_policy = always\nprocess_mode = single\n"
+                    f"window_mode = {args.window_mode}\n[Presence]\ndeparture_mode = {args.departure_mode}\n"
+                    "[Live]\nenabled = false\n[Trace]\nenabled = false\n")
+
+        # Alle Dateien des Daemons in das Arbeitsverzeichnis umlenken
+        ble_tool.CONFIG_FILE = os.path.join(work_dir, "config.ini")
+        ble_tool.KNOWN_DEVICES_FILE = os.path.join(work_dir, "known_devices.txt")
+        ble_tool.BATTERY_STATUS_FILE = os.path.join(work_dir, "battery_status.json")
+        ble_tool.BATTERY_JOB_LOCK = os.path.join(work_dir, "read_enabled_batteries.lock")
+        ble_tool.PAUSE_FILE = os.path.join(work_dir, "ble_read.pause")
+        ble_tool.DISCOVER_RESULTS_FILE = os.path.join(work_dir, "scan_results.json")
+        ble_tool.gatt_cache = GattCache(os.path.join(work_dir, "gatt_cache.json"))
+        ble_tool.reliability_tracker = ReliabilityTracker.from_config(
+            ble_tool.load_config(), stats_file=os.path.join(work_dir, "connection_stats.json"))
+        presence_model = ble_tool.presence_model = PresenceModel(os.path.join(work_dir, "presence_model.json"))
+        # Den Adapter nicht anfassen (hciconfig nach jeder Abfrage)
+        ble_tool.reset_bluetooth_stack = lambda: True
+        with open(ble_tool.DISCOVER_RESULTS_FILE, "w") as f:
+            json.dump({"devices": {mac: {"name": f"Soak {index}"} for index, mac in enumerate(known_macs)}}, f)
+
+        run = SoakRun(args, work_dir, known_macs, rng)
+        run._touch_inputs(0)
+        registry = DeviceRegistry(ble_tool.KNOWN_DEVICES_FILE, os.path.join(work_dir, "device_options.ini"))
+        registry.reload()
+        ble_tool.live_hub = LiveHub()   # Zustand ja, Server nein
+        mqtt_client = run.mqtt_client = SoakMqttClient()
+        window_controller = SoakWindowController(ble_tool.DAEMON_SCAN_SECONDS)
+
+        def scanner_factory(detection_callback):
+            return SoakScanner(detection_callback, known_macs, args.foreign, args.presence, rng)
+
+        print(f"Soak-Test: {args.days:g} simulierte Tage = {run.total_cycles} Durchläufe "
+              f"({args.devices} bekannte, {args.foreign} fremde Geräte pro Scan), Warmup {run.warmup_cycles} Durchläufe")
+        # Der Daemon protokolliert jeden Durchlauf mit INFO, im Zeitraffer nur Warnungen zeigen
+        logging.disable(logging.INFO)
+        # Die simulierten Verbindungsfehler des Batterie-Jobs sind gewollt
+        bt_level = ble_tool.bt_logger.level
+        ble_tool.bt_logger.setLevel(logging.ERROR)
+        tracemalloc.start(args.traceback_depth)
+        try:
+            await ble_tool._scan_daemon_loop(
+                ble_tool.load_config(), mqtt_client, registry,
+                scanner_factory=scanner_factory, time_scale=TIME_SCALE, cycle_hook=run.on_cycle,
+                window_controller=window_controller
+            )
+            # Noch laufende Publish-Tasks sind kein Leck, nur der letzte Durchlauf
+            await asyncio.sleep(0)
+            results = _evaluate(run, args)
+            if run.battery_job is not None:
+                await run.battery_job
+            window_checks = _check_windows(window_controller, args)
+            battery_checks = _check_battery(run) if args.battery_every else []
+            sites = _growing_sites(run, args.top)
+        finally:
+            tracemalloc.stop()
+            logging.disable(logging.NOTSET)
+            ble_tool.bt_logger.setLevel(bt_level)
+
+    departures = sum(data["departures"] for data in presence_model.stats().values())
+    elapsed = time.monotonic() - run.started
+    print(f"\nLaufzeit {elapsed:.1f}s für {run.total_cycles} Durchläufe "
+          f"({run.total_cycles * SIMULATED_CYCLE_SECONDS / max(elapsed, 1e-9):.0f}x Echtzeit), "
+          f"{mqtt_client.published} MQTT-Meldungen")
+    print(f"\n{'Messwert':<8} {'Wachstum':>12} {'pro Tag':>12} {'Grenze':>10}  Ergebnis")
+    for result in results:
+        print(f"{result['metric']:<8} {result['growth']:>10.2f}{result['unit']:<2} {result['per_day']:>10.2f}{result['unit']:<2} "
+              f"{result['limit']:>8g}{result['unit']:<2}  {'OK' if result['ok'] else 'ZU HOCH'}")
+    print(f"\nScan-Fenster ({args.window_mode}):")
+    for check in window_checks:
+        print(f"{check['check']:<14} {check['value']:<40}  {'OK' if check['ok'] else 'FEHLER'}")
+    # Die bekannten Geräte fehlen nur zufällig (--presence), jeder Offline-Wechsel ist ein falscher
+    print(f"\nAbwesenheit ({args.departure_mode}): {departures} falsche Offline-Wechsel "
+          f"({departures / max(1, run.total_cycles * len(known_macs)):.2%} der Fenster je Gerät)")
+    if battery_checks:
+        print(f"\nBatterie-Jobs (alle {args.battery_every} Durchläufe):")
+        for check in battery_checks:
+            print(f"{check['check']:<14} {check['value']:<40}  {'OK' if check['ok'] else 'FEHLER'}")
+    print(f"\nAm stärksten wachsende Allokationsstellen seit dem Warmup:")
+    for site in sites:
+        print(f"  {site['size_diff'] / 1024:+10.1f} KiB {site['count_diff']:+8d} Objekte  {site['traceback'][-1]}")
+        for frame in reversed(site["traceback"][:-1]):
+            print(f"  {'':>30}  <- {frame}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "samples": run.samples, "results": results, "window_checks": window_checks,
+                       "battery_checks": battery_checks, "departures": departures,
+                       "growing_sites": sites}, f, indent=4)
+        print(f"\nBericht gespeichert: {args.json}")
+
+    return all(result["ok"] for result in results) and all(check["ok"] for check in window_checks + battery_checks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak-Test des Scan-Daemons im Zeitraffer (simulierter Scanner, GATT-Client und MQTT).")
+    parser.add_argument("--days", type=float, default=3, help="Simulierte Laufzeit in Tagen (Standard: 3, je 15s pro Durchlauf)")
+    parser.add_argument("--devices", type=int, default=30, help="Anzahl bekannter Geräte (Standard: 30)")
+    parser.add_argument("--foreign", type=int, default=200, help="Fremde Advertisements pro Scan (Standard: 200)")
+    parser.add_argument("--presence", type=float, default=0.9, help="Wahrscheinlichkeit, dass ein bekanntes Gerät gesehen wird (Standard: 0.9)")
+    parser.add_argument("--window-mode", choices=WINDOW_MODES, default=WINDOW_FIXED, help="[Scan] window_mode des Daemons (Standard: fixed)")
+    parser.add_argument("--departure-mode", choices=DEPARTURE_MODES, default=DEPARTURE_WINDOW, help="[Presence] departure_mode des Daemons (Standard: window)")
+    parser.add_argument("--edit-every", type=int, default=500, help="Geräteliste/Batteriestatus alle N Durchläufe ändern (Standard: 500)")
+    parser.add_argument("--battery-every", type=int, default=240, help="Batterie-Job alle N Durchläufe, 0 = aus (Standard: 240, eine simulierte Stunde)")
+    parser.add_argument("--battery-failure", type=float, default=0.2, help="Wahrscheinlichkeit einer fehlschlagenden Verbindung (Standard: 0.2)")
+    parser.add_argument("--samples", type=int, default=20, help="Anzahl der Messpunkte (Standard: 20)")
+    parser.add_argument("--warmup", type=float, default=0.05, help="Anteil der Durchläufe vor der Baseline (Standard: 0.05)")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=10.0, help="Erlaubtes RSS-Wachstum nach dem Warmup (Standard: 10)")
+    parser.add_argument("--max-heap-growth-mb", type=float, default=2.0, help="Erlaubtes Heap-Wachstum laut tracemalloc (Standard: 2)")
+    parser.add_argument("--max-fd-growth", type=int, default=2, help="Erlaubter Zuwachs offener Dateideskriptoren (Standard: 2)")
+    parser.add_argument("--max-task-growth", type=int, default=5, help="Erlaubter Zuwachs laufender asyncio-Tasks (Standard: 5)")
+    parser.add_argument("--top", type=int, default=10, help="Anzahl gezeigter Allokationsstellen (Standard: 10)")
+    parser.add_argument("--traceback-depth", type=int, default=1, help="Frames pro Allokationsstelle (Standard: 1)")
+    parser.add_argument("--seed", type=int, default=1, help="Startwert des Zufallsgenerators (Standard: 1)")
+    parser.add_argument("--json", help="Bericht zusätzlich als JSON speichern")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Keine Zwischenstände ausgeben")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(run_soak(args)) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,30 @@ import argparse
 import os 
 import subprocess 
 import logging
+import signal
 from bleak import BleakScanner, BleakClient, BleakError
 import paho.mqtt.client as paho_mqtt
+try:
+    # BlueZ-Advertisement-Monitor (nur für passiven, gefilterten Scan nötig)
+    from bleak.backends.bluezdbus.advertisement_monitor import OrPattern
+    from bleak.assigned_numbers import AdvertisementDataType
+    BLUEZ_PATTERNS_AVAILABLE = True
+except ImportError:
+    BLUEZ_PATTERNS_AVAILABLE = False
 from ble_logger import get_logger, get_bluetooth_logger, get_scan_logger
+from ble_gatt import (GattCache, parse_read_profile, parse_decoders, read_profile, cached_static_values,
+                      DEFAULT_READ_PROFILE, DEFAULT_STATIC_REFRESH_DAYS)
+from ble_reliability import ReliabilityTracker, format_stats, BREAKER_CLOSED, BREAKER_OPEN, BREAKER_HALF_OPEN
+from ble_trace import tracer
+from ble_live import LiveHub, DEFAULT_LIVE_HOST, DEFAULT_LIVE_PORT
+from ble_capture import CaptureWriter, ReplayScanner, read_capture, split_windows
+from ble_ring import KIND_ONLINE, KIND_OFFLINE, FLAG_PUBLISH
+from ble_workers import WorkerPool, PROCESS_MODES, PROCESS_MODE_SINGLE, PROCESS_MODE_MULTI
+from ble_vendor import enrich, bluez_address_type
+from ble_presence import PresenceModel, format_presence_stats
+from ble_window import WindowController, END_COMPLETE
+from ble_registry import (DeviceRegistry, PUBLISH_POLICIES, PUBLISH_ALWAYS,
+                          PUBLISH_CHANGES, PUBLISH_ONLINE, PUBLISH_NEVER)
 
 # Logger initialisieren
 logger = get_logger(__name__)
@@ -23,7 +44,6 @@ SYSTEM_HOSTNAME = socket.gethostname()
 # --- Globale Konstanten ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-BATTERY_LEVEL_UUID = "00002a19-0000-1000-8000-00805f9b34fb"
 CONFIG_FILE = os.path.join(BASE_DIR, "config.ini")
 KNOWN_DEVICES_FILE = os.path.join(BASE_DIR, "known_devices.txt")
 DISCOVER_RESULTS_FILE = os.path.join(BASE_DIR, "scan_results.json") 
@@ -33,12 +53,41 @@ LAST_BATTERY_SCAN_FILE = os.path.join(BASE_DIR, "last_battery_scan.txt")
 # --- Daemon-Koordination ---
 BATTERY_JOB_LOCK = os.path.join(BASE_DIR, "read_enabled_batteries.lock")
 PAUSE_FILE = "/tmp/ble_read.pause" # (Im RAM)
-MAX_PAUSE_WAIT_SECONDS = 15 # Maximal 15s warten, dann ist das Lock veraltet
+SERVICE_NAME = "ble_tool.service" # Scan-Dienst (wie in action.php)
+MAX_PAUSE_WAIT_SECONDS = 15 # Mindestens 15s warten, dann ist das Lock veraltet (siehe pause_wait_seconds)
+PAUSE_WAIT_MARGIN_SECONDS = 2 # Reserve für Adapter-Reset, Scanner-Start und -Stopp
+DAEMON_SCAN_SECONDS = 10 # Reguläres Scan-Fenster des Daemons
+
+# --- Scan-Filter-Modi ([Scan] filter_mode) ---
+SCAN_MODE_ACTIVE = "active"     # Ungefilterter aktiver Scan (bisheriges Verhalten)
+SCAN_MODE_FILTERED = "filtered" # Aktiv, bluetoothd verwirft Advertisements unter rssi_threshold (nur LE)
+SCAN_MODE_PASSIVE = "passive"   # Passiv mit Advertisement-Monitor-Patterns im Controller/bluetoothd
+SCAN_MODES = (SCAN_MODE_ACTIVE, SCAN_MODE_FILTERED, SCAN_MODE_PASSIVE)
+DEFAULT_RSSI_THRESHOLD = -90
 
 # --- Locks ---
 file_lock = asyncio.Lock()
 pause_lock = asyncio.Lock()
 
+# --- GATT-Cache und Verbindungs-Statistik (werden beim ersten Batterie-Read geladen) ---
+gatt_cache = None
+reliability_tracker = None
+
+# --- Live-Stream für die WebUI (nur im Daemon aktiv) ---
+live_hub = None
+
+# --- Worker-Prozesse für [Scan] process_mode = multi (nur im Daemon aktiv) ---
+worker_pool = None
+
+# --- Gelerntes Sichtungs-Intervall pro Gerät (nur im Daemon aktiv) ---
+presence_model = None
+
+# --- Patterns des passiven Scans (neu aufgebaut nur bei geändertem Discover, Geräteliste oder Config) ---
+passive_pattern_cache = {"key": None, "contents": []}
+
+# --- Laufende Publish-Tasks (asyncio hält Tasks nur schwach, ohne Referenz können sie verschwinden) ---
+publish_tasks = set()
+
 
 # --- NEUE SYNCHRONE HILFSFUNKTION (Defensiver Check) ---
 def cleanup_stale_pause_file():
@@ -116,26 +165,32 @@ def load_config():
         logger.error("Fehler beim Lesen der Konfiguration: %s", e)
         sys.exit(1)
 
+def pause_wait_seconds(config=None):
+    """
+    Wie lange ein Job auf PAUSE_FILE wartet, bevor es als veraltet gilt. Der Daemon hält
+    die Datei über 3s Wartezeit nach dem Reset und das längste mögliche Scan-Fenster
+    (window_mode = adaptive: max_window_seconds).
+    """
+    if config is None:
+        config = load_config()
+    window_controller = WindowController(DAEMON_SCAN_SECONDS)
+    window_controller.configure(config)
+    return max(MAX_PAUSE_WAIT_SECONDS, 3 + window_controller.longest_seconds() + PAUSE_WAIT_MARGIN_SECONDS)
+
 def load_known_devices():
-    """Lädt die MACs und Aliase aus der known_devices.txt."""
-    devices = {} # { "MAC": "Alias" }
-    try:
-        with open(KNOWN_DEVICES_FILE, "r") as f:
-            for line in f:
-                line = line.strip()
-                if line and "," in line:
-                    parts = line.split(",", 2)
-                    if len(parts) >= 2:
-                        mac = parts[0].upper().strip()
-                        alias = parts[1].strip() 
-                        devices[mac] = alias
-        
-        if not devices:
-            logger.warning("%s ist leer oder im falschen Format (MAC,Alias,Flag).", KNOWN_DEVICES_FILE)
-        return devices
-    except FileNotFoundError:
-        logger.warning("%s nicht gefunden. 'scan' wird keine Geräte melden.", KNOWN_DEVICES_FILE)
-        return {}
+    """Lädt known_devices.txt (und device_options.ini) in eine DeviceRegistry."""
+    registry = DeviceRegistry(KNOWN_DEVICES_FILE)
+    registry.reload()
+    return registry
+
+def get_publish_policy(entry, config):
+    """Publish-Policy eines Geräts (device_options.ini 'publish', sonst [Scan] publish_policy)."""
+    policy = entry.get_option('publish') or config.get('Scan', 'publish_policy', fallback=PUBLISH_ALWAYS)
+    policy = policy.strip().lower()
+    if policy not in PUBLISH_POLICIES:
+        logger.warning("Unbekannte Publish-Policy '%s' für %s. Verwende '%s'.", policy, entry.mac, PUBLISH_ALWAYS)
+        return PUBLISH_ALWAYS
+    return policy
 
 def setup_mqtt_client(config):
     """Initialisiert und verbindet den MQTT-Client."""
@@ -190,137 +245,476 @@ def disconnect_mqtt(mqtt_client):
         mqtt_client.disconnect()
         logger.info("MQTT getrennt.")
 
+def parse_manufacturer_patterns(config):
+    """
+    Liest [Scan] manufacturer_patterns ("004C:0215, 0059") als Inhalt des
+    Herstellerdaten-AD-Felds. Format: Company-ID (hex, 4 Stellen) optional
+    gefolgt von ':' und den ersten Bytes der Herstellerdaten (hex).
+    """
+    contents = []
+    raw = config.get('Scan', 'manufacturer_patterns', fallback='')
+    for entry in raw.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            company_hex, _, prefix_hex = entry.partition(":")
+            company_id = int(company_hex, 16)
+            # Company-ID steht im AD-Feld als Little-Endian vor den eigentlichen Daten
+            contents.append(company_id.to_bytes(2, "little") + bytes.fromhex(prefix_hex))
+        except (ValueError, OverflowError) as e:
+            logger.warning("Ungültiges Hersteller-Pattern '%s' in [Scan]: %s", entry, e)
+    return contents
+
+def known_device_patterns(known_devices, results_file=None):
+    """
+    Company-IDs der bekannten Geräte laut letztem Discover (scan_results.json) als Inhalt
+    des Herstellerdaten-AD-Felds. Gibt (Patterns, MACs ohne Herstellerdaten) zurück.
+    """
+    results_file = results_file or DISCOVER_RESULTS_FILE
+    try:
+        with open(results_file, "r") as f:
+            devices = {mac.upper(): data for mac, data in json.load(f).get("devices", {}).items()}
+    except (OSError, ValueError, AttributeError):
+        devices = {}
+    contents = []
+    missing = []
+    for mac in known_devices.macs():
+        company_id = devices.get(mac, {}).get("company_id")
+        if not company_id:
+            missing.append(mac)
+            continue
+        content = int(company_id, 16).to_bytes(2, "little")
+        if content not in contents:
+            contents.append(content)
+    return contents, missing
+
+def discovered_name(mac, results_file=None):
+    """Gerätename laut letztem Discover (BlueZ Device1 Name/Alias), None wenn unbekannt."""
+    try:
+        with open(results_file or DISCOVER_RESULTS_FILE, "r") as f:
+            devices = json.load(f).get("devices", {})
+    except (OSError, ValueError, AttributeError):
+        return None
+    for address, data in devices.items():
+        if address.upper() == mac:
+            name = data.get("name")
+            return name if name and name != "Unknown" else None
+    return None
+
+def passive_patterns(config, known_devices=None):
+    """
+    Hersteller-Patterns für den passiven Scan: aus den bekannten Geräten und [Scan] manufacturer_patterns.
+    Fehlen einem bekannten Gerät Herstellerdaten, fände der passive Scan es nie: dann keine Patterns
+    (Fallback auf filtered). Neu aufgebaut wird nur, wenn sich scan_results.json, die Geräteliste
+    oder manufacturer_patterns geändert haben; Warnungen erscheinen daher einmal pro Änderung.
+    """
+    try:
+        results_mtime = os.stat(DISCOVER_RESULTS_FILE).st_mtime_ns
+    except OSError:
+        results_mtime = None
+    key = (DISCOVER_RESULTS_FILE, results_mtime, config.get('Scan', 'manufacturer_patterns', fallback=''),
+           None if known_devices is None else tuple(known_devices.macs()))
+    if passive_pattern_cache["key"] != key:
+        passive_pattern_cache["key"] = key
+        passive_pattern_cache["contents"] = _build_passive_contents(config, known_devices)
+    return [OrPattern(0, AdvertisementDataType.MANUFACTURER_SPECIFIC_DATA, content)
+            for content in passive_pattern_cache["contents"]]
+
+def _build_passive_contents(config, known_devices):
+    contents = []
+    if known_devices is not None:
+        contents, missing = known_device_patterns(known_devices)
+        for mac in missing:
+            logger.warning("Passiver Scan: keine Herstellerdaten für %s (%s) im letzten Discover.",
+                           mac, known_devices.alias(mac, "-"))
+        if missing:
+            logger.warning("Passiver Scan würde %d bekannte Geräte nie sehen. Verwende '%s'.",
+                           len(missing), SCAN_MODE_FILTERED)
+            return []
+    for content in parse_manufacturer_patterns(config):
+        # Ein kürzeres Pattern (nur Company-ID) deckt längere mit gleichem Anfang ab
+        if not any(content.startswith(existing) for existing in contents):
+            contents.append(content)
+    if not contents:
+        logger.warning("Passiver Scan benötigt Hersteller-Patterns (Discover mit bekannten Geräten oder "
+                       "[Scan] manufacturer_patterns). Verwende '%s'.", SCAN_MODE_FILTERED)
+    return contents
+
+class BluezSignalCounter:
+    """
+    Zählt per dbus-monitor die D-Bus-Signale von bluetoothd (org.bluez), um die
+    Scan-Filter-Modi zu vergleichen ('scan --measure-dbus', benötigt root).
+    """
+
+    def __init__(self):
+        self._process = None
+        self._reader = None
+        self.timestamps = []
+
+    async def start(self):
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                "dbus-monitor", "--system", "type='signal',sender='org.bluez'",
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError as e:
+            logger.warning("dbus-monitor nicht verfügbar (%s). Keine D-Bus-Messung.", e)
+            return False
+        self._reader = asyncio.create_task(self._read())
+        return True
+
+    async def _read(self):
+        # Format: "signal time=1697712345.123456 sender=:1.5 -> destination=... member=PropertiesChanged"
+        async for line in self._process.stdout:
+            if line.startswith(b"signal time="):
+                try:
+                    self.timestamps.append(float(line.split()[1][5:]))
+                except ValueError:
+                    pass
+
+    async def stop(self):
+        if self._process is None:
+            return
+        await asyncio.sleep(0.2)    # Gepufferte Zeilen noch einlesen
+        self._process.terminate()
+        await self._process.wait()
+        await self._reader
+
+    def count(self, start, end):
+        """Signale zwischen start und end (time.time())."""
+        return sum(1 for timestamp in self.timestamps if start <= timestamp <= end)
+
+def create_scanner(detection_callback, config, filter_mode=None, known_devices=None):
+    """
+    Erstellt den BleakScanner passend zum Filter-Modus.
+    Gibt (scanner, tatsächlich_verwendeter_modus) zurück.
+    """
+    if filter_mode is None:
+        filter_mode = config.get('Scan', 'filter_mode', fallback=SCAN_MODE_ACTIVE).strip().lower()
+    if filter_mode not in SCAN_MODES:
+        logger.warning("Unbekannter filter_mode '%s'. Verwende '%s'.", filter_mode, SCAN_MODE_ACTIVE)
+        filter_mode = SCAN_MODE_ACTIVE
+
+    if filter_mode == SCAN_MODE_PASSIVE:
+        patterns = passive_patterns(config, known_devices) if BLUEZ_PATTERNS_AVAILABLE else []
+        if not BLUEZ_PATTERNS_AVAILABLE:
+            logger.warning("Passiver Scan benötigt bleak mit BlueZ-Advertisement-Monitor. Fallback auf '%s'.",
+                           SCAN_MODE_FILTERED)
+        elif patterns:
+            try:
+                scanner = BleakScanner(
+                    detection_callback=detection_callback,
+                    scanning_mode="passive",
+                    bluez={"or_patterns": patterns}
+                )
+                return scanner, SCAN_MODE_PASSIVE
+            except BleakError as e:
+                logger.warning("Passiver Scan nicht möglich (%s). Fallback auf '%s'.", e, SCAN_MODE_FILTERED)
+        filter_mode = SCAN_MODE_FILTERED
+
+    if filter_mode == SCAN_MODE_FILTERED:
+        # BlueZ kennt keine Adress-Filter für Discovery. Transport=le und DuplicateData=False setzt bleak
+        # ohnehin, eine echte Reduktion bringt erst der RSSI-Filter: bluetoothd verwirft schwächere
+        # Advertisements (ferne Fremdgeräte), bevor sie über D-Bus gemeldet werden.
+        rssi_threshold = config.getint('Scan', 'rssi_threshold', fallback=DEFAULT_RSSI_THRESHOLD)
+        scanner = BleakScanner(
+            detection_callback=detection_callback,
+            bluez={"filters": {"Transport": "le", "DuplicateData": False, "RSSI": rssi_threshold}}
+        )
+        return scanner, SCAN_MODE_FILTERED
+
+    return BleakScanner(detection_callback=detection_callback), SCAN_MODE_ACTIVE
+
 
 # --- 3. Kernfunktion: SCAN (für Bekannte) ---
 async def publish_device_status(device, advertisement_data, config, mqtt_client, alias):
     """Erstellt die JSON-Payload und sendet sie per UDP/MQTT."""
     
-    scan_logger.info("Sende 'Online'-Status für %s (%s)", device.address, alias)
+    with tracer.span("publish_online", "publish", mac=device.address):
+        scan_logger.info("Sende 'Online'-Status für %s (%s)", device.address, alias)
     
-    last_battery_percent = -1 
-    async with file_lock: 
-        try:
-            if os.path.exists(BATTERY_STATUS_FILE):
-                with open(BATTERY_STATUS_FILE, "r") as f:
-                    all_status_data = json.load(f)
-                    if device.address in all_status_data:
-                        last_battery_percent = all_status_data[device.address].get('battery_percent', -1)
-        except Exception as e:
-            logger.warning("Konnte Batteriestatus für %s nicht lesen: %s", device.address, e)
+        last_battery_percent = -1 
+        async with file_lock: 
+            try:
+                if os.path.exists(BATTERY_STATUS_FILE):
+                    with open(BATTERY_STATUS_FILE, "r") as f:
+                        all_status_data = json.load(f)
+                        if device.address in all_status_data:
+                            last_battery_percent = all_status_data[device.address].get('battery_percent', -1)
+            except Exception as e:
+                logger.warning("Konnte Batteriestatus für %s nicht lesen: %s", device.address, e)
     
-    data = {
-        "hostname": SYSTEM_HOSTNAME,
-        "address": device.address,
-        "is_online": 1,
-        "last_battery_percent": last_battery_percent,
-        "name": device.name or "Unknown", 
-        "alias": alias, 
-        "rssi": advertisement_data.rssi,
-        "timestamp": int(time.time())         
-    }
-    data_payload = json.dumps(data)
+        data = {
+            "hostname": SYSTEM_HOSTNAME,
+            "address": device.address,
+            "is_online": 1,
+            "last_battery_percent": last_battery_percent,
+            "name": device.name or "Unknown", 
+            "alias": alias, 
+            "rssi": advertisement_data.rssi,
+            "timestamp": int(time.time())         
+        }
+        data_payload = json.dumps(data)
     
-    base_topic = config.get('MQTT', 'scan_topic', fallback='ble/scan/discovery')
-    safe_mac = device.address.replace(":", "")
-    full_topic = f"{base_topic}/{safe_mac}"
+        base_topic = config.get('MQTT', 'scan_topic', fallback='ble/scan/discovery')
+        safe_mac = device.address.replace(":", "")
+        full_topic = f"{base_topic}/{safe_mac}"
     
-    send_udp(data_payload, config)
-    send_mqtt(data_payload, full_topic, config, mqtt_client)
+        send_udp(data_payload, config)
+        send_mqtt(data_payload, full_topic, config, mqtt_client)
 
-async def scan_and_report(scan_duration, config, known_devices, mqtt_client):
-    """Führt einen Scan-Durchlauf durch (wird vom Daemon aufgerufen)."""
+async def scan_and_report(scan_duration, config, known_devices, mqtt_client, filter_mode=None, scanner_factory=None,
+                          window_controller=None, time_scale=1.0, allow_extension=True):
+    """
+    Führt einen Scan-Durchlauf durch (wird vom Daemon aufgerufen).
+    Mit scanner_factory (z.B. Replay) wird statt des Adapters ein eigener Scanner verwendet.
+    Mit window_controller bestimmt dieser die Fensterlänge (scan_duration wird dann ignoriert).
+    Gibt eine Scan-Statistik zurück (Modus, Advertisements, CPU-Zeit, Fenster) oder None bei Fehler.
+    """
     
-    scan_logger.info("Setze Bluetooth-Adapter vor Scan zurück.")
-    reset_bluetooth_stack() 
-    scan_logger.info("Warte 3 Sekunden, bis der Adapter initialisiert ist...")
-    await asyncio.sleep(3) 
+    if scanner_factory is None:
+        with tracer.span("reset_bluetooth_stack", "adapter"):
+            scan_logger.info("Setze Bluetooth-Adapter vor Scan zurück.")
+            reset_bluetooth_stack() 
+        with tracer.span("adapter_settle", "adapter"):
+            scan_logger.info("Warte 3 Sekunden, bis der Adapter initialisiert ist...")
+            await asyncio.sleep(3) 
     
-    scan_logger.info("Suche nach bekannten Geräten für %d Sekunden (Sofort-Meldung aktiv)", scan_duration)
+    if window_controller is not None and window_controller.adaptive:
+        scan_logger.info("Suche nach bekannten Geräten für %.1f-%.1f Sekunden (adaptiv, Sofort-Meldung aktiv)",
+                         window_controller.min_seconds, window_controller.max_seconds)
+    else:
+        scan_logger.info("Suche nach bekannten Geräten für %d Sekunden (Sofort-Meldung aktiv)", scan_duration)
     
     processed_devices = set() 
+    adv_stats = {"advertisements": 0}
 
     def detection_callback(device, advertisement_data):
+        adv_stats["advertisements"] += 1
         mac = device.address.upper()
         
         if mac not in known_devices:
             return 
+
+        if presence_model is not None:
+            # Sichtung im Fenster für das Modell (Mehrfachmeldungen ignoriert es)
+            presence_model.observe(mac)
             
         if mac in processed_devices:
             return 
             
-        alias = known_devices[mac] 
+        entry = known_devices.get(mac)
+        alias = entry.alias
         scan_logger.info("Bekanntes Gerät gefunden (Online): %s (%s)", mac, alias)
         processed_devices.add(mac)
+        if window_controller is not None:
+            window_controller.seen(mac)
+        if live_hub is not None:
+            live_hub.update(mac, is_online=1, rssi=advertisement_data.rssi, last_seen=int(time.time()))
 
-        asyncio.create_task(
-            publish_device_status(device, advertisement_data, config, mqtt_client, alias) 
-        )
+        policy = get_publish_policy(entry, config)
+        was_online = entry.last_online
+        entry.last_online = True
+        publish = not (policy == PUBLISH_NEVER or (policy == PUBLISH_CHANGES and was_online is True))
+
+        if worker_pool is not None:
+            # Mehrprozess-Betrieb: nur in den Ringpuffer schreiben, Versand übernimmt der Publisher-Worker
+            worker_pool.write(KIND_ONLINE, mac, advertisement_data.rssi, device.name, FLAG_PUBLISH if publish else 0)
+        elif publish:
+            task = asyncio.create_task(
+                publish_device_status(device, advertisement_data, config, mqtt_client, alias) 
+            )
+            publish_tasks.add(task)
+            task.add_done_callback(publish_tasks.discard)
 
-    scanner = BleakScanner(detection_callback=detection_callback)
+    if scanner_factory is None:
+        scanner, used_mode = create_scanner(detection_callback, config, filter_mode, known_devices)
+    else:
+        scanner, used_mode = scanner_factory(detection_callback), "replay"
     
     try:
-        await scanner.start()
-        await asyncio.sleep(float(scan_duration))
-        await scanner.stop()
+        # Fenster vor dem Scanner öffnen: Advertisements während scanner.start() gehören bereits dazu
+        if presence_model is not None:
+            presence_model.start_window()
+        if window_controller is not None:
+            window_controller.begin(expected_devices(known_devices, window_controller))
+        with tracer.span("scanner_start", "scan", mode=used_mode):
+            try:
+                await scanner.start()
+            except BleakError as e:
+                if used_mode != SCAN_MODE_PASSIVE:
+                    raise
+                # z.B. bluetoothd ohne Advertisement-Monitor-Unterstützung (--experimental)
+                logger.warning("Passiver Scan konnte nicht gestartet werden (%s). Fallback auf '%s'.", e, SCAN_MODE_FILTERED)
+                scanner, used_mode = create_scanner(detection_callback, config, SCAN_MODE_FILTERED, known_devices)
+                await scanner.start()
+        cpu_start = time.process_time()
+        wall_start = time.monotonic()
+        window_start_time = time.time()
+        window = None
+        if window_controller is None:
+            with tracer.span("scan_window", "scan", duration=float(scan_duration)):
+                await asyncio.sleep(float(scan_duration))
+        else:
+            with tracer.span("scan_window", "scan", mode=window_controller.mode,
+                             target=window_controller.target_seconds()):
+                window = await window_controller.wait(time_scale, allow_extension)
+        if presence_model is not None:
+            presence_model.end_window()
+        with tracer.span("scanner_stop", "scan"):
+            await scanner.stop()
+        cpu_seconds = time.process_time() - cpu_start
+        wall_seconds = max(time.monotonic() - wall_start, 0.001)
+        window_end_time = time.time()
     except BleakError as e:
         logger.error("Fehler beim Scannen: %s", e) 
-        return
+        return None
+
+    scan_stats = {
+        "mode": used_mode,
+        "advertisements": adv_stats["advertisements"],
+        "advertisements_per_second": adv_stats["advertisements"] / wall_seconds,
+        "cpu_seconds": cpu_seconds,
+        "cpu_percent": 100.0 * cpu_seconds / wall_seconds,
+        "known_seen": len(processed_devices),
+        "window": window,
+        "window_start_time": window_start_time,
+        "window_end_time": window_end_time
+    }
+    # Gezählt werden Callbacks nach der Aufbereitung durch bleak, nicht D-Bus-Nachrichten ('scan --measure-dbus')
+    scan_logger.info(
+        "Scan-Statistik (%s): %d Advertisements (%.1f/s), CPU %.2fs (%.1f%%), %d bekannte Geräte",
+        used_mode, scan_stats["advertisements"], scan_stats["advertisements_per_second"],
+        cpu_seconds, scan_stats["cpu_percent"], scan_stats["known_seen"]
+    )
+    if window is not None and window_controller.adaptive:
+        scan_logger.info(
+            "Scan-Fenster: %.1fs (Ziel %.1fs%s), %s, %.1fs gegenüber %.0fs eingespart",
+            window["seconds"], window["target_seconds"], ", verlängert" if window["extended"] else "",
+            "alle erwarteten Geräte gesehen" if window["reason"] == END_COMPLETE else f"{window['missing']} erwartete Geräte fehlen",
+            window["saved_seconds"], window_controller.base_seconds
+        )
 
     scan_logger.info("Scan-Phase beendet. Prüfe auf Offline-Geräte...")
     
-    offline_devices_macs = set(known_devices.keys()) - processed_devices 
+    if presence_model is not None:
+        # Abwesend laut Sichtungs-Modell (im Modus 'window' bzw. ohne gelernte Rate: nicht gesehen)
+        offline_devices = [entry for entry in known_devices
+                           if presence_model.is_departed(entry.mac, entry.mac in processed_devices)]
+        unseen_present = len(known_devices) - len(processed_devices) - sum(
+            1 for entry in offline_devices if entry.mac not in processed_devices)
+        if unseen_present:
+            scan_logger.info("%d Geräte nicht gesehen, laut Sichtungs-Modell aber noch anwesend.", unseen_present)
+    else:
+        offline_devices = [entry for entry in known_devices if entry.mac not in processed_devices]
+
+    # Nur Geräte melden, deren Publish-Policy einen Offline-Bericht verlangt
+    offline_reports = []
+    for entry in offline_devices:
+        if live_hub is not None:
+            live_hub.update(entry.mac, is_online=0)
+        policy = get_publish_policy(entry, config)
+        report = policy == PUBLISH_ALWAYS or (policy == PUBLISH_CHANGES and entry.last_online is not False)
+        if report:
+            offline_reports.append(entry)
+        if worker_pool is not None:
+            worker_pool.write(KIND_OFFLINE, entry.mac, -100, flags=FLAG_PUBLISH if report else 0)
+        entry.last_online = False
 
-    if not offline_devices_macs:
+    if not offline_devices:
         scan_logger.info("Alle bekannten Geräte wurden gefunden (online).")
+    elif worker_pool is not None:
+        scan_logger.info("%d 'Offline'-Berichte an den Publisher-Worker übergeben (%d Geräte offline)",
+                         len(offline_reports), len(offline_devices))
     else:
-        scan_logger.info("Sende %d 'Offline'-Berichte", len(offline_devices_macs))
+        scan_logger.info("Sende %d 'Offline'-Berichte (%d Geräte offline)", len(offline_reports), len(offline_devices))
         
         base_topic = config.get('MQTT', 'scan_topic', fallback='ble/scan/discovery')
 
-        for mac in offline_devices_macs:
-            alias = known_devices[mac] 
-            data = {
-                "hostname": SYSTEM_HOSTNAME,
-                "address": mac,
-                "is_online": 0,
-                "name": "N/A (Offline)",
-                "alias": alias, 
-                "rssi": -100,         
-                "timestamp": int(time.time())
-            }
-            data_payload = json.dumps(data)
-            
-            safe_mac = mac.replace(":", "")
-            full_topic = f"{base_topic}/{safe_mac}"
-            
-            send_udp(data_payload, config)
-            send_mqtt(data_payload, full_topic, config, mqtt_client)
+        with tracer.span("offline_reporting", "publish", reports=len(offline_reports)):
+            for entry in offline_reports:
+                mac = entry.mac
+                alias = entry.alias
+                data = {
+                    "hostname": SYSTEM_HOSTNAME,
+                    "address": mac,
+                    "is_online": 0,
+                    "name": "N/A (Offline)",
+                    "alias": alias,
+                    "rssi": -100,
+                    "timestamp": int(time.time())
+                }
+                data_payload = json.dumps(data)
 
-    scan_logger.info("Scan-Bericht abgeschlossen. %d online, %d offline.", len(processed_devices), len(offline_devices_macs))
+                safe_mac = mac.replace(":", "")
+                full_topic = f"{base_topic}/{safe_mac}"
+
+                send_udp(data_payload, config)
+                send_mqtt(data_payload, full_topic, config, mqtt_client)
+
+    scan_logger.info("Scan-Bericht abgeschlossen. %d online, %d offline.", len(processed_devices), len(offline_devices))
+    return scan_stats
+
+def expected_devices(known_devices, window_controller):
+    """
+    Geräte, auf die ein adaptives Fenster wartet: nicht als offline bekannt und laut
+    Sichtungs-Modell in der Regel innerhalb des längsten Fensters zu sehen.
+    """
+    expected = []
+    for entry in known_devices:
+        if entry.last_online is False:
+            continue
+        interval = presence_model.mean_interval(entry.mac) if presence_model is not None else None
+        if interval is None or interval <= window_controller.max_seconds:
+            expected.append(entry.mac)
+    return expected
 
 # --- 4. Kernfunktion: READ-BATTERY (KORRIGIERT MIT TIMEOUT) ---
-async def read_battery_and_report(mac_address, config, mqtt_client, known_devices, semaphore): 
+async def read_battery_and_report(mac_address, config, mqtt_client, known_devices, semaphore, use_breaker=False,
+                                  client_factory=None, time_scale=1.0):
+    """
+    Liest den Batteriestand (und das Leseprofil) eines Geräts und meldet ihn.
+    Mit use_breaker werden Geräte mit offenem Circuit-Breaker übersprungen.
+    client_factory (statt BleakClient) und time_scale (Zeitraffer für Wartezeiten) nutzt der Soak-Test.
+    """
+    if client_factory is None:
+        client_factory = BleakClient
+    
+    global reliability_tracker
+    if reliability_tracker is None:
+        reliability_tracker = ReliabilityTracker.from_config(config)
+
+    breaker_state = BREAKER_CLOSED
+    if use_breaker:
+        breaker_state = reliability_tracker.check(mac_address.upper())
+        if breaker_state == BREAKER_OPEN:
+            bt_logger.info("Überspringe %s: Circuit-Breaker offen (zu viele Fehlschläge, siehe 'stats').", mac_address.upper())
+            return
     
     async with semaphore: 
         
         # --- KORRIGIERTE PAUSE-LOGIK MIT TIMEOUT ---
-        wait_start_time = time.time()
-        while os.path.exists(PAUSE_FILE):
-            # Prüfe auf Timeout (15s sind mehr als die 10s Scan-Dauer des Daemons)
-            if (time.time() - wait_start_time) > MAX_PAUSE_WAIT_SECONDS:
-                logger.info("Timeout (>%ds) erreicht. Lösche die veraltete Pause-Datei (%s).", MAX_PAUSE_WAIT_SECONDS, PAUSE_FILE)
-                try:
-                    os.remove(PAUSE_FILE)
-                except OSError as e:
-                    logger.error("Konnte %s nicht löschen: %s", PAUSE_FILE, e)
-                break # Lock ist alt, breche die Schleife ab
+        with tracer.span("pause_wait", "battery", mac=mac_address.upper()):
+            wait_start_time = time.time()
+            max_wait_seconds = pause_wait_seconds(config)
+            while os.path.exists(PAUSE_FILE):
+                # Prüfe auf Timeout (länger als ein Scan-Durchlauf des Daemons inkl. Reset und Verlängerung)
+                if (time.time() - wait_start_time) * time_scale > max_wait_seconds:
+                    logger.info("Timeout (>%ds) erreicht. Lösche die veraltete Pause-Datei (%s).", max_wait_seconds, PAUSE_FILE)
+                    try:
+                        os.remove(PAUSE_FILE)
+                    except OSError as e:
+                        logger.error("Konnte %s nicht löschen: %s", PAUSE_FILE, e)
+                    break # Lock ist alt, breche die Schleife ab
             
-            logger.debug("Scan-Daemon (%s) ist aktiv. Warte 5s...", PAUSE_FILE)
-            await asyncio.sleep(5)
+                logger.debug("Scan-Daemon (%s) ist aktiv. Warte 5s...", PAUSE_FILE)
+                await asyncio.sleep(5 / time_scale)
         # --- ENDE KORRIGIERTE LOGIK ---
         
         mac_address = mac_address.upper()
-        alias = known_devices.get(mac_address, "N/A (Read-Befehl)")
+        device_entry = known_devices.get(mac_address)
+        alias = device_entry.alias if device_entry else "N/A (Read-Befehl)"
         
         battery_level = -1 
         device_name = "N/A (Direct-Read)" 
@@ -333,6 +727,9 @@ async def read_battery_and_report(mac_address, config, mqtt_client, known_device
         connect_timeout = 10.0
         post_connect_delay = 1.0
         report_offline = False
+        profile_str = DEFAULT_READ_PROFILE
+        decoders = {}
+        static_refresh_days = DEFAULT_STATIC_REFRESH_DAYS
 
         if config.has_section('General'):
             retries = config.getint('General', 'battery_retries', fallback=1) 
@@ -340,35 +737,67 @@ async def read_battery_and_report(mac_address, config, mqtt_client, known_device
             connect_timeout = config.getfloat('General', 'battery_connect_timeout', fallback=10.0)
             post_connect_delay = config.getfloat('General', 'battery_post_connect_delay', fallback=1.0)
             report_offline = config.getboolean('General', 'report_offline_battery', fallback=False)
+            profile_str = config.get('General', 'read_profile', fallback=DEFAULT_READ_PROFILE)
+            static_refresh_days = config.getfloat('General', 'static_info_refresh_days', fallback=DEFAULT_STATIC_REFRESH_DAYS)
         else:
             logger.warning("Sektion [General] in %s nicht gefunden. Verwende Standard-Timings.", CONFIG_FILE)
+
+        # Pro-Gerät-Override aus device_options.ini
+        if device_entry:
+            connect_timeout = device_entry.get_float('connect_timeout', connect_timeout)
+            profile_str = device_entry.get_option('read_profile', profile_str)
+            decoders = parse_decoders(device_entry.get_option('decoder'))
+        profile = parse_read_profile(profile_str)
+
+        if breaker_state == BREAKER_HALF_OPEN:
+            # Probe nach Ablauf des Backoffs: nur ein einzelner Versuch
+            bt_logger.info("Circuit-Breaker für %s halb offen: Probe-Versuch.", mac_address)
+            retries = 1
+
+        global gatt_cache
+        if gatt_cache is None:
+            gatt_cache = GattCache()
+        profile_values = {}
         
-        bt_logger.info("Lese Batterie von %s (%s) (Max. %d Versuch(e))", mac_address, alias, retries)
+        bt_logger.info("Lese Batterie von %s (%s) (Max. %d Versuch(e), Profil: %s)", mac_address, alias, retries, ", ".join(profile))
 
         for attempt in range(retries):
             bt_logger.info("Versuch %d/%d mit %s", attempt + 1, retries, mac_address)
-            try:
-                async with BleakClient(mac_address, timeout=connect_timeout) as client:
-                    if not client.is_connected:
-                        raise BleakError("Client konnte sich nicht verbinden.")
-                    bt_logger.info("Erfolgreich verbunden (Versuch %d)", attempt + 1)
-                    if post_connect_delay > 0:
-                        bt_logger.debug("Warte %.1fs (Post-Connect-Delay)", post_connect_delay)
-                        await asyncio.sleep(post_connect_delay)
+            with tracer.span("connect_attempt", "battery", mac=mac_address, attempt=attempt + 1):
+                connect_start = time.monotonic()
+                try:
+                    async with client_factory(mac_address, timeout=connect_timeout) as client:
+                        if not client.is_connected:
+                            raise BleakError("Client konnte sich nicht verbinden.")
+                        connect_seconds = time.monotonic() - connect_start
+                        bt_logger.info("Erfolgreich verbunden (Versuch %d, %.1fs)", attempt + 1, connect_seconds)
+                        if post_connect_delay > 0:
+                            bt_logger.debug("Warte %.1fs (Post-Connect-Delay)", post_connect_delay)
+                            with tracer.span("post_connect_delay", "battery"):
+                                await asyncio.sleep(post_connect_delay / time_scale)
                     
-                    value_bytes = await client.read_gatt_char(BATTERY_LEVEL_UUID)
-                    battery_level = int(value_bytes[0]) 
-                    status = "online" 
-                    bt_logger.info("Batterie von %s gelesen: %d%%", mac_address, battery_level)
-                    break 
-            except (asyncio.TimeoutError, BleakError) as e:
-                bt_logger.warning("Fehler (Versuch %d): Verbindung fehlgeschlagen", attempt + 1)
-            except Exception as e:
-                logger.error("Allgemeiner Fehler (Versuch %d): %s", attempt + 1, e, exc_info=True)
+                        # Alle Characteristics des Profils in derselben Verbindung lesen
+                        with tracer.span("read_profile", "battery", characteristics=len(profile)):
+                            profile_values = await read_profile(client, mac_address, profile, gatt_cache, static_refresh_days, decoders)
+                        battery_level = profile_values["battery"]
+                        status = "online" 
+                        bt_logger.info("Batterie von %s gelesen: %d%%", mac_address, battery_level)
+                        reliability_tracker.record_attempt(mac_address, True, connect_seconds)
+                        break 
+                except asyncio.TimeoutError:
+                    bt_logger.warning("Fehler (Versuch %d): Verbindung fehlgeschlagen", attempt + 1)
+                    reliability_tracker.record_attempt(mac_address, False, reason=f"Timeout nach {connect_timeout:.0f}s")
+                except BleakError as e:
+                    bt_logger.warning("Fehler (Versuch %d): Verbindung fehlgeschlagen", attempt + 1)
+                    reliability_tracker.record_attempt(mac_address, False, reason=f"BleakError: {e}")
+                except Exception as e:
+                    logger.error("Allgemeiner Fehler (Versuch %d): %s", attempt + 1, e, exc_info=True)
+                    reliability_tracker.record_attempt(mac_address, False, reason=f"{type(e).__name__}: {e}")
 
             if status == "offline" and (attempt + 1) < retries:
                 bt_logger.info("Warte %ds vor dem nächsten Versuch", retry_delay)
-                await asyncio.sleep(retry_delay) 
+                with tracer.span("retry_delay", "battery"):
+                    await asyncio.sleep(retry_delay / time_scale)
         
         # --- DATEN-PAKET ERSTELLEN ---
         current_timestamp = int(time.time())
@@ -388,6 +817,16 @@ async def read_battery_and_report(mac_address, config, mqtt_client, known_device
                     logger.warning("Konnte alten Batteriestatus nicht lesen: %s", e)
             
             battery_level = old_battery_percent 
+            # Statische Infos (Name, Firmware, ...) auch offline aus dem Cache melden
+            cached_values = cached_static_values(mac_address, profile, gatt_cache, ignore_age=True)
+            profile_values = {name: value for name, value in cached_values.items() if value is not None}
+
+        gatt_cache.save()
+        reliability_tracker.record_result(mac_address, status == "online")
+        reliability_tracker.save()
+        # GATT 0x2A00 ist unter BlueZ nicht lesbar, der Name kommt aus dem Discover
+        device_name = discovered_name(mac_address) or device_name
+        extra_values = {name: value for name, value in profile_values.items() if name != "battery"}
 
         data_payload_dict = {
             "hostname": SYSTEM_HOSTNAME,
@@ -397,15 +836,18 @@ async def read_battery_and_report(mac_address, config, mqtt_client, known_device
             "name": device_name, 
             "alias": alias, 
             "rssi": rssi, 
-            "timestamp": current_timestamp
+            "timestamp": current_timestamp,
+            **extra_values
         }
         
         status_file_data = {
             "timestamp": current_timestamp,
             "battery_percent": battery_level, 
-            "status": status 
+            "status": status,
+            **extra_values
         }
-        await update_battery_status_file(mac_address, status_file_data)
+        with tracer.span("status_file_update", "battery"):
+            await update_battery_status_file(mac_address, status_file_data)
         
         if status == "offline" and not report_offline:
             bt_logger.info("Gerät ist offline. Senden wird (gemäß config.ini) übersprungen.")
@@ -416,25 +858,27 @@ async def read_battery_and_report(mac_address, config, mqtt_client, known_device
             safe_mac = mac_address.replace(":", "")
             full_topic = f"{base_topic}/{safe_mac}"
 
-            send_udp(data_payload_json, config)
-            send_mqtt(data_payload_json, full_topic, config, mqtt_client)
+            with tracer.span("publish_battery", "publish", mac=mac_address):
+                send_udp(data_payload_json, config)
+                send_mqtt(data_payload_json, full_topic, config, mqtt_client)
 
     # Hardware-Reset
     bt_logger.debug("%s Abfrage beendet. Erzwungener Hardware-Reset", mac_address)
-    await asyncio.sleep(0.1) 
-    reset_bluetooth_stack()
+    with tracer.span("reset_bluetooth_stack", "adapter"):
+        await asyncio.sleep(0.1 / time_scale)
+        reset_bluetooth_stack()
     
 # --- 5. Kernfunktion: DISCOVER (MIT TIMEOUT)---
 # --- 5. Kernfunktion: DISCOVER (MIT TIMEOUT)---
-async def discover_and_save(scan_duration):
-    """Führt einen Discovery-Scan durch und speichert alle gefundenen Geräte in scan_results.json."""
-    
+async def wait_for_adapter():
+    """Wartet, bis der Scan-Daemon pausiert, und setzt danach den Adapter zurück."""
     # --- KORRIGIERTE PAUSE-LOGIK MIT TIMEOUT ---
     scan_logger.info("Discover: Warte, bis der Scan-Daemon pausiert...")
     wait_start_time = time.time()
+    max_wait_seconds = pause_wait_seconds()
     while os.path.exists(PAUSE_FILE):
-        if (time.time() - wait_start_time) > MAX_PAUSE_WAIT_SECONDS:
-            scan_logger.info("FIX: Timeout (>%ds) erreicht. Lösche die veraltete Pause-Datei (%s).", MAX_PAUSE_WAIT_SECONDS, PAUSE_FILE)
+        if (time.time() - wait_start_time) > max_wait_seconds:
+            scan_logger.info("FIX: Timeout (>%ds) erreicht. Lösche die veraltete Pause-Datei (%s).", max_wait_seconds, PAUSE_FILE)
             try:
                 os.remove(PAUSE_FILE)
             except OSError as e:
@@ -449,10 +893,17 @@ async def discover_and_save(scan_duration):
     scan_logger.info("Warte 3 Sekunden, bis der Adapter initialisiert ist...")
     await asyncio.sleep(3) 
     # --- ENDE KORRIGIERTE LOGIK ---
+
+async def discover_and_save(scan_duration, scanner_factory=None, results_file=DISCOVER_RESULTS_FILE):
+    """Führt einen Discovery-Scan durch und speichert alle gefundenen Geräte in scan_results.json."""
+    
+    if scanner_factory is None:
+        await wait_for_adapter()
     
     scan_logger.info("Suche nach ALLEN Geräten für %d Sekunden...", scan_duration)
     
     found_devices = {} 
+    device_details = {} # { "MAC": [BlueZ-Adresstyp, [Company-IDs in Reihenfolge des Auftretens]] }
     
     def detection_callback(device, advertisement_data):
         current_rssi = advertisement_data.rssi
@@ -462,9 +913,18 @@ async def discover_and_save(scan_duration):
                 "name": device.name or "Unknown",
                 "rssi": current_rssi 
             }
+        details = device_details.setdefault(device.address, [None, []])
+        if details[0] is None:
+            details[0] = bluez_address_type(device)
+        for company_id in advertisement_data.manufacturer_data or ():
+            if company_id not in details[1]:
+                details[1].append(company_id)
         scan_logger.debug("Gefunden: %s (Name: %s, RSSI: %d)", device.address, device.name, current_rssi)
     
-    scanner = BleakScanner(detection_callback=detection_callback)
+    if scanner_factory is None:
+        scanner = BleakScanner(detection_callback=detection_callback)
+    else:
+        scanner = scanner_factory(detection_callback)
     
     try:
         await scanner.start()
@@ -475,6 +935,10 @@ async def discover_and_save(scan_duration):
         return
     
     scan_logger.info("Scan beendet. %d einzigartige Geräte gefunden.", len(found_devices))
+
+    # Hersteller (OUI/Company-ID) und Adresstyp ergänzen: einmal pro Gerät, nicht pro Advertisement
+    for address, device_data in found_devices.items():
+        device_data.update(enrich(address, *device_details[address]))
     
     scan_logger.info("Sortiere Ergebnisse nach MAC-Adresse...")
     sorted_devices = dict(sorted(found_devices.items()))
@@ -487,11 +951,143 @@ async def discover_and_save(scan_duration):
     }
     
     try:
-        with open(DISCOVER_RESULTS_FILE, "w") as f:
+        with open(results_file, "w") as f:
             json.dump(output_data, f, indent=4)
-        scan_logger.info("Ergebnisse erfolgreich in '%s' gespeichert.", DISCOVER_RESULTS_FILE)
+        scan_logger.info("Ergebnisse erfolgreich in '%s' gespeichert.", results_file)
     except IOError as e:
-        logger.error("Fehler beim Schreiben der Datei '%s': %s", DISCOVER_RESULTS_FILE, e)
+        logger.error("Fehler beim Schreiben der Datei '%s': %s", results_file, e)
+
+
+# --- 5b. RECORD / REPLAY (Aufzeichnung von Advertisement-Streams) ---
+def stop_scan_service():
+    """Hält den Scan-Dienst an (wie action.php beim Discover). Gibt zurück, ob er lief."""
+    try:
+        running = subprocess.run(["systemctl", "is-active", "--quiet", SERVICE_NAME]).returncode == 0
+        if running:
+            scan_logger.info("Halte den Scan-Dienst (%s) an...", SERVICE_NAME)
+            subprocess.run(["systemctl", "stop", SERVICE_NAME], check=True, capture_output=True)
+        return running
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning("Konnte %s nicht anhalten: %s", SERVICE_NAME, e)
+        return False
+
+def start_scan_service():
+    scan_logger.info("Starte den Scan-Dienst (%s) neu...", SERVICE_NAME)
+    try:
+        subprocess.run(["systemctl", "start", SERVICE_NAME], check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.error("Konnte %s nicht starten: %s", SERVICE_NAME, e)
+
+async def record_advertisements(scan_duration, output_file):
+    """
+    Zeichnet alle Advertisements für scan_duration Sekunden in eine Capture-Datei auf.
+    Der Scan-Dienst wird für die ganze Aufzeichnung angehalten, sonst setzt er den
+    Adapter in jedem Durchlauf zurück und unterbricht die Aufzeichnung.
+    """
+    service_was_running = stop_scan_service()
+    try:
+        await wait_for_adapter()
+
+        scan_logger.info("Zeichne ALLE Advertisements für %d Sekunden in '%s' auf...", scan_duration, output_file)
+        with CaptureWriter(output_file) as writer:
+            scanner = BleakScanner(detection_callback=writer.write)
+            try:
+                await scanner.start()
+                await asyncio.sleep(float(scan_duration))
+                await scanner.stop()
+            except BleakError as e:
+                logger.error("Fehler beim Scannen: %s", e)
+            scan_logger.info("Aufzeichnung beendet. %d Advertisements gespeichert.", writer.count)
+    finally:
+        if service_was_running:
+            start_scan_service()
+
+async def replay_advertisements(capture_file, target, speed, window, config, known_devices, mqtt_client, results_file):
+    """
+    Spielt eine Capture-Datei durch scan_and_report (in Fenstern à 'window' Sekunden,
+    wie der Daemon) oder discover_and_save ab. speed > 1 beschleunigt die Wiedergabe.
+    """
+    records = read_capture(capture_file)
+    if not records:
+        logger.warning("Capture '%s' enthält keine Advertisements.", capture_file)
+        return
+    capture_span = records[-1].timestamp - records[0].timestamp
+    scan_logger.info("Replay '%s': %d Advertisements über %.1fs, Ziel '%s', Geschwindigkeit %.1fx",
+                     capture_file, len(records), capture_span, target, speed)
+
+    wall_start = time.monotonic()
+    cpu_start = time.process_time()
+    if target == "discover":
+        await discover_and_save(
+            capture_span / speed,
+            scanner_factory=lambda callback: ReplayScanner(records, callback, speed),
+            results_file=results_file
+        )
+    else:
+        for window_start, window_records in split_windows(records, window):
+            await scan_and_report(
+                window / speed, config, known_devices, mqtt_client,
+                scanner_factory=lambda callback, recs=window_records, start=window_start: ReplayScanner(recs, callback, speed, start)
+            )
+    scan_logger.info("Replay beendet: %.2fs Laufzeit, %.2fs CPU.", time.monotonic() - wall_start, time.process_time() - cpu_start)
+
+
+def sync_live_battery_status(last_mtime):
+    """Übernimmt Änderungen aus battery_status.json (vom Batterie-Job geschrieben) in den Live-Stream."""
+    try:
+        mtime = os.path.getmtime(BATTERY_STATUS_FILE)
+    except OSError:
+        return last_mtime
+    if mtime == last_mtime:
+        return last_mtime
+    try:
+        with open(BATTERY_STATUS_FILE, "r") as f:
+            all_status_data = json.load(f)
+    except Exception as e:
+        logger.warning("Konnte %s nicht lesen: %s", BATTERY_STATUS_FILE, e)
+        return mtime
+    for mac, status_data in all_status_data.items():
+        live_hub.update(
+            mac,
+            battery_percent=status_data.get('battery_percent', -1),
+            battery_status=status_data.get('status'),
+            battery_timestamp=status_data.get('timestamp')
+        )
+    return mtime
+
+async def start_live_hub(config, known_devices):
+    """Startet den Live-Stream, falls [Live] enabled (Standard: aus)."""
+    global live_hub
+    if not config.getboolean('Live', 'enabled', fallback=False):
+        return
+    live_hub = LiveHub.from_config(config)
+    await live_hub.start(
+        config.get('Live', 'host', fallback=DEFAULT_LIVE_HOST),
+        config.getint('Live', 'port', fallback=DEFAULT_LIVE_PORT)
+    )
+    for entry in known_devices:
+        live_hub.update(entry.mac, alias=entry.alias)
+
+
+def sync_worker_pool(config):
+    """Startet oder beendet die Worker-Prozesse passend zu [Scan] process_mode."""
+    global worker_pool
+    process_mode = config.get('Scan', 'process_mode', fallback=PROCESS_MODE_SINGLE).strip().lower()
+    if process_mode not in PROCESS_MODES:
+        logger.warning("Unbekannter process_mode '%s'. Verwende '%s'.", process_mode, PROCESS_MODE_SINGLE)
+        process_mode = PROCESS_MODE_SINGLE
+    if process_mode == PROCESS_MODE_MULTI and worker_pool is None:
+        pool = WorkerPool.from_config(config)
+        try:
+            pool.start()
+        except OSError as e:
+            logger.error("Mehrprozess-Betrieb konnte nicht gestartet werden (%s). Bleibe bei '%s'.", e, PROCESS_MODE_SINGLE)
+            pool.stop()
+            return
+        worker_pool = pool
+    elif process_mode == PROCESS_MODE_SINGLE and worker_pool is not None:
+        worker_pool.stop()
+        worker_pool = None
 
 
 # --- 6. NEUE KERNFUNKTION: DER DAEMON (KORRIGIERT FÜR SOFORTIGES RELOAD) ---
@@ -505,62 +1101,167 @@ async def run_scan_daemon():
     config = load_config()
     mqtt_client = setup_mqtt_client(config)
     
-    scan_timeout = 10 
+    known_devices = load_known_devices()
+    await start_live_hub(config, known_devices)
+    global presence_model
+    presence_model = PresenceModel()
+
+    # Tracing zur Laufzeit umschalten: kill -USR1 <PID>
+    asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, tracer.toggle)
+    # SIGTERM (systemctl stop) beendet die Schleife geordnet, damit Worker und Shared Memory aufgeräumt werden
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
+    try:
+        await _scan_daemon_loop(config, mqtt_client, known_devices)
+    except asyncio.CancelledError:
+        logger.info("--- BLE Scan Daemon wird beendet ---")
+    finally:
+        if worker_pool is not None:
+            worker_pool.stop()
+        async with pause_lock:
+            if os.path.exists(PAUSE_FILE):
+                os.remove(PAUSE_FILE)
+        presence_model.save()
+
+async def _scan_daemon_loop(config, mqtt_client, known_devices, scanner_factory=None, time_scale=1.0, cycle_hook=None,
+                           window_controller=None):
+    """
+    Hauptschleife des Daemons. scanner_factory, time_scale (Zeitraffer für Scan-Fenster und Pausen),
+    cycle_hook (nach jedem Durchlauf, False beendet die Schleife) und window_controller (zum Prüfen
+    der Fensterstatistik) nutzt der Soak-Test (ble_soak.py).
+    """
+    scan_timeout = DAEMON_SCAN_SECONDS
     reload_interval_seconds = 300 # Nur für MQTT-Check und langlebige Config
     last_reload_time = time.time()
-    
+    cycle = 0
+    battery_status_mtime = None
+    if window_controller is None:
+        window_controller = WindowController(scan_timeout)
+
     while True:
+        cycle += 1
+        cycle_start = time.monotonic()
+        window = None
+        granted_seconds = 0.0
+        scheduled_seconds = 0.0     # Scan-Fenster und Pausen, die time_scale verkürzt
         try:
-            # --- 0. KONFIGURATION UND GERÄTELISTE BEI JEDEM DURCHLAUF NEU LADEN ---
-            # (Löst das Problem des Settings-Neustarts)
-            config = load_config()
-            known_devices = load_known_devices()
+            with tracer.span("cycle", cycle=cycle):
+                # --- 0. KONFIGURATION UND GERÄTELISTE BEI JEDEM DURCHLAUF NEU LADEN ---
+                # (Löst das Problem des Settings-Neustarts; die Geräteliste wird nur bei Änderungen neu geparst)
+                with tracer.span("config_reload"):
+                    config = load_config()
+                    device_diff = known_devices.reload()
+                tracer.configure(config, "daemon")
+                window_controller.configure(config)
+                if presence_model is not None:
+                    presence_model.configure(config)
+                with tracer.span("worker_pool_sync"):
+                    sync_worker_pool(config)
+                if device_diff:
+                    logger.info("[Daemon] Geräteliste geändert: neu=%s, entfernt=%s, geändert=%s",
+                                device_diff.added, device_diff.removed, device_diff.changed)
+                    if presence_model is not None:
+                        for mac in device_diff.removed:
+                            presence_model.remove(mac)
+                    if live_hub is not None:
+                        for mac in device_diff.removed:
+                            live_hub.remove(mac)
+                        for mac in device_diff.added + device_diff.changed:
+                            live_hub.update(mac, alias=known_devices.alias(mac))
+                if live_hub is not None:
+                    battery_status_mtime = sync_live_battery_status(battery_status_mtime)
 
-            # Lade die Pausenzeit (Sicherheitscheck, basiert auf der FRISCHEN Config)
-            battery_pause_duration = 30 
-            if config.has_section('General'):
-                battery_pause_duration = config.getint('General', 'battery_pause_duration', fallback=30)
+                # Lade die Pausenzeit (Sicherheitscheck, basiert auf der FRISCHEN Config)
+                battery_pause_duration = 30 
+                if config.has_section('General'):
+                    battery_pause_duration = config.getint('General', 'battery_pause_duration', fallback=30)
             
-            # --- 1. MQTT/schwere Dienste regelmäßig neu laden ---
-            current_time = time.time()
-            if (current_time - last_reload_time) > reload_interval_seconds:
-                logger.info("[Daemon] Prüfe MQTT-Verbindung und langlebige Konfiguration")
-                last_reload_time = current_time
+                # --- 1. MQTT/schwere Dienste regelmäßig neu laden ---
+                current_time = time.time()
+                if (current_time - last_reload_time) > reload_interval_seconds:
+                    logger.info("[Daemon] Prüfe MQTT-Verbindung und langlebige Konfiguration")
+                    last_reload_time = current_time
+                    log_window_summary(window_controller)
                 
-                # MQTT-Verbindung prüfen/neu aufbauen
-                if mqtt_client is None or not mqtt_client.is_connected():
-                    logger.warning("[Daemon] MQTT-Verbindung verloren oder noch nicht vorhanden. Versuche Reconnect")
-                    disconnect_mqtt(mqtt_client)
-                    # Verwende die FRISCH geladene Config von oben
-                    mqtt_client = setup_mqtt_client(config)
-
-            # --- 2. Pausendauer bestimmen ---
-            if os.path.exists(BATTERY_JOB_LOCK):
-                pause_duration = battery_pause_duration
-                logger.info("[Daemon] BATTERIE-MODUS: %ds Pause nach Scan", pause_duration)
-            else:
-                pause_duration = 5
+                    with tracer.span("mqtt_check"):
+                        # MQTT-Verbindung prüfen/neu aufbauen
+                        if mqtt_client is None or not mqtt_client.is_connected():
+                            logger.warning("[Daemon] MQTT-Verbindung verloren oder noch nicht vorhanden. Versuche Reconnect")
+                            disconnect_mqtt(mqtt_client)
+                            # Verwende die FRISCH geladene Config von oben
+                            mqtt_client = setup_mqtt_client(config)
+
+                # --- 2. Pausendauer bestimmen ---
+                if os.path.exists(BATTERY_JOB_LOCK):
+                    pause_duration = battery_pause_duration
+                    logger.info("[Daemon] BATTERIE-MODUS: %ds Pause nach Scan", pause_duration)
+                else:
+                    pause_duration = 5
+                # Wartet ein Batterie-Job, bekommt er die im Fenster eingesparte Zeit
+                # (Discover hält den Dienst an und wartet daher nie auf den Daemon)
+                job_pending = os.path.exists(BATTERY_JOB_LOCK)
             
-            # --- 3. Den PHP-Batterie-Job (falls er läuft) pausieren ---
-            async with pause_lock:
-                if not os.path.exists(PAUSE_FILE):
-                    open(PAUSE_FILE, 'a').close()
+                # --- 3. Den PHP-Batterie-Job (falls er läuft) pausieren ---
+                with tracer.span("pause_file_create"):
+                    async with pause_lock:
+                        if not os.path.exists(PAUSE_FILE):
+                            open(PAUSE_FILE, 'a').close()
 
-            # --- 4. Scannen ---
-            await scan_and_report(scan_timeout, config, known_devices, mqtt_client)
+                # --- 4. Scannen ---
+                with tracer.span("scan_and_report", "scan"):
+                    scan_stats = await scan_and_report(scan_timeout / time_scale, config, known_devices, mqtt_client,
+                                                       scanner_factory=scanner_factory, window_controller=window_controller,
+                                                       time_scale=time_scale, allow_extension=not job_pending)
+                window = scan_stats["window"] if scan_stats else None
+                if window is not None:
+                    scheduled_seconds += window["seconds"]
+                if window is not None and job_pending:
+                    granted_seconds = max(0.0, window["saved_seconds"])
+                    if granted_seconds:
+                        pause_duration += granted_seconds
+                        logger.info("[Daemon] %.1fs eingesparte Scan-Zeit an wartenden Batterie-Job", granted_seconds)
+                if worker_pool is not None:
+                    worker_pool.check()
+                if presence_model is not None:
+                    presence_model.save_if_due()
             
-            # --- 5. Pause für PHP-Job aufheben ---
-            async with pause_lock:
-                if os.path.exists(PAUSE_FILE):
-                    os.remove(PAUSE_FILE)
+                # --- 5. Pause für PHP-Job aufheben ---
+                with tracer.span("pause_file_remove"):
+                    async with pause_lock:
+                        if os.path.exists(PAUSE_FILE):
+                            os.remove(PAUSE_FILE)
             
-            # --- 6. Warten (5s oder 30s) ---
-            logger.debug("[Daemon] Warte für %d Sekunden", pause_duration)
-            await asyncio.sleep(pause_duration)
+                # --- 6. Warten (5s oder 30s) ---
+                logger.debug("[Daemon] Warte für %d Sekunden", pause_duration)
+                scheduled_seconds += pause_duration
+                with tracer.span("pause", duration=pause_duration):
+                    await asyncio.sleep(pause_duration / time_scale)
             
         except Exception as e:
             logger.critical("FATALER FEHLER in der Daemon-Hauptschleife: %s", e, exc_info=True)
-            await asyncio.sleep(30)
+            await asyncio.sleep(30 / time_scale)
+        finally:
+            tracer.end_cycle()
+            if window is not None:
+                # Verwaltungsaufwand in Echtzeit, Fenster und Pausen ungekürzt (im Zeitraffer sonst mitskaliert)
+                cycle_seconds = time.monotonic() - cycle_start + scheduled_seconds * (1 - 1 / time_scale)
+                window_controller.record_cycle(window, cycle_seconds, granted_seconds)
+
+        if cycle_hook is not None and not cycle_hook(cycle):
+            return
+
+def log_window_summary(window_controller):
+    """Protokolliert Fensterlängen, eingesparte Scan-Zeit und Duty-Cycle seit der letzten Zusammenfassung."""
+    summary = window_controller.summary()
+    if not summary["cycles"]:
+        return
+    logger.info(
+        "[Daemon] Scan-Fenster (%s): %d Durchläufe, Ø %.1fs (Ziel %.1fs), %d vorzeitig vollständig, %d verlängert, "
+        "%.0fs eingespart (davon %.0fs an Batterie-Job), Duty-Cycle %.0f%%",
+        summary["mode"], summary["cycles"], summary["average_window_seconds"], summary["target_seconds"],
+        summary["completed"], summary["extended"], summary["saved_seconds"], summary["granted_seconds"],
+        100.0 * summary["duty_cycle"]
+    )
 
 # --- 7. HAUPTFUNKTION (Argumenten-Logik) (KORRIGIERT MIT PRE-CHECK) ---
 async def main():
@@ -570,6 +1271,9 @@ async def main():
                "  sudo python3 %(prog)s scan -t 5    (Meldet bekannte Geräte an MQTT/UDP)\n"
                "  sudo python3 %(prog)s read -m AA:BB... -m CC:DD... (Liest Batterie(n) und meldet an MQTT/UDP)\n"
                "  sudo python3 %(prog)s discover -t 10 (Findet alle Geräte und speichert sie in scan_results.json)\n"
+               "  python3 %(prog)s stats (Zeigt Verbindungs-Statistik und Circuit-Breaker pro Gerät)\n"
+               "  sudo python3 %(prog)s record -t 60 -o site.blec (Zeichnet alle Advertisements auf)\n"
+               "  python3 %(prog)s replay -f site.blec --speed 10 (Spielt eine Aufzeichnung durch den Scan ab)\n"
                "  sudo python3 %(prog)s run_scan_daemon (Startet den 24/7 Scan-Dienst)",
         formatter_class=argparse.RawTextHelpFormatter 
     )
@@ -588,6 +1292,14 @@ async def main():
         "-t", "--timeout", type=int, default=10, 
         help="Dauer des Scans in Sekunden (Standard: 10)"
     )
+    parser_scan.add_argument(
+        "--filter-mode", choices=SCAN_MODES, default=None,
+        help="Überschreibt [Scan] filter_mode (z.B. zum Vergleich von CPU-Last und Advertisement-Rate)"
+    )
+    parser_scan.add_argument(
+        "--measure-dbus", action="store_true",
+        help="Zählt die D-Bus-Signale von bluetoothd während des Scan-Fensters (dbus-monitor, root)"
+    )
     parser_read = subparsers.add_parser("read", help="Den Batteriestand (0x2a19) eines Geräts auslesen und melden (nutzt config.init).")
     parser_read.add_argument(
         "-m", "--mac", 
@@ -600,6 +1312,56 @@ async def main():
         "-t", "--timeout", type=int, default=10, 
         help="Dauer des Scans in Sekunden (Standard: 10)"
     )
+    parser_record = subparsers.add_parser("record", help="Alle Advertisements aufzeichnen (Binär-Capture für Replay).")
+    parser_record.add_argument(
+        "-t", "--timeout", type=int, default=60, 
+        help="Dauer der Aufzeichnung in Sekunden (Standard: 60)"
+    )
+    parser_record.add_argument(
+        "-o", "--output", required=True,
+        help="Ziel-Datei der Aufzeichnung"
+    )
+    parser_replay = subparsers.add_parser("replay", help="Aufgezeichnete Advertisements durch scan/discover abspielen.")
+    parser_replay.add_argument(
+        "-f", "--file", required=True,
+        help="Capture-Datei (von 'record')"
+    )
+    parser_replay.add_argument(
+        "--target", choices=["scan", "discover"], default="scan",
+        help="Abzuspielende Verarbeitung (Standard: scan)"
+    )
+    parser_replay.add_argument(
+        "--speed", type=float, default=1.0,
+        help="Wiedergabe-Geschwindigkeit, z.B. 10 = zehnfach (Standard: 1 = Echtzeit)"
+    )
+    parser_replay.add_argument(
+        "--window", type=float, default=10,
+        help="Länge eines Scan-Fensters in Capture-Sekunden (nur --target scan, Standard: 10)"
+    )
+    parser_replay.add_argument(
+        "-o", "--output", default=None,
+        help="Ergebnis-Datei für --target discover (Standard: <Capture>.json, nicht scan_results.json)"
+    )
+    parser_replay.add_argument(
+        "--publish", action="store_true",
+        help="Meldungen wirklich per MQTT/UDP senden (Standard: aus)"
+    )
+    parser_stats = subparsers.add_parser("stats", help="Verbindungs-Statistik und Circuit-Breaker-Zustand pro Gerät anzeigen.")
+    parser_stats.add_argument(
+        "--json", action="store_true",
+        help="Ausgabe als JSON (z.B. für die WebUI)"
+    )
+    parser_stats.add_argument(
+        "--reset", metavar="MAC", nargs='+',
+        help="Circuit-Breaker für diese MAC-Adresse(n) zurücksetzen"
+    )
+    parser_presence = subparsers.add_parser(
+        "presence", help="Gelerntes Sichtungs-Intervall, Offline-Schwelle und falsche Offline-Wechsel pro Gerät anzeigen."
+    )
+    parser_presence.add_argument(
+        "--json", action="store_true",
+        help="Ausgabe als JSON"
+    )
     parser_read_enabled = subparsers.add_parser("read_enabled_batteries", help="Liest alle in der Konfigurationsdatei aktivierten Batteriestände.")
     parser_daemon = subparsers.add_parser("run_scan_daemon", help="Startet den permanenten 24/7 Scan-Dienst.")
 
@@ -616,13 +1378,13 @@ async def main():
             handler.setLevel(level)
         logger.info("Log-Level überschrieben auf: %s", args.log_level)
         
-    if args.command in ["read", "read_enabled_batteries", "discover"]:
+    if args.command in ["read", "read_enabled_batteries", "discover", "record"]:
         # Dieser Check läuft synchron, bevor asyncio startet, um das hängende Lock zu entfernen
         cleanup_stale_pause_file() 
 
     config = None
     mqtt_client = None
-    known_devices = {}
+    known_devices = DeviceRegistry(KNOWN_DEVICES_FILE)
     
     if args.command in ["scan", "read", "read_enabled_batteries"]:
         config = load_config()
@@ -631,12 +1393,36 @@ async def main():
             sys.exit(1)
         mqtt_client = setup_mqtt_client(config)
         known_devices = load_known_devices() 
+        if args.command != "scan":
+            tracer.configure(config, "battery")
+    elif args.command == "replay":
+        if args.speed <= 0:
+            logger.error("--speed muss größer als 0 sein.")
+            sys.exit(1)
+        config = load_config()
+        if not args.publish:
+            # Replay soll keine echten Meldungen erzeugen
+            for section in ('UDP', 'MQTT'):
+                if config.has_section(section):
+                    config.set(section, 'enabled', 'false')
+        mqtt_client = setup_mqtt_client(config)
+        known_devices = load_known_devices()
 
     try:
         if args.command == "scan":
             if not known_devices:
                 logger.warning("%s ist leer. Scan-Befehl wird keine Geräte melden.", KNOWN_DEVICES_FILE)
-            await scan_and_report(args.timeout, config, known_devices, mqtt_client)
+            dbus_counter = BluezSignalCounter() if args.measure_dbus else None
+            if dbus_counter is not None and not await dbus_counter.start():
+                dbus_counter = None
+            scan_stats = await scan_and_report(args.timeout, config, known_devices, mqtt_client, args.filter_mode)
+            if dbus_counter is not None:
+                await dbus_counter.stop()
+                if scan_stats:
+                    signals = dbus_counter.count(scan_stats["window_start_time"], scan_stats["window_end_time"])
+                    window_seconds = max(scan_stats["window_end_time"] - scan_stats["window_start_time"], 0.001)
+                    scan_logger.info("D-Bus (%s): %d Signale von org.bluez im Scan-Fenster (%.1f/s), %d Callbacks",
+                                     scan_stats["mode"], signals, signals / window_seconds, scan_stats["advertisements"])
             
         elif args.command == "read":
             macs_to_process = args.mac
@@ -664,16 +1450,10 @@ async def main():
             except IOError as e:
                 logger.error("Konnte Zeitstempeldatei {LAST_BATTERY_SCAN_FILE} nicht schreiben: {e}")
 
-            macs_to_process = []
-            try:
-                with open(KNOWN_DEVICES_FILE, "r") as f:
-                    for line in f:
-                        parts = line.strip().split(",", 2)
-                        if len(parts) == 3 and parts[2].strip() == '1':
-                            macs_to_process.append(parts[0].upper().strip())
-            except FileNotFoundError:
+            if not os.path.exists(KNOWN_DEVICES_FILE):
                 logger.error("%s nicht gefunden.", KNOWN_DEVICES_FILE)
                 return
+            macs_to_process = known_devices.battery_macs()
 
             if not macs_to_process:
                 logger.info("Keine Geräte für den Batterie-Scan aktiviert.")
@@ -690,7 +1470,7 @@ async def main():
             tasks = []
             for mac in macs_to_process:
                 tasks.append(
-                    read_battery_and_report(mac, config, mqtt_client, known_devices, read_semaphore)
+                    read_battery_and_report(mac, config, mqtt_client, known_devices, read_semaphore, use_breaker=True)
                 )
 
             await asyncio.gather(*tasks)
@@ -698,18 +1478,56 @@ async def main():
 
         elif args.command == "discover":
             await discover_and_save(args.timeout)
+
+        elif args.command == "stats":
+            tracker = ReliabilityTracker.from_config(load_config())
+            if args.reset:
+                for mac in args.reset:
+                    if tracker.reset(mac.upper()):
+                        logger.info("Circuit-Breaker für %s zurückgesetzt.", mac.upper())
+                    else:
+                        logger.warning("Keine Statistik für %s vorhanden.", mac.upper())
+                tracker.save()
+            if args.json:
+                print(json.dumps(tracker.all_stats(), indent=4))
+            else:
+                registry = load_known_devices()
+                aliases = {entry.mac: entry.alias for entry in registry}
+                print(format_stats(tracker.all_stats(), aliases))
+
+        elif args.command == "presence":
+            # Der Daemon speichert das Modell alle 5 Minuten und beim Beenden
+            model = PresenceModel()
+            model.configure(load_config())
+            if args.json:
+                print(json.dumps(model.stats(), indent=4))
+            else:
+                registry = load_known_devices()
+                aliases = {entry.mac: entry.alias for entry in registry}
+                print(format_presence_stats(model.stats(), aliases))
+
+        elif args.command == "record":
+            await record_advertisements(args.timeout, args.output)
+
+        elif args.command == "replay":
+            results_file = args.output or os.path.splitext(args.file)[0] + ".json"
+            await replay_advertisements(
+                args.file, args.target, args.speed, args.window,
+                config, known_devices, mqtt_client, results_file
+            )
             
     finally:
         if mqtt_client:
             disconnect_mqtt(mqtt_client)
+        tracer.end_cycle()
         logger.info("[INFO] Skript beendet.")
 
 
 # --- Skript-Start ---
 if __name__ == "__main__":
     
-    if os.geteuid() != 0:
-        if any(cmd in sys.argv for cmd in ['run_scan_daemon', 'read', 'scan', 'read_enabled_batteries']):
+    if os.geteuid() != 0 and 'replay' not in sys.argv:
+        if any(cmd in sys.argv for cmd in ['run_scan_daemon', 'read', 'scan', 'read_enabled_batteries', 'record']):
             logger.error("[FEHLER] Diese Befehle müssen mit sudo/als root gestartet werden (wegen hciconfig).")
             sys.exit(1)
 
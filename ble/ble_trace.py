@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Leichtgewichtiges Span-Tracing für BLE Tool
+Schreibt die letzten Durchläufe als Chrome-Trace-Event-JSON (chrome://tracing,
+Perfetto) nach /var/log/ble/. Ein-/Ausschalten über [Trace] enabled oder SIGUSR1.
+"""
+
+import os
+import json
+import time
+import asyncio
+import threading
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from ble_logger import get_logger, ensure_log_dir
+
+logger = get_logger(__name__)
+
+DEFAULT_MAX_CYCLES = 20
+
+
+class Tracer:
+    """Sammelt Spans pro Durchlauf und schreibt rollierend die letzten max_cycles Durchläufe."""
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_file = None
+        self.max_cycles = DEFAULT_MAX_CYCLES
+        self._signal_toggled = False
+        self._pid = os.getpid()
+        # perf_counter für Präzision, einmalig an die Wanduhr gekoppelt (Chrome erwartet µs)
+        self._epoch_us = time.time() * 1e6 - time.perf_counter() * 1e6
+        self._cycles = deque()
+        self._current = []
+        self._lanes = weakref.WeakKeyDictionary()   # { Task: tid }, bis der Task beendet ist
+        self._thread_lanes = {}                     # { Thread-ID: tid } für Code außerhalb von Tasks
+        self._max_tid = 0
+
+    # --- Steuerung ---
+    def configure(self, config, trace_name):
+        """Übernimmt [Trace] aus der (neu geladenen) Konfiguration. SIGUSR1 kehrt den Zustand um."""
+        config_enabled = config.getboolean('Trace', 'enabled', fallback=False)
+        self.max_cycles = max(1, config.getint('Trace', 'max_cycles', fallback=DEFAULT_MAX_CYCLES))
+        self.trace_file = os.path.join(ensure_log_dir(), f"ble_trace_{trace_name}.json")
+        enabled = config_enabled != self._signal_toggled
+        if enabled != self.enabled:
+            logger.info("Tracing %s (%s)", "aktiviert" if enabled else "deaktiviert", self.trace_file)
+            self._set_enabled(enabled)
+
+    def toggle(self):
+        """Für SIGUSR1: schaltet das Tracing zur Laufzeit um (bis zum nächsten Umschalten)."""
+        self._signal_toggled = not self._signal_toggled
+        self._set_enabled(not self.enabled)
+        logger.info("Tracing per Signal %s", "aktiviert" if self.enabled else "deaktiviert")
+
+    def _set_enabled(self, enabled):
+        if not enabled:
+            # Sonst landen Durchläufe von vor dem Ausschalten nach dem Wiedereinschalten in der Datei
+            self._cycles.clear()
+            self._current = []
+        self.enabled = enabled
+
+    # --- Erfassung ---
+    def _now_us(self):
+        return self._epoch_us + time.perf_counter() * 1e6
+
+    def _lane(self):
+        """
+        Eigene Zeile (tid) pro asyncio-Task, damit sich parallele Tasks nicht überlappen.
+        Ein Task behält seine Zeile bis zu seinem Ende, auch über Durchläufe hinweg (z.B.
+        Publish-Tasks); erst dann wird sie neu vergeben. tid 1 erhält der erste Task,
+        im Daemon also die Hauptschleife.
+        """
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        lanes = self._lanes if task is not None else self._thread_lanes
+        key = task if task is not None else threading.get_ident()
+        tid = lanes.get(key)
+        if tid is None:
+            for finished in [other for other in self._lanes if other.done()]:
+                del self._lanes[finished]
+            used = set(self._lanes.values()) | set(self._thread_lanes.values())
+            tid = 1
+            while tid in used:
+                tid += 1
+            lanes[key] = tid
+            self._max_tid = max(self._max_tid, tid)
+        return tid
+
+    @contextmanager
+    def span(self, name, cat="daemon", **args):
+        if not self.enabled:
+            yield
+            return
+        tid = self._lane()
+        start = self._now_us()
+        try:
+            yield
+        finally:
+            if not self.enabled:
+                # Während des Spans ausgeschaltet
+                return
+            event = {"name": name, "cat": cat, "ph": "X", "ts": start, "dur": self._now_us() - start,
+                     "pid": self._pid, "tid": tid}
+            if args:
+                event["args"] = args
+            self._current.append(event)
+
+    def end_cycle(self):
+        """Schließt den aktuellen Durchlauf ab und schreibt die Trace-Datei."""
+        if self._current:
+            self._cycles.append(self._current)
+            self._current = []
+        while len(self._cycles) > self.max_cycles:
+            self._cycles.popleft()
+        if self.enabled:
+            self.flush()
+
+    def flush(self):
+        if not self.trace_file:
+            return
+        events = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid,
+                   "args": {"name": "main" if tid == 1 else f"task {tid - 1}"}}
+                  for tid in range(1, self._max_tid + 1)]
+        for cycle in self._cycles:
+            events.extend(cycle)
+        events.extend(self._current)
+        tmp_file = self.trace_file + ".tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+            os.replace(tmp_file, self.trace_file)
+        except Exception as e:
+            logger.error("Fehler beim Schreiben von %s: %s", self.trace_file, e)
+
+
+tracer = Tracer()
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Hersteller- und Adresstyp-Erkennung für Discover-Ergebnisse
+Hersteller nach OUI (IEEE MA-L) und Bluetooth-SIG-Company-ID (Manufacturer Data)
+werden in vendor_tables.bin nachgeschlagen: sortierte uint32-Arrays und ein
+String-Block, per mmap geladen und mit bisect durchsucht. Die Datei erzeugt der
+Installer aus den offiziellen Listen (python3 ble_vendor.py build ...); fehlt
+sie, wird eine kleine eingebaute Tabelle verwendet.
+"""
+
+import os
+import re
+import csv
+import sys
+import mmap
+import array
+import struct
+from bisect import bisect_left
+from ble_logger import get_logger
+
+logger = get_logger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+VENDOR_TABLES_FILE = os.path.join(BASE_DIR, "vendor_tables.bin")
+
+# --- Adresstypen ---
+ADDRESS_PUBLIC = "public"
+ADDRESS_RANDOM_STATIC = "random_static"
+ADDRESS_RPA = "rpa"                       # Resolvable Private Address (wechselt regelmäßig)
+ADDRESS_NON_RESOLVABLE = "non_resolvable"
+ADDRESS_RANDOM_RESERVED = "random_reserved"
+ADDRESS_UNKNOWN = "unknown"
+
+_MAGIC = b"BLEV"
+_VERSION = 1
+# Header: <Magic><Version><reserviert><Anzahl OUIs><Anzahl Company-IDs><Länge String-Block>
+_HEADER = struct.Struct("<4sHHIII")
+
+# Eingebaute Minimaltabelle (Auszug aus den offiziellen Listen) für Installationen ohne vendor_tables.bin
+_SEED_OUI = {
+    0x001B21: "Intel Corporate",
+    0x3CA9F4: "Intel Corporate",
+    0x000393: "Apple, Inc.",
+    0x000A95: "Apple, Inc.",
+    0x001B63: "Apple, Inc.",
+    0x001E52: "Apple, Inc.",
+    0x28CFE9: "Apple, Inc.",
+    0xB827EB: "Raspberry Pi Foundation",
+    0xDCA632: "Raspberry Pi Trading Ltd",
+    0xE45F01: "Raspberry Pi Trading Ltd",
+    0x2CCF67: "Raspberry Pi (Trading) Ltd",
+    0xD83ADD: "Raspberry Pi Trading Ltd",
+    0x18FE34: "Espressif Inc.",
+    0x240AC4: "Espressif Inc.",
+    0x246F28: "Espressif Inc.",
+    0x30AEA4: "Espressif Inc.",
+    0x3C71BF: "Espressif Inc.",
+    0x5CCF7F: "Espressif Inc.",
+    0x84F3EB: "Espressif Inc.",
+    0xA4CF12: "Espressif Inc.",
+    0x00124B: "Texas Instruments",
+    0x34B1F7: "Texas Instruments",
+    0xB0B448: "Texas Instruments",
+    0x000B57: "Silicon Laboratories",
+    0x90FD9F: "Silicon Laboratories",
+    0xA4C138: "Telink Semiconductor (Taipei) Co. Ltd.",
+    0x582D34: "Qingping Electronics (Suzhou) Co., Ltd",
+    0x3C5AB4: "Google, Inc.",
+    0xF4F5D8: "Google, Inc.",
+    0x00E0FC: "HUAWEI TECHNOLOGIES CO.,LTD",
+    0x0050F2: "Microsoft Corporation",
+    0x00095B: "Netgear",
+    0x0017AB: "Nintendo Co., Ltd.",
+    0x001F20: "Logitech Europe SA",
+    0x001018: "Broadcom",
+}
+
+_SEED_COMPANY_IDS = {
+    0x0000: "Ericsson AB",
+    0x0001: "Nokia Mobile Phones",
+    0x0002: "Intel Corp.",
+    0x0003: "IBM Corp.",
+    0x0004: "Toshiba Corp.",
+    0x0006: "Microsoft",
+    0x0008: "Motorola",
+    0x0009: "Infineon Technologies AG",
+    0x000A: "Qualcomm Technologies International, Ltd. (QTIL)",
+    0x000D: "Texas Instruments Inc.",
+    0x000F: "Broadcom Corporation",
+    0x001D: "Qualcomm",
+    0x0025: "NXP B.V.",
+    0x0030: "ST Microelectronics",
+    0x003F: "Bluetooth SIG, Inc",
+    0x0046: "MediaTek, Inc.",
+    0x0047: "Marvell International Ltd.",
+    0x004C: "Apple, Inc.",
+    0x0057: "Harman International Industries, Inc.",
+    0x0059: "Nordic Semiconductor ASA",
+    0x005D: "Realtek Semiconductor Corporation",
+    0x0065: "HP, Inc.",
+    0x0075: "Samsung Electronics Co. Ltd.",
+    0x0078: "Nike, Inc.",
+    0x0087: "Garmin International, Inc.",
+    0x009E: "Bose Corporation",
+    0x00C4: "LG Electronics",
+    0x00D2: "Dialog Semiconductor B.V.",
+    0x00E0: "Google",
+    0x0118: "Radius Networks, Inc.",
+    0x012D: "Sony Corporation",
+    0x0131: "Cypress Semiconductor",
+    0x0157: "Anhui Huami Information Technology Co., Ltd.",
+    0x015D: "Estimote, Inc.",
+    0x0171: "Amazon.com Services, Inc.",
+    0x01DA: "Logitech International SA",
+    0x027D: "HUAWEI Technologies Co., Ltd.",
+    0x02E5: "Espressif Incorporated",
+    0x02FF: "Silicon Laboratories",
+    0x038F: "Xiaomi Inc.",
+    0x0499: "Ruuvi Innovations Ltd.",
+    0x0969: "Woan Technology (Shenzhen) Co., Ltd.",
+}
+
+
+# --- Adresstyp ---
+def address_type(address, bluez_address_type=None):
+    """
+    Bestimmt den Adresstyp. BlueZ liefert nur 'public' oder 'random', die Art der
+    Random-Adresse steckt in den beiden höchsten Bits (Core Spec Vol 6, Part B, 1.3).
+    """
+    if bluez_address_type == "public":
+        return ADDRESS_PUBLIC
+    if bluez_address_type != "random":
+        return ADDRESS_UNKNOWN
+    top_bits = int(address[0:2], 16) >> 6
+    if top_bits == 0b11:
+        return ADDRESS_RANDOM_STATIC
+    if top_bits == 0b01:
+        return ADDRESS_RPA
+    if top_bits == 0b00:
+        return ADDRESS_NON_RESOLVABLE
+    return ADDRESS_RANDOM_RESERVED
+
+
+def bluez_address_type(device):
+    """AddressType aus den BlueZ-Properties eines BLEDevice (None bei anderen Backends oder Replay)."""
+    details = getattr(device, "details", None)
+    if isinstance(details, dict):
+        return details.get("props", {}).get("AddressType")
+    return None
+
+
+# --- Tabellen ---
+class VendorTables:
+    """Sortierte Schlüssel-Arrays mit Offsets in einen String-Block (0-terminierte UTF-8-Namen)."""
+
+    def __init__(self, oui_keys, oui_names, company_keys, company_names, strings, source, strings_base=0):
+        self._oui_keys = oui_keys
+        self._oui_names = oui_names
+        self._company_keys = company_keys
+        self._company_names = company_names
+        self._strings = strings         # bytes oder mmap (dann beginnt der String-Block bei strings_base)
+        self._strings_base = strings_base
+        self.source = source
+
+    @classmethod
+    def from_file(cls, path=VENDOR_TABLES_FILE):
+        """Lädt die Tabellen per mmap. Die Arrays werden nicht kopiert, nur als uint32 interpretiert."""
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, oui_count, company_count, _ = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} ist keine Herstellertabelle (Version {_VERSION})")
+        offset = _HEADER.size
+        arrays = []
+        for count in (oui_count, oui_count, company_count, company_count):
+            arrays.append(_uint32_view(data, offset, count))
+            offset += count * 4
+        return cls(*arrays, data, source=path, strings_base=offset)
+
+    @classmethod
+    def from_dicts(cls, oui_map, company_map, source="builtin"):
+        oui_keys, oui_names, company_keys, company_names, strings = _pack_tables(oui_map, company_map)
+        return cls(oui_keys, oui_names, company_keys, company_names, strings, source)
+
+    def _name(self, offset):
+        start = self._strings_base + offset
+        end = self._strings.find(b"\0", start)
+        return self._strings[start:end].decode("utf-8")
+
+    @staticmethod
+    def _find(keys, key):
+        index = bisect_left(keys, key)
+        return index if index < len(keys) and keys[index] == key else None
+
+    def vendor(self, address):
+        """Hersteller laut OUI (erste drei Bytes der Adresse), None wenn unbekannt."""
+        try:
+            oui = int(address[0:2] + address[3:5] + address[6:8], 16)
+        except ValueError:
+            return None
+        index = self._find(self._oui_keys, oui)
+        return self._name(self._oui_names[index]) if index is not None else None
+
+    def company(self, company_id):
+        """Name zu einer Bluetooth-SIG-Company-ID, None wenn unbekannt."""
+        index = self._find(self._company_keys, company_id)
+        return self._name(self._company_names[index]) if index is not None else None
+
+    def counts(self):
+        return len(self._oui_keys), len(self._company_keys)
+
+
+def _uint32_view(data, offset, count):
+    if sys.byteorder == "little":
+        return memoryview(data)[offset:offset + count * 4].cast("I")
+    values = array.array("I", data[offset:offset + count * 4])
+    values.byteswap()
+    return values
+
+
+def _pack_tables(oui_map, company_map):
+    """Baut sortierte Arrays und einen deduplizierten String-Block (Namen wiederholen sich oft)."""
+    strings = bytearray()
+    name_offsets = {}
+
+    def name_offset(name):
+        offset = name_offsets.get(name)
+        if offset is None:
+            offset = name_offsets[name] = len(strings)
+            strings.extend(name.encode("utf-8") + b"\0")
+        return offset
+
+    oui_keys, oui_names = array.array("I"), array.array("I")
+    for key in sorted(oui_map):
+        oui_keys.append(key)
+        oui_names.append(name_offset(oui_map[key]))
+    company_keys, company_names = array.array("I"), array.array("I")
+    for key in sorted(company_map):
+        company_keys.append(key)
+        company_names.append(name_offset(company_map[key]))
+    return oui_keys, oui_names, company_keys, company_names, bytes(strings)
+
+
+_tables = None
+
+
+def get_tables():
+    """Lädt die Tabellen beim ersten Aufruf (vendor_tables.bin, sonst eingebaute Minimaltabelle)."""
+    global _tables
+    if _tables is None:
+        try:
+            _tables = VendorTables.from_file()
+        except FileNotFoundError:
+            logger.info("%s nicht vorhanden. Verwende eingebaute Herstellertabelle.", VENDOR_TABLES_FILE)
+            _tables = VendorTables.from_dicts(_SEED_OUI, _SEED_COMPANY_IDS)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning("Konnte %s nicht laden (%s). Verwende eingebaute Herstellertabelle.", VENDOR_TABLES_FILE, e)
+            _tables = VendorTables.from_dicts(_SEED_OUI, _SEED_COMPANY_IDS)
+    return _tables
+
+
+def enrich(address, bluez_type, company_ids):
+    """Zusatzfelder für scan_results.json: Adresstyp, Hersteller (OUI) und Company-ID."""
+    tables = get_tables()
+    kind = address_type(address, bluez_type)
+    # Nur öffentliche Adressen tragen eine echte OUI (bei unbekanntem Typ: nicht lokal verwaltet)
+    has_oui = kind == ADDRESS_PUBLIC or (kind == ADDRESS_UNKNOWN and not int(address[0:2], 16) & 0x02)
+    result = {"address_type": kind, "vendor": tables.vendor(address) if has_oui else None,
+              "company_id": None, "company": None}
+    for company_id in company_ids:
+        result["company_id"] = f"0x{company_id:04X}"
+        result["company"] = tables.company(company_id)
+        if result["company"]:
+            break
+    return result
+
+
+# --- Erzeugen aus den offiziellen Listen ---
+def parse_oui_csv(path):
+    """IEEE MA-L-Liste (oui.csv: Registry,Assignment,Organization Name,...)."""
+    oui_map = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                oui_map[int(row["Assignment"], 16)] = row["Organization Name"].strip()
+            except (KeyError, ValueError):
+                continue
+    return oui_map
+
+
+_YAML_VALUE = re.compile(r"^\s*-\s*value:\s*(0x[0-9A-Fa-f]+|\d+)\s*$")
+_YAML_NAME = re.compile(r"""^\s*name:\s*(?:'((?:[^']|'')*)'|"((?:[^"\\]|\\.)*)"|(.+?))\s*$""")
+_YAML_ESCAPE = re.compile(r"\\(x[0-9A-Fa-f]{2}|u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)")
+_YAML_ESCAPES = {"0": "\0", "a": "\a", "b": "\b", "t": "\t", "\t": "\t", "n": "\n", "v": "\v", "f": "\f",
+                 "r": "\r", "e": "\x1b", " ": " ", '"': '"', "/": "/", "\\": "\\", "N": "\x85",
+                 "_": "\xa0", "L": "\u2028", "P": "\u2029"}
+
+
+def _unescape_yaml(text):
+    """Escape-Sequenzen eines YAML-Strings in doppelten Anführungszeichen (YAML 1.2, 5.7)."""
+    def replace(match):
+        escape = match.group(1)
+        if len(escape) > 1:
+            return chr(int(escape[1:], 16))
+        return _YAML_ESCAPES.get(escape, match.group(0))
+    return _YAML_ESCAPE.sub(replace, text)
+
+
+def parse_company_yaml(path):
+    """company_identifiers.yaml der Bluetooth SIG (nur value/name, ohne YAML-Bibliothek)."""
+    company_map = {}
+    value = None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            match = _YAML_VALUE.match(line)
+            if match:
+                value = int(match.group(1), 0)
+                continue
+            match = _YAML_NAME.match(line)
+            if match and value is not None:
+                single, double, plain = match.groups()
+                name = single.replace("''", "'") if single is not None else _unescape_yaml(double) if double is not None else plain
+                company_map[value] = name
+                value = None
+    return company_map
+
+
+def build_tables(oui_csv=None, company_yaml=None, output_file=VENDOR_TABLES_FILE):
+    oui_map = parse_oui_csv(oui_csv) if oui_csv else dict(_SEED_OUI)
+    company_map = parse_company_yaml(company_yaml) if company_yaml else dict(_SEED_COMPANY_IDS)
+    oui_keys, oui_names, company_keys, company_names, strings = _pack_tables(oui_map, company_map)
+    if sys.byteorder != "little":
+        for values in (oui_keys, oui_names, company_keys, company_names):
+            values.byteswap()
+    tmp_file = output_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, 0, len(oui_keys), len(company_keys), len(strings)))
+        for values in (oui_keys, oui_names, company_keys, company_names):
+            f.write(values.tobytes())
+        f.write(strings)
+    os.replace(tmp_file, output_file)
+    return len(oui_map), len(company_map), os.path.getsize(output_file)
+
+
+def _benchmark(path=VENDOR_TABLES_FILE, lookups=100000):
+    import time
+    import random
+
+    start = time.perf_counter()
+    tables = VendorTables.from_file(path) if os.path.exists(path) else VendorTables.from_dicts(_SEED_OUI, _SEED_COMPANY_IDS)
+    load_ms = (time.perf_counter() - start) * 1000
+    oui_count, company_count = tables.counts()
+    print(f"Herstellertabelle {tables.source}: {oui_count} OUIs, {company_count} Company-IDs, geladen in {load_ms:.3f} ms")
+
+    rng = random.Random(1)
+    addresses = ["%02X:%02X:%02X:%02X:%02X:%02X" % tuple(rng.getrandbits(48).to_bytes(6, "big")) for _ in range(lookups)]
+    company_ids = [rng.randrange(0x1000) for _ in range(lookups)]
+    start = time.perf_counter()
+    for address in addresses:
+        tables.vendor(address)
+    vendor_us = (time.perf_counter() - start) / lookups * 1e6
+    start = time.perf_counter()
+    for company_id in company_ids:
+        tables.company(company_id)
+    company_us = (time.perf_counter() - start) / lookups * 1e6
+    start = time.perf_counter()
+    for address, company_id in zip(addresses, company_ids):
+        enrich(address, "public", (company_id,))
+    enrich_us = (time.perf_counter() - start) / lookups * 1e6
+    print(f"OUI-Lookup {vendor_us:.2f} µs, Company-Lookup {company_us:.2f} µs, komplette Anreicherung {enrich_us:.2f} µs pro Gerät")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Herstellertabellen für Discover-Ergebnisse")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    parser_build = subparsers.add_parser("build", help="Erzeugt vendor_tables.bin aus den offiziellen Listen")
+    parser_build.add_argument("--oui", help="IEEE oui.csv (https://standards-oui.ieee.org/oui/oui.csv)")
+    parser_build.add_argument("--company", help="Bluetooth SIG company_identifiers.yaml")
+    parser_build.add_argument("-o", "--output", default=VENDOR_TABLES_FILE)
+    parser_bench = subparsers.add_parser("bench", help="Misst Ladezeit und Lookup-Kosten")
+    parser_bench.add_argument("-f", "--file", default=VENDOR_TABLES_FILE)
+    parser_lookup = subparsers.add_parser("lookup", help="Schlägt Adressen oder Company-IDs nach")
+    parser_lookup.add_argument("values", nargs="+", help="MAC-Adresse oder Company-ID (z.B. 0x004C)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        oui_count, company_count, size = build_tables(args.oui, args.company, args.output)
+        print(f"{args.output}: {oui_count} OUIs, {company_count} Company-IDs, {size / 1024:.1f} KiB")
+    elif args.command == "bench":
+        _benchmark(args.file)
+    else:
+        for value in args.values:
+            if ":" in value:
+                print(f"{value}: {get_tables().vendor(value.upper()) or '-'}")
+            else:
+                print(f"{value}: {get_tables().company(int(value, 0)) or '-'}")
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Adaptives Scan-Fenster für den Daemon ([Scan] window_mode = adaptive)
+Ein Fenster endet, sobald alle erwarteten Geräte gesehen wurden (frühestens nach
+min_window_seconds). Fehlen erwartete Geräte, wird es bis max_window_seconds
+verlängert. Die reguläre Fensterlänge ergibt sich aus den letzten Durchläufen
+(übliche Zeit, bis alle erwarteten Geräte gesehen wurden).
+"""
+
+import time
+import asyncio
+from collections import deque
+from ble_logger import get_logger
+
+logger = get_logger(__name__)
+
+# --- Fenster-Modi ([Scan] window_mode) ---
+WINDOW_FIXED = "fixed"          # Immer das volle Fenster (bisheriges Verhalten)
+WINDOW_ADAPTIVE = "adaptive"    # Vorzeitiges Ende, Verlängerung und Länge aus der Historie
+WINDOW_MODES = (WINDOW_FIXED, WINDOW_ADAPTIVE)
+
+# --- Grund für das Fensterende ---
+END_FIXED = "fixed"             # Feste Länge
+END_COMPLETE = "complete"       # Alle erwarteten Geräte gesehen
+END_TIMEOUT = "timeout"         # Reguläre bzw. verlängerte Länge erreicht, Geräte fehlen
+
+DEFAULT_MIN_WINDOW_SECONDS = 3
+DEFAULT_MAX_WINDOW_SECONDS = 20
+HISTORY_CYCLES = 20
+MIN_HISTORY_CYCLES = 5          # Vorher gilt die Standardlänge
+COMPLETION_QUANTILE = 0.9
+COMPLETION_MARGIN = 1.5         # Reserve auf die übliche Zeit bis alle gesehen wurden
+
+
+class WindowController:
+    """Steuert die Länge der Scan-Fenster und zählt die eingesparte Adapterzeit."""
+
+    def __init__(self, base_seconds):
+        self.base_seconds = base_seconds
+        self.mode = WINDOW_FIXED
+        self.min_seconds = DEFAULT_MIN_WINDOW_SECONDS
+        self.max_seconds = DEFAULT_MAX_WINDOW_SECONDS
+        self._history = deque(maxlen=HISTORY_CYCLES)   # Sekunden bis alle erwarteten gesehen (None = nie)
+        self._missing = set()
+        self._complete = None
+        self._start = None
+        self._completed_at = None
+        self._totals = self._empty_totals()
+
+    @staticmethod
+    def _empty_totals():
+        return {"cycles": 0, "window_seconds": 0.0, "saved_seconds": 0.0, "cycle_seconds": 0.0,
+                "completed": 0, "extended": 0, "granted_seconds": 0.0}
+
+    def configure(self, config):
+        """Übernimmt [Scan] window_mode, min_window_seconds und max_window_seconds."""
+        mode = config.get('Scan', 'window_mode', fallback=WINDOW_FIXED).strip().lower()
+        if mode not in WINDOW_MODES:
+            logger.warning("Unbekannter window_mode '%s'. Verwende '%s'.", mode, WINDOW_FIXED)
+            mode = WINDOW_FIXED
+        if mode != self.mode:
+            self._history.clear()
+        self.mode = mode
+        self.min_seconds = min(self.base_seconds, max(0.5, config.getfloat(
+            'Scan', 'min_window_seconds', fallback=DEFAULT_MIN_WINDOW_SECONDS)))
+        self.max_seconds = max(self.base_seconds, config.getfloat(
+            'Scan', 'max_window_seconds', fallback=DEFAULT_MAX_WINDOW_SECONDS))
+
+    @property
+    def adaptive(self):
+        return self.mode == WINDOW_ADAPTIVE
+
+    def longest_seconds(self):
+        """Längstmögliches Fenster (adaptiv: inklusive Verlängerung)."""
+        return self.max_seconds if self.adaptive else self.base_seconds
+
+    def target_seconds(self):
+        """Reguläre Fensterlänge: Quantil der Zeit bis alle erwarteten Geräte gesehen wurden, mit Reserve."""
+        if not self.adaptive or len(self._history) < MIN_HISTORY_CYCLES:
+            return self.base_seconds
+        completions = sorted(float("inf") if seconds is None else seconds for seconds in self._history)
+        quantile = completions[min(len(completions) - 1, int(COMPLETION_QUANTILE * len(completions)))]
+        return min(self.base_seconds, max(self.min_seconds, quantile * COMPLETION_MARGIN))
+
+    # --- Ein Fenster ---
+    def begin(self, expected):
+        """Startet ein Fenster; expected = MACs, die im Fenster erwartet werden."""
+        self._missing = set(expected)
+        self._complete = asyncio.Event()
+        self._start = time.monotonic()
+        self._completed_at = None
+        if not self._missing:
+            self._completed_at = self._start
+            self._complete.set()
+
+    def seen(self, mac):
+        """Für das erste Advertisement jedes bekannten Geräts im Fenster."""
+        if mac in self._missing:
+            self._missing.discard(mac)
+            if not self._missing:
+                self._completed_at = time.monotonic()
+                self._complete.set()
+
+    async def _wait_complete(self, seconds):
+        if seconds > 0 and not self._complete.is_set():
+            try:
+                await asyncio.wait_for(self._complete.wait(), seconds)
+            except asyncio.TimeoutError:
+                pass
+        return self._complete.is_set()
+
+    async def wait(self, time_scale=1.0, allow_extension=True):
+        """
+        Wartet das Fenster ab und gibt dessen Kennzahlen zurück (Sekunden in Fensterzeit).
+        time_scale verkürzt nur die Wartezeiten (Soak-Test). Länge und Zeitpunkt der
+        Vollständigkeit werden auf die Phase begrenzt, in der das Fenster endete, sonst
+        würde im Zeitraffer der Verwaltungsaufwand mitskaliert. Ohne allow_extension
+        (Batterie-Job wartet) wird nicht über die reguläre Länge hinaus verlängert.
+        """
+        target = self.target_seconds()
+        extended = False
+        if not self.adaptive:
+            await asyncio.sleep(self.base_seconds / time_scale)
+            reason = END_FIXED
+            phase = (0.0, self.base_seconds)
+        else:
+            await asyncio.sleep(self.min_seconds / time_scale)
+            phase = (0.0, self.min_seconds)
+            if not self._complete.is_set():
+                phase = (self.min_seconds, target)
+                if not await self._wait_complete((target - self.min_seconds) / time_scale) \
+                        and allow_extension and self.max_seconds > target:
+                    extended = True
+                    phase = (target, self.max_seconds)
+                    await self._wait_complete((self.max_seconds - target) / time_scale)
+            reason = END_COMPLETE if self._complete.is_set() else END_TIMEOUT
+        phase_start, phase_end = phase
+        completion = None
+        if self._completed_at is not None:
+            completion = min(phase_end, max(phase_start, (self._completed_at - self._start) * time_scale))
+        if self.adaptive and completion is not None:
+            # Vollständig: das Fenster endet mit dem letzten erwarteten Gerät, frühestens nach min_seconds
+            seconds = max(self.min_seconds, completion)
+        else:
+            seconds = phase_end
+        if self.adaptive:
+            self._history.append(completion)
+        return {
+            "mode": self.mode,
+            "seconds": seconds,
+            "target_seconds": target,
+            "saved_seconds": self.base_seconds - seconds if self.adaptive else 0.0,
+            "reason": reason,
+            "extended": extended,
+            "completion_seconds": completion,
+            "missing": len(self._missing),
+        }
+
+    # --- Statistik ---
+    def record_cycle(self, window, cycle_seconds, granted_seconds=0.0):
+        """Verbucht ein Fenster mit der Dauer des ganzen Durchlaufs (für den Duty-Cycle)."""
+        totals = self._totals
+        totals["cycles"] += 1
+        totals["window_seconds"] += window["seconds"]
+        totals["saved_seconds"] += window["saved_seconds"]
+        totals["cycle_seconds"] += cycle_seconds
+        totals["completed"] += window["reason"] == END_COMPLETE
+        totals["extended"] += window["extended"]
+        totals["granted_seconds"] += granted_seconds
+
+    def summary(self, reset=True):
+        """Kennzahlen seit der letzten Zusammenfassung."""
+        totals = self._totals
+        cycles = totals["cycles"]
+        summary = dict(totals)
+        summary["mode"] = self.mode
+        summary["target_seconds"] = self.target_seconds()
+        summary["average_window_seconds"] = totals["window_seconds"] / cycles if cycles else None
+        summary["duty_cycle"] = totals["window_seconds"] / totals["cycle_seconds"] if totals["cycle_seconds"] else None
+        if reset:
+            self._totals = self._empty_totals()
+        return summary
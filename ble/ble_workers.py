@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Mehrprozess-Betrieb für den Scan-Daemon ([Scan] process_mode = multi)
+Der Daemon (Scanner) schreibt Erkennungen in einen Shared-Memory-Ringpuffer,
+eigene Prozesse übernehmen das Versenden (UDP/MQTT) und das Speichern des
+Präsenz-Zustands. Ein langsamer Broker oder volle Festplatte bremst so nicht
+mehr die Verarbeitung der Advertisements.
+"""
+
+import os
+import json
+import time
+import signal
+import multiprocessing
+from ble_logger import get_logger
+from ble_ring import DetectionRing, DEFAULT_RING_CAPACITY, KIND_ONLINE, FLAG_PUBLISH
+
+logger = get_logger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PRESENCE_STATUS_FILE = os.path.join(BASE_DIR, "presence_status.json")
+
+# --- Prozess-Modi ([Scan] process_mode) ---
+PROCESS_MODE_SINGLE = "single" # Scannen und Versenden im Daemon-Prozess (bisheriges Verhalten)
+PROCESS_MODE_MULTI = "multi"   # Scanner + Publisher- und Persistenz-Worker über Ringpuffer
+PROCESS_MODES = (PROCESS_MODE_SINGLE, PROCESS_MODE_MULTI)
+
+# --- Worker-Rollen (Index = Lesezeiger im Ringpuffer) ---
+WORKER_PUBLISHER = "publisher"
+WORKER_PERSISTENCE = "persistence"
+WORKER_ROLES = (WORKER_PUBLISHER, WORKER_PERSISTENCE)
+
+POLL_INTERVAL_SECONDS = 0.02
+RELOAD_INTERVAL_SECONDS = 2     # Config/Geräteliste im Publisher prüfen (nur stat)
+MQTT_CHECK_INTERVAL_SECONDS = 300
+PERSIST_INTERVAL_SECONDS = 5
+SHUTDOWN_TIMEOUT_SECONDS = 5
+
+
+class WorkerPool:
+    """Besitzt den Ringpuffer und die Worker-Prozesse (läuft im Daemon)."""
+
+    def __init__(self, capacity=DEFAULT_RING_CAPACITY):
+        self.capacity = capacity
+        self.ring = None
+        self._context = multiprocessing.get_context("spawn")
+        self._processes = {}    # { Consumer-Index: (Rolle, Process) }
+        self._reported_overflows = [0] * len(WORKER_ROLES)
+        self._last_written = 0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(max(64, config.getint('Scan', 'ring_capacity', fallback=DEFAULT_RING_CAPACITY)))
+
+    def start(self):
+        self.ring = DetectionRing.create(self.capacity, consumers=len(WORKER_ROLES))
+        for index, role in enumerate(WORKER_ROLES):
+            self._spawn(index, role)
+        logger.info("Mehrprozess-Betrieb gestartet: Ringpuffer %s (%d Einträge), Worker: %s",
+                    self.ring.name, self.capacity, ", ".join(WORKER_ROLES))
+
+    def _spawn(self, index, role):
+        # spawn statt fork: der Daemon hat laufende Threads (paho) und eine D-Bus-Verbindung
+        process = self._context.Process(
+            target=run_worker, args=(role, self.ring.name, index), name=f"ble-{role}", daemon=True
+        )
+        process.start()
+        self._processes[index] = (role, process)
+
+    def write(self, kind, address, rssi, name=None, flags=0):
+        self.ring.write(kind, address, rssi, name, flags)
+
+    def stats(self):
+        workers = {}
+        for index, (role, process) in self._processes.items():
+            _, overflows = self.ring.consumer_state(index)
+            workers[role] = {"alive": process.is_alive(), "lag": self.ring.lag(index), "overflows": overflows}
+        return {"written": self.ring.written(), "workers": workers}
+
+    def check(self):
+        """Startet beendete Worker neu und protokolliert Rückstand und Überläufe (einmal pro Durchlauf)."""
+        for index, (role, process) in list(self._processes.items()):
+            if not process.is_alive():
+                logger.error("Worker '%s' unerwartet beendet (Exitcode %s). Starte neu.", role, process.exitcode)
+                self._spawn(index, role)
+
+        stats = self.stats()
+        written = stats["written"] - self._last_written
+        self._last_written = stats["written"]
+        for index, role in enumerate(WORKER_ROLES):
+            worker = stats["workers"][role]
+            new_overflows = worker["overflows"] - self._reported_overflows[index]
+            if new_overflows:
+                self._reported_overflows[index] = worker["overflows"]
+                logger.warning("Worker '%s' zu langsam: %d Erkennungen verloren (insgesamt %d, Rückstand %d).",
+                               role, new_overflows, worker["overflows"], worker["lag"])
+        logger.debug("Ringpuffer: %d neue Erkennungen, Rückstand %s", written,
+                     {role: worker["lag"] for role, worker in stats["workers"].items()})
+        return stats
+
+    def stop(self, timeout=SHUTDOWN_TIMEOUT_SECONDS):
+        """Signalisiert das Ende, lässt die Worker den Puffer leeren und gibt den Shared Memory frei."""
+        if self.ring is None:
+            return
+        self.ring.request_shutdown()
+        deadline = time.monotonic() + timeout
+        for role, process in self._processes.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logger.warning("Worker '%s' reagiert nicht. Beende ihn.", role)
+                process.terminate()
+                process.join(1)
+        stats = self.stats()
+        logger.info("Mehrprozess-Betrieb beendet: %d Erkennungen, Überläufe %s", stats["written"],
+                    {role: worker["overflows"] for role, worker in stats["workers"].items()})
+        self._processes = {}
+        self.ring.close()
+        self.ring = None
+
+
+# --- Worker-Prozesse ---
+class PublisherWorker:
+    """Versendet die vom Scanner markierten Online-/Offline-Meldungen per UDP/MQTT."""
+
+    def __init__(self):
+        # Import hier: ble_tool importiert dieses Modul
+        import ble_tool
+        self._tool = ble_tool
+        self.config = ble_tool.load_config()
+        self.config_mtime = self._config_mtime()
+        self.known_devices = ble_tool.load_known_devices()
+        self.mqtt_client = ble_tool.setup_mqtt_client(self.config)
+        self.battery_mtime = None
+        self.battery_percent = {}
+        self._last_reload = time.monotonic()
+        self._last_mqtt_check = time.monotonic()
+
+    def _config_mtime(self):
+        try:
+            return os.stat(self._tool.CONFIG_FILE).st_mtime_ns
+        except OSError:
+            return None
+
+    def _refresh_battery_status(self):
+        """Liest battery_status.json nur, wenn der Batterie-Job sie geändert hat."""
+        try:
+            mtime = os.stat(self._tool.BATTERY_STATUS_FILE).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self.battery_mtime:
+            return
+        try:
+            with open(self._tool.BATTERY_STATUS_FILE, "r") as f:
+                all_status_data = json.load(f)
+            self.battery_percent = {mac: data.get('battery_percent', -1) for mac, data in all_status_data.items()}
+            self.battery_mtime = mtime
+        except Exception as e:
+            logger.warning("Konnte %s nicht lesen: %s", self._tool.BATTERY_STATUS_FILE, e)
+
+    def handle(self, records):
+        base_topic = self.config.get('MQTT', 'scan_topic', fallback='ble/scan/discovery')
+        self._refresh_battery_status()
+        for record in records:
+            if not record.flags & FLAG_PUBLISH:
+                continue
+            alias = self.known_devices.alias(record.address)
+            if record.kind == KIND_ONLINE:
+                data = {
+                    "hostname": self._tool.SYSTEM_HOSTNAME,
+                    "address": record.address,
+                    "is_online": 1,
+                    "last_battery_percent": self.battery_percent.get(record.address, -1),
+                    "name": record.name or "Unknown",
+                    "alias": alias,
+                    "rssi": record.rssi,
+                    "timestamp": int(record.timestamp)
+                }
+            else:
+                data = {
+                    "hostname": self._tool.SYSTEM_HOSTNAME,
+                    "address": record.address,
+                    "is_online": 0,
+                    "name": "N/A (Offline)",
+                    "alias": alias,
+                    "rssi": -100,
+                    "timestamp": int(record.timestamp)
+                }
+            data_payload = json.dumps(data)
+            full_topic = f"{base_topic}/{record.address.replace(':', '')}"
+            self._tool.send_udp(data_payload, self.config)
+            self._tool.send_mqtt(data_payload, full_topic, self.config, self.mqtt_client)
+
+    def idle(self):
+        now = time.monotonic()
+        if now - self._last_reload >= RELOAD_INTERVAL_SECONDS:
+            self._last_reload = now
+            self.known_devices.reload()
+            config_mtime = self._config_mtime()
+            if config_mtime != self.config_mtime:
+                logger.info("[Publisher] config.ini geändert. Lade neu und verbinde MQTT neu.")
+                self.config_mtime = config_mtime
+                self.config = self._tool.load_config()
+                self._tool.disconnect_mqtt(self.mqtt_client)
+                self.mqtt_client = self._tool.setup_mqtt_client(self.config)
+                self._last_mqtt_check = now
+        if now - self._last_mqtt_check >= MQTT_CHECK_INTERVAL_SECONDS:
+            self._last_mqtt_check = now
+            if self.mqtt_client is None or not self.mqtt_client.is_connected():
+                logger.warning("[Publisher] MQTT-Verbindung verloren oder noch nicht vorhanden. Versuche Reconnect")
+                self._tool.disconnect_mqtt(self.mqtt_client)
+                self.mqtt_client = self._tool.setup_mqtt_client(self.config)
+
+    def close(self):
+        self._tool.disconnect_mqtt(self.mqtt_client)
+
+
+class PersistenceWorker:
+    """Hält den letzten Präsenz-Zustand aller Geräte in presence_status.json aktuell."""
+
+    def __init__(self, status_file=PRESENCE_STATUS_FILE):
+        self.status_file = status_file
+        self.state = {}
+        self.dirty = False
+        self._last_flush = time.monotonic()
+        try:
+            if os.path.exists(self.status_file):
+                with open(self.status_file, "r") as f:
+                    self.state = json.load(f)
+        except Exception as e:
+            logger.warning("Konnte %s nicht lesen: %s", self.status_file, e)
+
+    def handle(self, records):
+        for record in records:
+            device = self.state.setdefault(record.address, {})
+            if record.kind == KIND_ONLINE:
+                device.update(is_online=1, rssi=record.rssi, last_seen=int(record.timestamp))
+                if record.name:
+                    device["name"] = record.name
+            else:
+                device["is_online"] = 0
+            device["timestamp"] = int(record.timestamp)
+        self.dirty = True
+
+    def idle(self):
+        if self.dirty and time.monotonic() - self._last_flush >= PERSIST_INTERVAL_SECONDS:
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self.dirty:
+            return
+        tmp_file = self.status_file + ".tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump(self.state, f, indent=4)
+            os.replace(tmp_file, self.status_file)
+            self.dirty = False
+        except Exception as e:
+            logger.error("Fehler beim Schreiben von %s: %s", self.status_file, e)
+
+    def close(self):
+        self.flush()
+
+
+def run_worker(role, ring_name, consumer):
+    """Einstiegspunkt eines Worker-Prozesses: liest bis zum Shutdown und leert danach den Puffer."""
+    stop_requested = []
+    # Strg+C trifft die ganze Prozessgruppe: nur der Daemon reagiert und beendet die Worker geordnet
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # systemd schickt SIGTERM an alle Prozesse der Unit: Puffer noch leeren, dann beenden
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_requested.append(signum))
+
+    ring = DetectionRing.attach(ring_name)
+    handler = PublisherWorker() if role == WORKER_PUBLISHER else PersistenceWorker()
+    logger.info("Worker '%s' gestartet (PID: %d)", role, os.getpid())
+    try:
+        while True:
+            records = ring.read(consumer)
+            if records:
+                handler.handle(records)
+                continue
+            if stop_requested or ring.shutdown_requested():
+                break
+            handler.idle()
+            time.sleep(POLL_INTERVAL_SECONDS)
+    finally:
+        handler.close()
+        ring.close()
+        logger.info("Worker '%s' beendet.", role)
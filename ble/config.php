@@ -14,6 +14,11 @@ $tooltips = [
         'battery_retry_delay' => 'Zeit in Sekunden, die das Skript zwischen den Wiederholungsversuchen wartet.',
         'battery_connect_timeout' => 'Maximale Zeit in Sekunden, die das Skript auf eine Verbindung wartet (Standard: 10).',
         'battery_post_connect_delay' => 'Künstliche Pause (in Sekunden) NACH der Verbindung, aber VOR dem Auslesen. Wichtig für "träge" Geräte (Standard: 1).',
+        'read_profile' => 'Zusätzlich zur Batterie in derselben Verbindung gelesene Characteristics (kommagetrennt): firmware, hardware, software, manufacturer, model, temperature. Pro Gerät überschreibbar in device_options.ini',
+        'static_info_refresh_days' => 'Nach wie vielen Tagen statische Infos (Name, Firmware, ...) erneut vom Gerät gelesen werden (Standard: 30).',
+        'breaker_threshold' => 'Nach wie vielen fehlgeschlagenen Batterie-Scans in Folge ein Gerät im nächtlichen Scan übersprungen wird (Standard: 3).',
+        'breaker_backoff_hours' => 'Erste Pause (in Stunden) für übersprungene Geräte. Verdoppelt sich bei jedem weiteren Fehlschlag (Standard: 24).',
+        'breaker_max_backoff_hours' => 'Maximale Pause (in Stunden) für übersprungene Geräte (Standard: 336 = 14 Tage).',
     ],
     'UDP' => [
         'enabled' => 'Schaltet den UDP-Versand global an (true) oder aus (false).',
@@ -29,6 +34,36 @@ $tooltips = [
         'username' => '(Optional) Benutzername für die MQTT-Broker-Anmeldung.',
         'password' => '(Optional) Passwort für die MQTT-Broker-Anmeldung.',
     ],
+    'Scan' => [
+        'filter_mode' => 'Scan-Filter: active (alle Advertisements, Standard), filtered (bluetoothd verwirft Advertisements unter rssi_threshold), passive (Advertisement-Monitor mit den Company-IDs der bekannten Geräte laut Discover und manufacturer_patterns; fehlen einem bekannten Gerät Herstellerdaten, wird filtered verwendet)',
+        'rssi_threshold' => '(Nur für filtered) Schwächere Advertisements verwirft bluetoothd (Standard: -90 dBm). Zu hoch gewählt gelten weit entfernte bekannte Geräte als offline.',
+        'manufacturer_patterns' => '(Nur für passive, optional) Zusätzliche kommagetrennte Hersteller-Patterns: Company-ID in Hex, optional mit Datenpräfix, z.B. 004C:0215, 0059',
+        'publish_policy' => 'Standard-Meldeverhalten: always (jeder Scan meldet Online/Offline), changes (nur Zustandswechsel), online (keine Offline-Berichte), never. Pro Gerät überschreibbar in device_options.ini',
+        'process_mode' => 'single (Standard): Scannen und Senden in einem Prozess. multi: Scanner, MQTT/UDP-Versand und Speicherung (presence_status.json) laufen in getrennten Prozessen, ein langsamer Broker bremst den Scan nicht mehr.',
+        'ring_capacity' => '(Nur für multi) Anzahl der Erkennungen, die zwischen Scanner und Worker-Prozessen gepuffert werden (Standard: 4096). Wirksam nach Neustart des Dienstes.',
+        'window_mode' => 'fixed (Standard): jedes Scan-Fenster dauert 10s. adaptive: das Fenster endet, sobald alle erwarteten Geräte gesehen wurden, und wird verlängert, wenn welche fehlen. Eingesparte Zeit erhält ein wartender Batterie-Job.',
+        'min_window_seconds' => '(Nur für adaptive) Mindestlänge eines Scan-Fensters in Sekunden (Standard: 3). Bestimmt, wie schnell zurückkehrende Geräte erkannt werden.',
+        'max_window_seconds' => '(Nur für adaptive) Höchstlänge eines verlängerten Scan-Fensters in Sekunden (Standard: 20). Batterie-Scan und Discover warten entsprechend länger, bevor sie die Pause-Datei des Dienstes als veraltet löschen.',
+    ],
+    'Presence' => [
+        'departure_mode' => 'window (Standard): offline, sobald ein Gerät in einem Scan-Fenster nicht gesehen wurde. learned: offline erst, wenn nach dem gelernten Sichtungs-Intervall des Geräts (Anteil der Fenster, in denen es gesehen wird) missed_advertisements erwartete Sichtungen ausgeblieben sind.',
+        'missed_advertisements' => '(Nur für learned) Anzahl ausgebliebener erwarteter Sichtungen bis offline (Standard: 3). Ein im aktuellen Fenster gesehenes Gerät ist nie offline.',
+        'confidence' => '(Nur für learned) Quantil des gelernten Sichtungs-Intervalls, 0.5 - 0.999 (Standard: 0.95). Höher = weniger falsche Offline-Meldungen, dafür später offline.',
+        'min_samples' => '(Nur für learned) Mindestanzahl beobachteter Scan-Fenster, bevor das gelernte Intervall verwendet wird. Bis dahin gilt window (Standard: 5).',
+        'max_departure_seconds' => '(Nur für learned) Obergrenze in Sekunden Scan-Zeit bis offline, auch für sehr selten sendende Geräte (Standard: 120).',
+        'false_offline_seconds' => 'Wird ein Gerät innerhalb dieser Sekunden nach einer Offline-Meldung wieder gesehen, zählt das als falscher Offline-Wechsel (Statistik, Standard: 60).',
+    ],
+    'Trace' => [
+        'enabled' => 'Zeichnet die Phasen jedes Scan-Durchlaufs als Chrome-Trace auf (/var/log/ble/ble_trace_*.json, öffnen in chrome://tracing oder ui.perfetto.dev). Zur Laufzeit auch per "kill -USR1 <PID>" umschaltbar.',
+        'max_cycles' => 'Anzahl der letzten Durchläufe, die in der Trace-Datei behalten werden (Standard: 20).',
+    ],
+    'Live' => [
+        'enabled' => 'Live-Updates (Online/Offline, RSSI, Batterie) für die Geräteseite. Der Scan-Dienst stellt dafür einen Stream auf localhost bereit (Standard: aus). Jeder geöffnete Browser belegt einen PHP-Prozess.',
+        'host' => 'Adresse, auf der der Scan-Dienst den Live-Stream anbietet und unter der live.php ihn abruft (Standard: 127.0.0.1, nur von diesem Gerät aus erreichbar).',
+        'port' => 'Lokaler Port des Live-Streams (Standard: 8765).',
+        'max_clients' => 'Maximale Anzahl gleichzeitig verbundener Browser. Gilt für den Scan-Dienst und für live.php, weitere Browser erhalten einen Fehler und versuchen es später erneut (Standard: 50). Sollte unter MaxRequestWorkers von Apache liegen.',
+        'client_buffer' => 'Maximale Anzahl gepufferter Änderungen pro Browser. Läuft der Puffer über, erhält der Browser einen neuen Gesamtstand (Standard: 100).',
+    ],
     'discover' => [
         'timeout' => 'Dauer des "Discover"-Scans in Sekunden (der Scan, der alle Geräte findet).'
     ],
@@ -51,6 +86,11 @@ $tooltips = [
 // --- NEU: Log-Level-Optionen ---
 $log_level_options = ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'];
 $mode_options = ['standalone', 'master', 'client'];
+$filter_mode_options = ['active', 'filtered', 'passive'];
+$publish_policy_options = ['always', 'changes', 'online', 'never'];
+$process_mode_options = ['single', 'multi'];
+$departure_mode_options = ['window', 'learned'];
+$window_mode_options = ['fixed', 'adaptive'];
 
 // --- HELFER-FUNKTION ---
 function write_ini_file($file, $array) {
@@ -219,6 +259,56 @@ foreach ($tooltips as $section => $keys) {
                 $default = 'standalone';
             } elseif ($key === 'fallback_poll_interval') {
                 $default = '1800';
+            } elseif ($key === 'filter_mode') {
+                $default = 'active';
+            } elseif ($key === 'rssi_threshold') {
+                $default = '-90';
+            } elseif ($key === 'manufacturer_patterns') {
+                $default = '';
+            } elseif ($key === 'publish_policy') {
+                $default = 'always';
+            } elseif ($key === 'process_mode') {
+                $default = 'single';
+            } elseif ($key === 'ring_capacity') {
+                $default = '4096';
+            } elseif ($key === 'window_mode') {
+                $default = 'fixed';
+            } elseif ($key === 'min_window_seconds') {
+                $default = '3';
+            } elseif ($key === 'max_window_seconds') {
+                $default = '20';
+            } elseif ($key === 'departure_mode') {
+                $default = 'window';
+            } elseif ($key === 'missed_advertisements') {
+                $default = '3';
+            } elseif ($key === 'confidence') {
+                $default = '0.95';
+            } elseif ($key === 'min_samples') {
+                $default = '5';
+            } elseif ($key === 'max_departure_seconds') {
+                $default = '120';
+            } elseif ($key === 'false_offline_seconds') {
+                $default = '60';
+            } elseif ($key === 'read_profile') {
+                $default = 'battery';
+            } elseif ($key === 'static_info_refresh_days') {
+                $default = '30';
+            } elseif ($key === 'breaker_threshold') {
+                $default = '3';
+            } elseif ($key === 'breaker_backoff_hours') {
+                $default = '24';
+            } elseif ($key === 'breaker_max_backoff_hours') {
+                $default = '336';
+            } elseif ($key === 'max_cycles') {
+                $default = '20';
+            } elseif ($key === 'host' && $section === 'Live') {
+                $default = '127.0.0.1';
+            } elseif ($key === 'port' && $section === 'Live') {
+                $default = '8765';
+            } elseif ($key === 'max_clients') {
+                $default = '50';
+            } elseif ($key === 'client_buffer') {
+                $default = '100';
             } else {
                 $default = '0';
             }
@@ -387,6 +477,56 @@ if (!preg_match('/^([0-1][0-9]|2[0-3]):[0-5][0-9]$/', $cron_time_hhmm)) {
                                     <?php endforeach; ?>
                                 </select>
                             
+                            <?php elseif ($key === 'filter_mode'): ?>
+                                <!-- Dropdown für Scan-Filter -->
+                                <select id="<?php echo $key; ?>" name="config[<?php echo $section_name; ?>][<?php echo $key; ?>]">
+                                    <?php foreach ($filter_mode_options as $filter_mode): ?>
+                                        <option value="<?php echo $filter_mode; ?>" <?php echo (strtolower($value) === $filter_mode) ? 'selected' : ''; ?>>
+                                            <?php echo $filter_mode; ?>
+                                        </option>
+                                    <?php endforeach; ?>
+                                </select>
+                            
+                            <?php elseif ($key === 'publish_policy'): ?>
+                                <!-- Dropdown für Publish-Policy -->
+                                <select id="<?php echo $key; ?>" name="config[<?php echo $section_name; ?>][<?php echo $key; ?>]">
+                                    <?php foreach ($publish_policy_options as $policy): ?>
+                                        <option value="<?php echo $policy; ?>" <?php echo (strtolower($value) === $policy) ? 'selected' : ''; ?>>
+                                            <?php echo $policy; ?>
+                                        </option>
+                                    <?php endforeach; ?>
+                                </select>
+                            
+                            <?php elseif ($key === 'process_mode'): ?>
+                                <!-- Dropdown für Prozess-Modus -->
+                                <select id="<?php echo $key; ?>" name="config[<?php echo $section_name; ?>][<?php echo $key; ?>]">
+                                    <?php foreach ($process_mode_options as $process_mode): ?>
+                                        <option value="<?php echo $process_mode; ?>" <?php echo (strtolower($value) === $process_mode) ? 'selected' : ''; ?>>
+                                            <?php echo $process_mode; ?>
+                                        </option>
+                                    <?php endforeach; ?>
+                                </select>
+                            
+                            <?php elseif ($key === 'window_mode'): ?>
+                                <!-- Dropdown für Scan-Fenster-Modus -->
+                                <select id="<?php echo $key; ?>" name="config[<?php echo $section_name; ?>][<?php echo $key; ?>]">
+                                    <?php foreach ($window_mode_options as $window_mode): ?>
+                                        <option value="<?php echo $window_mode; ?>" <?php echo (strtolower($value) === $window_mode) ? 'selected' : ''; ?>>
+                                            <?php echo $window_mode; ?>
+                                        </option>
+                                    <?php endforeach; ?>
+                                </select>
+                            
+                            <?php elseif ($key === 'departure_mode'): ?>
+                                <!-- Dropdown für Abwesenheits-Modus -->
+                                <select id="<?php echo $key; ?>" name="config[<?php echo $section_name; ?>][<?php echo $key; ?>]">
+                                    <?php foreach ($departure_mode_options as $departure_mode): ?>
+                                        <option value="<?php echo $departure_mode; ?>" <?php echo (strtolower($value) === $departure_mode) ? 'selected' : ''; ?>>
+                                            <?php echo $departure_mode; ?>
+                                        </option>
+                                    <?php endforeach; ?>
+                                </select>
+                            
                             <?php elseif (in_array($key, ['log_level', 'console_level', 'bleak_level'])): ?>
                                 <!-- Dropdown für Log-Level -->
                                 <select id="<?php echo $key; ?>" name="config[<?php echo $section_name; ?>][<?php echo $key; ?>]">
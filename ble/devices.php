@@ -12,6 +12,7 @@ $WEBHOOK_LOG_FILE = '/var/log/ble/webhook.log';
 
 $config = parse_ini_file($INI_FILE, true, INI_SCANNER_RAW);
 $current_mode = $config['MasterClient']['mode'] ?? 'standalone';
+$live_enabled = in_array(strtolower($config['Live']['enabled'] ?? 'false'), ['1', 'true', 'yes', 'on']);
 $is_client_mode = ($current_mode === 'client');
 $is_master_mode = ($current_mode === 'master');
 
@@ -237,6 +238,14 @@ if ($_SERVER['REQUEST_METHOD'] === 'POST' && !$is_client_mode) {
 
 // --- AKTION: DISCOVER SCAN STARTEN (via GET-Parameter) - NUR WENN NICHT CLIENT-MODUS ---
 $discover_results = null;
+$address_type_labels = [
+    'public' => 'Öffentlich',
+    'random_static' => 'Zufällig (statisch)',
+    'rpa' => 'Privat (RPA, wechselnd)',
+    'non_resolvable' => 'Privat (nicht auflösbar)',
+    'random_reserved' => 'Zufällig (reserviert)',
+    'unknown' => '-'
+];
 if (isset($_GET['action']) && $_GET['action'] === 'discover' && !$is_client_mode) {
     $discover_timeout = $config['discover']['timeout'] ?? 10;
     BLELogger::info("User triggered discover scan", ['timeout' => $discover_timeout, 'user_ip' => $_SERVER['REMOTE_ADDR']]);
@@ -324,6 +333,15 @@ $last_scan_file_content = file_exists($LAST_BATTERY_SCAN_FILE) ? trim(file_get_c
             font-family: monospace;
             font-size: 0.85rem;
         }
+        .live-presence {
+            color: #ccc;
+        }
+        .live-presence.online {
+            color: green;
+        }
+        .live-presence.offline {
+            color: red;
+        }
         .known-device-battery-info {
             padding: 5px;
             text-align: center;
@@ -473,9 +491,9 @@ $last_scan_file_content = file_exists($LAST_BATTERY_SCAN_FILE) ? trim(file_get_c
                             $status_color = '#ccc'; 
                         }
                     ?>
-                    <article class="known-device-row" id="<?php echo $row_anchor_id; ?>"> 
+                    <article class="known-device-row" id="<?php echo $row_anchor_id; ?>" data-battery="<?php echo $battery_scan_enabled ? '1' : '0'; ?>"> 
                         
-                        <span class="known-device-mac"><?php echo htmlspecialchars($mac); ?></span>
+                        <span class="known-device-mac"><span class="live-presence" title="Presence unbekannt">●</span> <?php echo htmlspecialchars($mac); ?></span>
                         
                         <div class="known-device-battery-info" style="border-left: 3px solid <?php echo $status_color; ?>;">
                             <strong><?php echo htmlspecialchars($battery_perc); ?><?php echo is_numeric($battery_perc) ? '%' : ''; ?></strong>
@@ -570,6 +588,8 @@ $last_scan_file_content = file_exists($LAST_BATTERY_SCAN_FILE) ? trim(file_get_c
                                         <th scope="col">MAC-Adresse</th>
                                         <th scope="col">Name (vom Gerät)</th>
                                         <th scope="col">RSSI</th>
+                                        <th scope="col">Hersteller</th>
+                                        <th scope="col">Adresstyp</th>
                                         <th scope="col">Wunschname (Alias)</th>
                                     </tr>
                                 </thead>
@@ -584,6 +604,14 @@ $last_scan_file_content = file_exists($LAST_BATTERY_SCAN_FILE) ? trim(file_get_c
                                         <td><code><?php echo htmlspecialchars($mac); ?></code></td>
                                         <td><?php echo htmlspecialchars($dev['name']); ?></td>
                                         <td><?php echo htmlspecialchars($dev['rssi']); ?></td>
+                                        <?php
+                                            // Hersteller laut OUI, sonst laut Company-ID aus den Manufacturer Data
+                                            $vendor = $dev['vendor'] ?? null;
+                                            $company = $dev['company'] ?? ($dev['company_id'] ?? null);
+                                            $vendor_title = trim(($vendor ? 'OUI: ' . $vendor : '') . ' ' . (!empty($dev['company_id']) ? 'Company-ID ' . $dev['company_id'] . ($dev['company'] ? ': ' . $dev['company'] : '') : ''));
+                                        ?>
+                                        <td title="<?php echo htmlspecialchars($vendor_title); ?>"><?php echo htmlspecialchars($vendor ?: ($company ?: '-')); ?></td>
+                                        <td><?php echo htmlspecialchars($address_type_labels[$dev['address_type'] ?? 'unknown'] ?? $dev['address_type']); ?></td>
                                         <td>
                                             <?php if ($is_known): ?>
                                                 <em>(Bereits bekannt)</em>
@@ -616,6 +644,57 @@ $last_scan_file_content = file_exists($LAST_BATTERY_SCAN_FILE) ? trim(file_get_c
                 checkboxes[i].checked = source.checked;
             }
         }
+
+        // --- Live-Updates vom Scan-Daemon (live.php) ---
+        function applyLiveState(address, state) {
+            let row = document.getElementById('device-' + address.replace(/:/g, ''));
+            if (!row) return;
+
+            if ('is_online' in state) {
+                let dot = row.querySelector('.live-presence');
+                dot.classList.toggle('online', state.is_online === 1);
+                dot.classList.toggle('offline', state.is_online === 0);
+            }
+            if ('rssi' in state || 'is_online' in state) {
+                let dot = row.querySelector('.live-presence');
+                let rssi = state.rssi !== undefined ? state.rssi : dot.dataset.rssi;
+                if (state.rssi !== undefined) dot.dataset.rssi = state.rssi;
+                dot.title = (dot.classList.contains('online') ? 'Online' : 'Offline') + (rssi !== undefined ? ' (RSSI ' + rssi + ' dBm)' : '');
+            }
+            if ('battery_percent' in state && row.dataset.battery === '1') {
+                let info = row.querySelector('.known-device-battery-info');
+                let online = state.battery_status !== 'offline' && state.battery_percent >= 0;
+                info.querySelector('strong').textContent = online ? state.battery_percent + '%' : 'N/A';
+                if (state.battery_timestamp) {
+                    let d = new Date(state.battery_timestamp * 1000);
+                    let pad = n => String(n).padStart(2, '0');
+                    info.querySelector('small').textContent = pad(d.getDate()) + '.' + pad(d.getMonth() + 1) + ' ' + pad(d.getHours()) + ':' + pad(d.getMinutes());
+                }
+                let color = !online ? 'red' : (state.battery_percent > 70 ? 'green' : (state.battery_percent > 30 ? 'orange' : 'red'));
+                info.style.borderLeft = '3px solid ' + color;
+            }
+        }
+
+        if (<?php echo $live_enabled ? 'true' : 'false'; ?> && window.EventSource && document.getElementById('known-devices')) {
+            function connectLive() {
+                let live = new EventSource('live.php');
+                live.addEventListener('snapshot', function (e) {
+                    let devices = JSON.parse(e.data).devices;
+                    for (let address in devices) applyLiveState(address, devices[address]);
+                });
+                live.addEventListener('delta', function (e) {
+                    let delta = JSON.parse(e.data);
+                    applyLiveState(delta.address, delta);
+                });
+                live.onerror = function () {
+                    // Bei Fehlerantwort (z.B. 503, alle Plätze belegt) verbindet der Browser nicht selbst neu
+                    if (live.readyState === EventSource.CLOSED) {
+                        setTimeout(connectLive, 30000);
+                    }
+                };
+            }
+            connectLive();
+        }
     </script>
 </body>
 </html>
\ No newline at end of file
@@ -0,0 +1,83 @@
+<?php
+// Reicht den Live-Stream des Scan-Daemons (nur auf localhost erreichbar)
+// als Server-Sent-Events an den Browser weiter.
+// Jeder verbundene Browser belegt dauerhaft einen PHP-Prozess, daher sind
+// höchstens [Live] max_clients Verbindungen gleichzeitig erlaubt.
+$INI_FILE = '/var/www/html/ble/config.ini';
+$SLOT_DIR = sys_get_temp_dir();
+
+$config = @parse_ini_file($INI_FILE, true, INI_SCANNER_RAW) ?: [];
+$live_host = $config['Live']['host'] ?? '127.0.0.1';
+$live_port = (int)($config['Live']['port'] ?? 8765);
+$max_clients = max(1, (int)($config['Live']['max_clients'] ?? 50));
+
+// Freien Platz per flock belegen. Die Sperre hält bis zum Ende des Prozesses,
+// auch wenn er abbricht, und wird dann vom System freigegeben.
+$slot = null;
+for ($i = 0; $i < $max_clients; $i++) {
+    $fh = @fopen("$SLOT_DIR/ble_live_slot_$i.lock", 'c');
+    if ($fh && flock($fh, LOCK_EX | LOCK_NB)) {
+        $slot = $fh;
+        break;
+    }
+    if ($fh) {
+        fclose($fh);
+    }
+}
+if ($slot === null) {
+    http_response_code(503);
+    header('Content-Type: text/plain');
+    header('Retry-After: 30');
+    echo "Zu viele Live-Verbindungen (max. $max_clients)";
+    exit;
+}
+
+set_time_limit(0);
+
+$fp = @fsockopen($live_host, $live_port, $errno, $errstr, 2);
+if (!$fp) {
+    http_response_code(503);
+    header('Content-Type: text/plain');
+    echo "Live-Stream nicht erreichbar ($errstr)";
+    exit;
+}
+
+fwrite($fp, "GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n");
+
+// Status-Zeile prüfen und Header des Daemons überspringen
+$status_line = fgets($fp);
+if ($status_line === false || strpos($status_line, ' 200 ') === false) {
+    fclose($fp);
+    http_response_code(503);
+    header('Content-Type: text/plain');
+    echo "Live-Stream nicht verfügbar";
+    exit;
+}
+while (($line = fgets($fp)) !== false && trim($line) !== '') {
+}
+
+header('Content-Type: text/event-stream');
+header('Cache-Control: no-cache');
+header('X-Accel-Buffering: no');
+while (ob_get_level() > 0) {
+    ob_end_flush();
+}
+
+// Browser soll nach Abbruch (z.B. Dienst-Neustart) nach 5s neu verbinden
+echo "retry: 5000\n\n";
+flush();
+
+while (!feof($fp) && !connection_aborted()) {
+    $line = fgets($fp);
+    if ($line === false) {
+        break;
+    }
+    echo $line;
+    // Ein Event endet mit einer Leerzeile
+    if ($line === "\n") {
+        flush();
+    }
+}
+fclose($fp);
+flock($slot, LOCK_UN);
+fclose($slot);
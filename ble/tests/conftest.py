@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Die Module in ble/ importieren sich gegenseitig ohne Paket-Präfix (wie im Dienst)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,81 @@
+import time
+import asyncio
+import subprocess
+
+import pytest
+
+from ble_capture import (CaptureRecord, CaptureWriter, ReplayAdvertisement, ReplayDevice, ReplayScanner,
+                         read_capture, split_windows)
+
+
+def _record(timestamp, address="AA:BB:CC:DD:EE:01"):
+    return CaptureRecord(timestamp, address, -60, "Test", {0x004C: b"\x02\x15"}, {"180f": b"\x50"}, ["180f"])
+
+
+def test_write_and_read_roundtrip(tmp_path):
+    path = str(tmp_path / "capture.blec")
+    original = _record(1000.25)
+    with CaptureWriter(path) as writer:
+        writer.write(ReplayDevice(original.address, None), ReplayAdvertisement(original), original.timestamp)
+    (record,) = read_capture(path)
+    assert record.timestamp == original.timestamp
+    assert record.address == original.address
+    assert record.rssi == -60
+    assert record.name == "Test"
+    assert record.manufacturer_data == {0x004C: b"\x02\x15"}
+    assert record.service_data == {"180f": b"\x50"}
+    assert record.service_uuids == ["180f"]
+
+
+def test_split_windows_returns_window_starts():
+    records = [_record(100.0), _record(101.0), _record(112.0), _record(135.5)]
+    windows = split_windows(records, 10)
+    assert [start for start, _ in windows] == [100.0, 110.0, 120.0, 130.0]
+    assert [[r.timestamp for r in recs] for _, recs in windows] == [[100.0, 101.0], [112.0], [], [135.5]]
+
+
+def test_replay_is_anchored_to_window_start():
+    # Ein Datensatz 2s nach Fensterbeginn darf nicht sofort beim Start zugestellt werden
+    delivered = []
+
+    async def run():
+        start = time.monotonic()
+        scanner = ReplayScanner([_record(112.0)], lambda device, adv: delivered.append(time.monotonic() - start),
+                                speed=20.0, start_ts=110.0)
+        await scanner.start()
+        await scanner.stop()
+
+    asyncio.run(run())
+    assert len(delivered) == 1
+    assert 0.09 <= delivered[0] < 0.5
+
+
+def test_record_stops_scan_service_for_whole_recording(tmp_path, monkeypatch):
+    pytest.importorskip("bleak")
+    pytest.importorskip("paho.mqtt.client")
+    import ble_tool
+
+    calls = []
+
+    def run(command, **kwargs):
+        calls.append(command[1])
+        return subprocess.CompletedProcess(command, 0)
+
+    class Scanner:
+        def __init__(self, detection_callback):
+            pass
+
+        async def start(self):
+            calls.append("scanner_start")
+
+        async def stop(self):
+            calls.append("scanner_stop")
+
+    async def wait_for_adapter():
+        calls.append("wait_for_adapter")
+
+    monkeypatch.setattr(ble_tool.subprocess, "run", run)
+    monkeypatch.setattr(ble_tool, "BleakScanner", Scanner)
+    monkeypatch.setattr(ble_tool, "wait_for_adapter", wait_for_adapter)
+    asyncio.run(ble_tool.record_advertisements(0, str(tmp_path / "capture.blec")))
+    assert calls == ["is-active", "stop", "wait_for_adapter", "scanner_start", "scanner_stop", "start"]
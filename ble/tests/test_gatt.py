@@ -0,0 +1,83 @@
+import json
+import asyncio
+
+import pytest
+
+from ble_gatt import CHARACTERISTICS, GattCache, parse_decoders, parse_read_profile, read_profile
+
+BATTERY = CHARACTERISTICS["battery"][0]
+FIRMWARE = CHARACTERISTICS["firmware"][0]
+
+
+class _Client:
+    """Ersatz für BleakClient: liest per UUID."""
+
+    def __init__(self, values):
+        self.values = values  # { UUID: bytes }
+        self.reads = []
+
+    async def read_gatt_char(self, uuid):
+        self.reads.append(uuid)
+        return self.values[uuid]
+
+
+def test_reads_by_uuid(tmp_path):
+    cache = GattCache(str(tmp_path / "gatt_cache.json"))
+    client = _Client({BATTERY: bytes([55])})
+
+    assert asyncio.run(read_profile(client, "AA:BB:CC:DD:EE:01", ["battery"], cache)) == {"battery": 55}
+    assert client.reads == [BATTERY]
+
+
+def test_device_name_is_not_read_over_gatt():
+    # BlueZ exportiert den GAP-Service nicht, der Name kommt aus dem Discover
+    assert parse_read_profile("device_name, firmware") == ["battery", "firmware"]
+
+
+def test_legacy_cache_entries_are_dropped(tmp_path):
+    cache_file = tmp_path / "gatt_cache.json"
+    cache_file.write_text(json.dumps({"AA:BB:CC:DD:EE:01": {
+        "static": {"device_name": {"value": None, "timestamp": 0}, "firmware": {"value": "1.0", "timestamp": 0}},
+        "handles": {BATTERY: 20},
+    }}))
+    cache = GattCache(str(cache_file))
+    cache.save()
+    assert json.loads(cache_file.read_text()) == {"AA:BB:CC:DD:EE:01": {"static": {"firmware": {"value": "1.0", "timestamp": 0}}}}
+
+
+def test_name_from_discover(tmp_path):
+    pytest.importorskip("bleak")
+    pytest.importorskip("paho.mqtt.client")
+    import ble_tool
+
+    results = tmp_path / "scan_results.json"
+    results.write_text(json.dumps({"devices": {"aa:bb:cc:dd:ee:01": {"name": "Tile"}, "AA:BB:CC:DD:EE:02": {"name": "Unknown"}}}))
+    assert ble_tool.discovered_name("AA:BB:CC:DD:EE:01", str(results)) == "Tile"
+    assert ble_tool.discovered_name("AA:BB:CC:DD:EE:02", str(results)) is None
+    assert ble_tool.discovered_name("AA:BB:CC:DD:EE:01", str(tmp_path / "missing.json")) is None
+
+
+def test_static_values_come_from_cache(tmp_path):
+    cache = GattCache(str(tmp_path / "gatt_cache.json"))
+    mac = "AA:BB:CC:DD:EE:01"
+    client = _Client({BATTERY: bytes([40]), FIRMWARE: b"1.2\x00"})
+    profile = parse_read_profile("firmware")
+
+    assert asyncio.run(read_profile(client, mac, profile, cache)) == {"battery": 40, "firmware": "1.2"}
+    client.reads.clear()
+    assert asyncio.run(read_profile(client, mac, profile, cache)) == {"battery": 40, "firmware": "1.2"}
+    assert client.reads == [BATTERY]
+
+
+def test_parse_decoders():
+    assert parse_decoders("percent255") == {"battery": "percent255"}
+    assert parse_decoders("battery:uint16, temperature:temperature") == {"battery": "uint16", "temperature": "temperature"}
+    assert parse_decoders("battery:unknown, nosuch:uint8") == {}
+    assert parse_decoders(None) == {}
+
+
+def test_device_decoder_overrides_default(tmp_path):
+    cache = GattCache(str(tmp_path / "gatt_cache.json"))
+    client = _Client({BATTERY: bytes([255])})
+    values = asyncio.run(read_profile(client, "AA:BB:CC:DD:EE:01", ["battery"], cache, decoders=parse_decoders("percent255")))
+    assert values == {"battery": 100}
@@ -0,0 +1,144 @@
+import configparser
+import json
+
+from ble_presence import DEPARTURE_LEARNED, DEPARTURE_WINDOW, PresenceModel
+
+MAC = "AA:BB:CC:DD:EE:01"
+WINDOW = 10
+
+
+def _model(tmp_path, **presence):
+    model = PresenceModel(str(tmp_path / "presence_model.json"))
+    config = configparser.ConfigParser()
+    config.read_dict({"Presence": {"departure_mode": DEPARTURE_LEARNED, "min_samples": 3, **presence}})
+    model.configure(config)
+    return model
+
+
+def _window(model, start, reports, end=None):
+    model.start_window(start)
+    for now in reports:
+        model.observe(MAC, now)
+    model.end_window(start + WINDOW if end is None else end)
+
+
+def _windows(model, pattern, first=0):
+    """
+    Wie BlueZ mit Duplikat-Filter: höchstens eine Meldung pro Fenster (pattern: gesehen ja/nein).
+    Gibt den Start des nächsten Fensters zurück.
+    """
+    start = first
+    for seen in pattern:
+        _window(model, start, [start + 1] if seen else [])
+        start += 100
+    return start
+
+
+def test_duplicate_reports_do_not_change_the_rate(tmp_path):
+    (tmp_path / "single").mkdir()
+    (tmp_path / "paired").mkdir()
+    single, paired = _model(tmp_path / "single"), _model(tmp_path / "paired")
+    for window in range(10):
+        start = window * 100
+        _window(single, start, [start + 1])
+        # ADV_IND und SCAN_RSP wenige ms nacheinander, dazu eine spätere Meldung
+        _window(paired, start, [start + 1, start + 1.004, start + 6])
+    assert single.stats()[MAC] == paired.stats()[MAC]
+    # Nicht die Millisekunden zwischen den Meldungen, sondern ein Fenster pro Sichtung
+    assert single.mean_interval(MAC) > 2
+
+
+def test_reports_outside_a_window_are_ignored(tmp_path):
+    model = _model(tmp_path)
+    _window(model, 0, [1])
+    # Nach end_window, solange der Scanner noch gestoppt wird
+    model.observe(MAC, 10.5)
+    _window(model, 100, [])
+    _window(model, 200, [201])
+    stats = model.stats()[MAC]
+    assert stats["windows"] == 1 + 0.98 + 0.98 ** 2
+    assert stats["seen_windows"] == 1 + 0.98 ** 2
+
+
+def test_seen_in_window_is_never_departed(tmp_path):
+    model = _model(tmp_path, missed_advertisements=1)
+    start = _windows(model, [True] * 20 + [False])
+    threshold = model.departure_seconds(model._devices[MAC])
+    # Früh im Fenster gesehen, das Fenster ist aber länger als die Schwelle
+    _window(model, start, [start + 0.1], end=start + threshold + WINDOW)
+    assert not model.is_departed(MAC, seen=True, now=start + threshold + WINDOW)
+    assert model._devices[MAC].unseen == 0.0
+
+
+def test_learned_departure_after_missed_windows(tmp_path):
+    model = _model(tmp_path, missed_advertisements=3)
+    start = _windows(model, [True] * 60)
+    assert not model.is_departed(MAC, seen=True)
+    missed = 0
+    while True:
+        start = _windows(model, [False], start)
+        missed += 1
+        if model.is_departed(MAC, seen=False, now=start):
+            break
+    # 3 x Intervall am 95%-Quantil bei fast immer gesehenem Gerät: gut 2 Fenster
+    assert missed == 3
+    # Die Pause zwischen den Fenstern zählt nicht, nur die Scan-Zeit
+    assert model._devices[MAC].unseen == 3 * WINDOW
+    assert model.stats()[MAC]["departures"] == 1
+
+
+def test_absence_is_not_learned(tmp_path):
+    model = _model(tmp_path)
+    start = _windows(model, [True] * 60)
+    learned = model.stats()[MAC]
+    start = _windows(model, [False] * 30, start)
+    assert model.is_departed(MAC, seen=False, now=start)
+    # Die Schwelle wächst während der Abwesenheit nicht
+    assert model.stats()[MAC]["departure_seconds"] == learned["departure_seconds"]
+    # Nach der Rückkehr zählt die Abwesenheit nicht als verpasste Fenster
+    model.false_offline_seconds = 0
+    _windows(model, [True], start)
+    assert model.stats()[MAC]["seen_windows"] > 0.98 * learned["seen_windows"]
+
+
+def test_misses_before_a_false_departure_are_learned(tmp_path):
+    model = _model(tmp_path, missed_advertisements=1)
+    start = _windows(model, [True] * 60)
+    learned = model.stats()[MAC]
+    start = _windows(model, [False] * 2, start)
+    assert model.is_departed(MAC, seen=False, now=start)
+    _window(model, start, [start + 1])
+    stats = model.stats()[MAC]
+    assert stats["false_departures"] == 1
+    assert stats["detection"] < learned["detection"]
+
+
+def test_slow_device_is_not_departed_after_one_missed_window(tmp_path):
+    model = _model(tmp_path)
+    # Nur in jedem zweiten Fenster gesehen
+    start = _windows(model, [True, False] * 10)
+    assert 10 < model.mean_interval(MAC) < 20
+    assert not model.is_departed(MAC, seen=False, now=start)
+    assert 0.4 < model.stats()[MAC]["detection"] < 0.6
+
+
+def test_window_mode_and_unlearned_devices_use_seen_flag(tmp_path):
+    model = _model(tmp_path)
+    _windows(model, [True])
+    # Erst ein Fenster beobachtet (min_samples = 3)
+    assert model.departure_seconds(model._devices[MAC]) is None
+    assert not model.is_departed(MAC, seen=True)
+    assert model.is_departed(MAC, seen=False)
+    window_model = _model(tmp_path, departure_mode=DEPARTURE_WINDOW)
+    _windows(window_model, [True] * 10)
+    assert window_model.is_departed(MAC, seen=False)
+
+
+def test_legacy_interval_model_is_discarded(tmp_path):
+    with open(tmp_path / "presence_model.json", "w") as f:
+        json.dump({MAC: {"mean": 0.005, "var": 0.0, "samples": 400, "arrivals": 900.0, "scan_time": 500.0,
+                         "departures": 7, "false_departures": 5}}, f)
+    model = _model(tmp_path)
+    stats = model.stats()[MAC]
+    assert (stats["windows"], stats["scan_time"], stats["departures"], stats["false_departures"]) == (0.0, 0.0, 7, 5)
+    assert stats["departure_seconds"] is None
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+from ble_registry import DeviceRegistry
+
+
+@pytest.fixture
+def files(tmp_path):
+    devices = tmp_path / "known_devices.txt"
+    options = tmp_path / "device_options.ini"
+    return devices, options
+
+
+def _write(path, text, bump):
+    path.write_text(text)
+    # mtime_ns kann bei schnellem Schreiben gleich bleiben: mtime eindeutig verändern
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump))
+
+
+def test_reload_diff_and_state(files):
+    devices, options = files
+    _write(devices, "cc:00:00:00:00:01,Schluessel,1\nAA:00:00:00:00:02,Rad,0\nBB:00:00:00:00:03,Tasche,1\n", 1)
+    registry = DeviceRegistry(str(devices), str(options))
+    diff = registry.reload()
+    assert sorted(diff.added) == ["AA:00:00:00:00:02", "BB:00:00:00:00:03", "CC:00:00:00:00:01"]
+    registry.get("AA:00:00:00:00:02").last_online = True
+
+    # Ohne Änderung wird nicht geparst
+    assert not registry.reload()
+
+    _write(devices, "cc:00:00:00:00:01,Schluessel,1\nAA:00:00:00:00:02,Fahrrad,0\n", 2)
+    diff = registry.reload()
+    assert diff.changed == ["AA:00:00:00:00:02"]
+    assert diff.removed == ["BB:00:00:00:00:03"]
+    assert diff.added == []
+    # Laufzeit-Zustand bleibt bei geänderten Einträgen erhalten
+    assert registry.get("AA:00:00:00:00:02").last_online is True
+    assert registry.alias("AA:00:00:00:00:02") == "Fahrrad"
+
+
+def test_battery_macs_keep_file_order(files):
+    devices, options = files
+    _write(devices, "FF:00:00:00:00:01,Z,1\nAA:00:00:00:00:02,A,0\n11:00:00:00:00:03,B,1\n", 1)
+    registry = DeviceRegistry(str(devices), str(options))
+    registry.reload()
+    assert registry.battery_macs() == ["FF:00:00:00:00:01", "11:00:00:00:00:03"]
+
+
+def test_options_and_groups(files):
+    devices, options = files
+    _write(devices, "AA:00:00:00:00:01,A,0\nAA:00:00:00:00:02,B,0\n", 1)
+    options.write_text("[aa-00-00-00-00-01]\ngroup = schluessel\npublish = changes\n")
+    registry = DeviceRegistry(str(devices), str(options))
+    registry.reload()
+    entry = registry.get("AA:00:00:00:00:01")
+    assert entry.group == "schluessel"
+    assert entry.get_option("publish") == "changes"
+    assert registry.group("schluessel") == {"AA:00:00:00:00:01"}
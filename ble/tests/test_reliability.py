@@ -0,0 +1,57 @@
+from ble_reliability import BREAKER_CLOSED, BREAKER_HALF_OPEN, BREAKER_OPEN, ReliabilityTracker
+
+MAC = "AA:BB:CC:DD:EE:01"
+HOUR = 3600
+
+
+def _tracker(tmp_path):
+    return ReliabilityTracker(str(tmp_path / "connection_stats.json"), threshold=3, backoff_hours=1, max_backoff_hours=3)
+
+
+def test_breaker_opens_after_threshold(tmp_path):
+    tracker = _tracker(tmp_path)
+    for _ in range(2):
+        tracker.record_result(MAC, False, now=0)
+        assert tracker.check(MAC, now=0) == BREAKER_CLOSED
+    tracker.record_result(MAC, False, now=0)
+    assert tracker.check(MAC, now=0) == BREAKER_OPEN
+    assert tracker.check(MAC, now=HOUR - 1) == BREAKER_OPEN
+    assert tracker.check(MAC, now=HOUR) == BREAKER_HALF_OPEN
+
+
+def test_failed_probe_doubles_backoff_up_to_max(tmp_path):
+    tracker = _tracker(tmp_path)
+    for _ in range(3):
+        tracker.record_result(MAC, False, now=0)
+    now = 0
+    expected_backoffs = [2 * HOUR, 3 * HOUR, 3 * HOUR]
+    for backoff in expected_backoffs:
+        now = tracker.all_stats()[MAC]["open_until"]
+        assert tracker.check(MAC, now=now) == BREAKER_HALF_OPEN
+        tracker.record_result(MAC, False, now=now)
+        assert tracker.all_stats()[MAC]["open_until"] == now + backoff
+
+
+def test_success_closes_breaker_and_persists(tmp_path):
+    tracker = _tracker(tmp_path)
+    for _ in range(3):
+        tracker.record_result(MAC, False, now=0)
+    tracker.record_attempt(MAC, True, connect_seconds=1.5, now=HOUR)
+    tracker.record_result(MAC, True, now=HOUR)
+    assert tracker.check(MAC, now=HOUR) == BREAKER_CLOSED
+    tracker.save()
+
+    reloaded = _tracker(tmp_path)
+    stats = reloaded.all_stats()[MAC]
+    assert stats["successes"] == 1
+    assert stats["consecutive_failures"] == 0
+    assert stats["breaker_state"] == BREAKER_CLOSED
+
+
+def test_reset(tmp_path):
+    tracker = _tracker(tmp_path)
+    assert not tracker.reset(MAC)
+    for _ in range(3):
+        tracker.record_result(MAC, False, now=0)
+    assert tracker.reset(MAC)
+    assert tracker.check(MAC, now=0) == BREAKER_CLOSED
@@ -0,0 +1,112 @@
+import multiprocessing
+
+import pytest
+
+import ble_ring
+from ble_ring import DetectionRing, FLAG_PUBLISH, KIND_OFFLINE, KIND_ONLINE, _HEADER_SIZE, _RECORD, _SEQ, _SLOT_BUSY
+
+MAC = "AA:BB:CC:DD:EE:01"
+
+
+@pytest.fixture
+def ring():
+    ring = DetectionRing.create(capacity=8, consumers=2)
+    yield ring
+    ring.close()
+
+
+def _slot_offset(ring, seq):
+    return _HEADER_SIZE + (seq % ring.capacity) * _RECORD.size
+
+
+def test_write_and_read(ring):
+    ring.write(KIND_ONLINE, MAC, -60, "Sensor", FLAG_PUBLISH, timestamp=100.0)
+    ring.write(KIND_OFFLINE, MAC, -200000, timestamp=101.0)
+    first, second = ring.read(0)
+    assert (first.seq, first.address, first.rssi, first.kind, first.flags, first.name) == \
+        (0, MAC, -60, KIND_ONLINE, FLAG_PUBLISH, "Sensor")
+    assert (second.seq, second.rssi, second.kind, second.name, second.timestamp) == (1, -32768, KIND_OFFLINE, None, 101.0)
+    assert ring.read(0) == []
+    assert ring.consumer_state(0) == (2, 0)
+
+
+def test_consumers_read_independently(ring):
+    for i in range(3):
+        ring.write(KIND_ONLINE, MAC, -50 - i)
+    assert [record.rssi for record in ring.read(0, max_records=2)] == [-50, -51]
+    assert [record.rssi for record in ring.read(1)] == [-50, -51, -52]
+    assert [record.rssi for record in ring.read(0)] == [-52]
+    assert ring.lag(0) == ring.lag(1) == 0
+
+
+def test_overrun_counts_lost_records(ring):
+    for i in range(ring.capacity + 3):
+        ring.write(KIND_ONLINE, MAC, -i)
+    records = ring.read(0)
+    assert [record.seq for record in records] == list(range(3, ring.capacity + 3))
+    assert ring.consumer_state(0) == (ring.capacity + 3, 3)
+
+
+def test_slot_overwritten_during_read_is_dropped(ring):
+    for _ in range(3):
+        ring.write(KIND_ONLINE, MAC, -60)
+    # Producer hat Slot 1 bereits mit seq 1 + capacity belegt, aber noch nicht veröffentlicht
+    _SEQ.pack_into(ring._buf, _slot_offset(ring, 1), 1 + ring.capacity)
+    assert [record.seq for record in ring.read(0)] == [0, 2]
+    assert ring.consumer_state(0) == (3, 1)
+
+
+def test_slot_busy_while_overwritten_is_dropped(ring):
+    for _ in range(ring.capacity):
+        ring.write(KIND_ONLINE, MAC, -60)
+    # Producer beschreibt gerade Slot 0 für seq = capacity
+    _SEQ.pack_into(ring._buf, _slot_offset(ring, 0), _SLOT_BUSY)
+    records = ring.read(0)
+    assert [record.seq for record in records] == list(range(1, ring.capacity))
+    assert ring.consumer_state(0) == (ring.capacity, 1)
+
+
+def test_unpublished_slot_is_retried(ring):
+    for _ in range(3):
+        ring.write(KIND_ONLINE, MAC, -60)
+    # Slot-Sequenz noch nicht sichtbar (z.B. umsortierte Speicherzugriffe)
+    _SEQ.pack_into(ring._buf, _slot_offset(ring, 2), _SLOT_BUSY)
+    assert [record.seq for record in ring.read(0)] == [0, 1]
+    assert ring.consumer_state(0) == (2, 0)
+    _SEQ.pack_into(ring._buf, _slot_offset(ring, 2), 2)
+    assert [record.seq for record in ring.read(0)] == [2]
+
+
+def test_attach_does_not_register_with_resource_tracker(ring, monkeypatch):
+    registered = []
+    monkeypatch.setattr(ble_ring.resource_tracker, "register", lambda *args: registered.append(args))
+    attached = DetectionRing.attach(ring.name)
+    try:
+        ring.write(KIND_ONLINE, MAC, -60)
+        assert [record.seq for record in attached.read(0)] == [0]
+    finally:
+        attached.close()
+    assert registered == []
+
+
+def _worker_read(ring_name, queue):
+    ring = DetectionRing.attach(ring_name)
+    try:
+        queue.put([record.seq for record in ring.read(0)])
+    finally:
+        ring.close()
+
+
+def test_spawned_worker_reads_and_segment_survives(ring):
+    ring.write(KIND_ONLINE, MAC, -60)
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    worker = context.Process(target=_worker_read, args=(ring.name, queue))
+    worker.start()
+    assert queue.get(timeout=30) == [0]
+    worker.join(30)
+    assert worker.exitcode == 0
+    # Das Ende des Workers darf das Segment nicht freigeben
+    attached = DetectionRing.attach(ring.name)
+    assert attached.written() == 1
+    attached.close()
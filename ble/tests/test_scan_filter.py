@@ -0,0 +1,125 @@
+import os
+import json
+import configparser
+
+import pytest
+
+pytest.importorskip("bleak")
+pytest.importorskip("paho.mqtt.client")
+
+import ble_tool
+
+
+class _Registry(dict):
+    """Minimaler Ersatz für DeviceRegistry (MAC -> Alias)."""
+
+    def macs(self):
+        return self.keys()
+
+    def alias(self, mac, fallback=None):
+        return self.get(mac) or fallback
+
+
+@pytest.fixture(autouse=True)
+def _clear_pattern_cache(monkeypatch):
+    monkeypatch.setattr(ble_tool, "passive_pattern_cache", {"key": None, "contents": []})
+
+
+def _passive_env(monkeypatch, results_file):
+    """BleakScanner und OrPattern ohne BlueZ ersetzen."""
+    monkeypatch.setattr(ble_tool, "BleakScanner", lambda **kwargs: kwargs)
+    monkeypatch.setattr(ble_tool, "BLUEZ_PATTERNS_AVAILABLE", True)
+    monkeypatch.setattr(ble_tool, "OrPattern", lambda start, ad_type, content: content, raising=False)
+    monkeypatch.setattr(ble_tool, "AdvertisementDataType",
+                        type("AdvertisementDataType", (), {"MANUFACTURER_SPECIFIC_DATA": 0xFF}), raising=False)
+    monkeypatch.setattr(ble_tool, "DISCOVER_RESULTS_FILE", str(results_file))
+
+
+def _write_results(path, devices):
+    path.write_text(json.dumps({"devices": devices}))
+
+
+def _config(**scan):
+    config = configparser.ConfigParser()
+    config.read_dict({"Scan": scan})
+    return config
+
+
+def test_parse_manufacturer_patterns():
+    contents = ble_tool.parse_manufacturer_patterns(_config(manufacturer_patterns="004C:0215, 0059, zz"))
+    assert contents == [bytes.fromhex("4C000215"), bytes.fromhex("5900")]
+
+
+def test_known_device_patterns_from_discover(tmp_path):
+    results = tmp_path / "scan_results.json"
+    results.write_text(json.dumps({"devices": {
+        "AA:BB:CC:DD:EE:01": {"company_id": "0x004C"},
+        "aa:bb:cc:dd:ee:02": {"company_id": "0x004C"},
+        "AA:BB:CC:DD:EE:03": {"company_id": "0x0059"},
+        "AA:BB:CC:DD:EE:04": {},
+    }}))
+    known = _Registry.fromkeys(["AA:BB:CC:DD:EE:01", "AA:BB:CC:DD:EE:02", "AA:BB:CC:DD:EE:04", "AA:BB:CC:DD:EE:05"])
+    # 0x0059 gehört zu keinem bekannten Gerät, 0x004C nur einmal; 04 ohne Herstellerdaten, 05 nicht im Discover
+    assert ble_tool.known_device_patterns(known, str(results)) == \
+        ([bytes.fromhex("4C00")], ["AA:BB:CC:DD:EE:04", "AA:BB:CC:DD:EE:05"])
+
+
+def test_known_device_patterns_without_discover(tmp_path):
+    known = _Registry.fromkeys(["AA:BB:CC:DD:EE:01"])
+    assert ble_tool.known_device_patterns(known, str(tmp_path / "missing.json")) == ([], ["AA:BB:CC:DD:EE:01"])
+
+
+def test_filtered_mode_sets_rssi_filter(monkeypatch):
+    created = []
+    monkeypatch.setattr(ble_tool, "BleakScanner", lambda **kwargs: created.append(kwargs) or kwargs)
+    _, mode = ble_tool.create_scanner(lambda *args: None, _config(rssi_threshold="-80"), ble_tool.SCAN_MODE_FILTERED)
+    assert mode == ble_tool.SCAN_MODE_FILTERED
+    assert created[0]["bluez"]["filters"]["RSSI"] == -80
+
+
+def test_passive_without_patterns_falls_back_to_filtered(monkeypatch, tmp_path):
+    _passive_env(monkeypatch, tmp_path / "missing.json")
+    scanner, mode = ble_tool.create_scanner(lambda *args: None, _config(), ble_tool.SCAN_MODE_PASSIVE, _Registry())
+    assert mode == ble_tool.SCAN_MODE_FILTERED
+    assert "RSSI" in scanner["bluez"]["filters"]
+
+
+def test_passive_uses_patterns_of_all_known_devices(monkeypatch, tmp_path):
+    results = tmp_path / "scan_results.json"
+    _write_results(results, {"AA:BB:CC:DD:EE:01": {"company_id": "0x004C"}, "AA:BB:CC:DD:EE:02": {"company_id": "0x0059"}})
+    _passive_env(monkeypatch, results)
+    known = _Registry.fromkeys(["AA:BB:CC:DD:EE:01", "AA:BB:CC:DD:EE:02"])
+    scanner, mode = ble_tool.create_scanner(lambda *args: None, _config(), ble_tool.SCAN_MODE_PASSIVE, known)
+    assert mode == ble_tool.SCAN_MODE_PASSIVE
+    assert scanner["bluez"]["or_patterns"] == [bytes.fromhex("4C00"), bytes.fromhex("5900")]
+
+
+def test_passive_falls_back_if_a_known_device_has_no_pattern(monkeypatch, tmp_path, caplog):
+    results = tmp_path / "scan_results.json"
+    _write_results(results, {"AA:BB:CC:DD:EE:01": {"company_id": "0x004C"}, "AA:BB:CC:DD:EE:02": {}})
+    _passive_env(monkeypatch, results)
+    known = _Registry(**{"AA:BB:CC:DD:EE:01": "Schluessel", "AA:BB:CC:DD:EE:02": "Rad"})
+    scanner, mode = ble_tool.create_scanner(lambda *args: None, _config(), ble_tool.SCAN_MODE_PASSIVE, known)
+    assert mode == ble_tool.SCAN_MODE_FILTERED
+    assert "AA:BB:CC:DD:EE:02 (Rad)" in caplog.text
+
+
+def test_passive_patterns_are_cached_until_inputs_change(monkeypatch, tmp_path):
+    results = tmp_path / "scan_results.json"
+    _write_results(results, {"AA:BB:CC:DD:EE:01": {"company_id": "0x004C"}})
+    _passive_env(monkeypatch, results)
+    builds = []
+    known_device_patterns = ble_tool.known_device_patterns
+    monkeypatch.setattr(ble_tool, "known_device_patterns", lambda *args: builds.append(args) or known_device_patterns(*args))
+    known = _Registry.fromkeys(["AA:BB:CC:DD:EE:01"])
+    for _ in range(3):
+        assert ble_tool.passive_patterns(_config(), known) == [bytes.fromhex("4C00")]
+    assert len(builds) == 1
+
+    _write_results(results, {"AA:BB:CC:DD:EE:01": {"company_id": "0x0059"}})
+    stat = os.stat(results)
+    os.utime(results, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert ble_tool.passive_patterns(_config(), known) == [bytes.fromhex("5900")]
+    known["AA:BB:CC:DD:EE:02"] = None
+    assert ble_tool.passive_patterns(_config(), known) == []
+    assert len(builds) == 3
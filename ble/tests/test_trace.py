@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import pytest
+
+from ble_trace import Tracer
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracer = Tracer()
+    tracer.enabled = True
+    tracer.trace_file = str(tmp_path / "ble_trace_test.json")
+    return tracer
+
+
+def _spans(tracer):
+    with open(tracer.trace_file) as f:
+        events = json.load(f)["traceEvents"]
+    return [event for event in events if event["ph"] == "X"], [event for event in events if event["ph"] == "M"]
+
+
+def test_nested_spans_are_written_as_complete_events(tracer):
+    with tracer.span("cycle"):
+        with tracer.span("scan", cat="bluetooth", devices=3):
+            pass
+    tracer.end_cycle()
+    spans, meta = _spans(tracer)
+    inner, outer = spans
+    assert (outer["name"], outer["cat"], inner["name"], inner["cat"]) == ("cycle", "daemon", "scan", "bluetooth")
+    assert inner["args"] == {"devices": 3} and "args" not in outer
+    assert inner["tid"] == outer["tid"] == 1
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert [(event["tid"], event["args"]["name"]) for event in meta] == [(1, "main")]
+
+
+def test_disabled_tracer_records_nothing(tracer):
+    tracer.enabled = False
+    with tracer.span("cycle"):
+        pass
+    tracer.end_cycle()
+    assert len(tracer._cycles) == 0 and not tracer._current
+
+
+def test_toggle_off_drops_buffered_cycles(tracer):
+    with tracer.span("before"):
+        pass
+    tracer.end_cycle()
+    with tracer.span("unfinished"):
+        pass
+    tracer.toggle()
+    assert not tracer.enabled
+    with tracer.span("while_off"):
+        pass
+    tracer.toggle()
+    with tracer.span("after"):
+        pass
+    tracer.end_cycle()
+    spans, _ = _spans(tracer)
+    assert [event["name"] for event in spans] == ["after"]
+
+
+def test_span_ending_after_toggle_off_is_dropped(tracer):
+    with tracer.span("cycle"):
+        tracer.toggle()
+    tracer.toggle()
+    tracer.end_cycle()
+    spans, _ = _spans(tracer)
+    assert spans == []
+
+
+def test_task_keeps_lane_across_cycles(tracer):
+    async def publish(release):
+        with tracer.span("publish"):
+            await release.wait()
+
+    async def short():
+        with tracer.span("short"):
+            pass
+
+    async def main():
+        release = asyncio.Event()
+        with tracer.span("cycle"):
+            publisher = asyncio.create_task(publish(release))
+            await asyncio.sleep(0)
+        tracer.end_cycle()
+        # Neuer Task im nächsten Durchlauf, während der Publish-Task noch läuft
+        with tracer.span("cycle"):
+            await asyncio.create_task(short())
+        release.set()
+        await publisher
+        tracer.end_cycle()
+        # Nach dem Ende des Publish-Tasks wird seine Zeile wieder frei
+        with tracer.span("cycle"):
+            await asyncio.create_task(short())
+        tracer.end_cycle()
+
+    asyncio.run(main())
+    spans, meta = _spans(tracer)
+    tids = [(event["name"], event["tid"]) for event in spans]
+    assert tids == [("cycle", 1), ("short", 3), ("cycle", 1), ("publish", 2), ("short", 2), ("cycle", 1)]
+    assert [event["args"]["name"] for event in meta] == ["main", "task 1", "task 2"]
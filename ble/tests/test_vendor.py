@@ -0,0 +1,69 @@
+import ble_vendor
+from ble_vendor import (
+    ADDRESS_NON_RESOLVABLE, ADDRESS_PUBLIC, ADDRESS_RANDOM_STATIC, ADDRESS_RPA, ADDRESS_UNKNOWN,
+    VendorTables, address_type, build_tables, parse_company_yaml,
+)
+
+OUI_MAP = {0x000393: "Apple, Inc.", 0xB827EB: "Raspberry Pi Foundation", 0x00124B: "Texas Instruments"}
+COMPANY_MAP = {0x004C: "Apple, Inc.", 0x0059: "Nordic Semiconductor ASA"}
+
+
+def test_address_type():
+    assert address_type("00:03:93:00:00:01", "public") == ADDRESS_PUBLIC
+    assert address_type("C0:00:00:00:00:01", "random") == ADDRESS_RANDOM_STATIC
+    assert address_type("40:00:00:00:00:01", "random") == ADDRESS_RPA
+    assert address_type("00:00:00:00:00:01", "random") == ADDRESS_NON_RESOLVABLE
+    assert address_type("C0:00:00:00:00:01") == ADDRESS_UNKNOWN
+
+
+def test_lookup_from_dicts():
+    tables = VendorTables.from_dicts(OUI_MAP, COMPANY_MAP)
+    assert tables.vendor("B8:27:EB:12:34:56") == "Raspberry Pi Foundation"
+    assert tables.vendor("00:03:93:00:00:01") == "Apple, Inc."
+    assert tables.vendor("FF:FF:FF:00:00:01") is None
+    assert tables.vendor("nonsense") is None
+    assert tables.company(0x0059) == "Nordic Semiconductor ASA"
+    assert tables.company(0x0001) is None
+    assert tables.counts() == (3, 2)
+
+
+def test_build_and_load_file(tmp_path):
+    oui_csv = tmp_path / "oui.csv"
+    oui_csv.write_text(
+        "Registry,Assignment,Organization Name,Organization Address\n"
+        "MA-L,B827EB,Raspberry Pi Foundation,Cambridge\n"
+        "MA-L,000393,\"Apple, Inc.\",Cupertino\n",
+        encoding="utf-8",
+    )
+    output = str(tmp_path / "vendor_tables.bin")
+    oui_count, company_count, _ = build_tables(str(oui_csv), None, output)
+    assert (oui_count, company_count) == (2, len(ble_vendor._SEED_COMPANY_IDS))
+    tables = VendorTables.from_file(output)
+    assert tables.vendor("00:03:93:AA:BB:CC") == "Apple, Inc."
+    assert tables.vendor("B8:27:EB:AA:BB:CC") == "Raspberry Pi Foundation"
+    assert tables.company(0x004C) == "Apple, Inc."
+
+
+def test_company_yaml_quoting(tmp_path):
+    yaml_file = tmp_path / "company_identifiers.yaml"
+    yaml_file.write_text(
+        "company_identifiers:\n"
+        "  - value: 0x004C\n"
+        "    name: 'Apple, Inc.'\n"
+        "  - value: 0x0001\n"
+        "    name: 'O''Brien Ltd.'\n"
+        "  - value: 0x0002\n"
+        "    name: \"Quote \\\"Co\\\" \\\\ Sons\"\n"
+        "  - value: 0x0003\n"
+        "    name: \"Caf\\u00e9 \\x41G\"\n"
+        "  - value: 4\n"
+        "    name: Plain Name\n",
+        encoding="utf-8",
+    )
+    assert parse_company_yaml(str(yaml_file)) == {
+        0x004C: "Apple, Inc.",
+        0x0001: "O'Brien Ltd.",
+        0x0002: 'Quote "Co" \\ Sons',
+        0x0003: "Café AG",
+        0x0004: "Plain Name",
+    }
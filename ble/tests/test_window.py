@@ -0,0 +1,130 @@
+import asyncio
+import configparser
+from types import SimpleNamespace
+
+import pytest
+
+from ble_window import END_COMPLETE, END_FIXED, END_TIMEOUT, MIN_HISTORY_CYCLES, WindowController
+
+MACS = ["AA:BB:CC:DD:EE:01", "AA:BB:CC:DD:EE:02"]
+
+
+def _controller(mode="adaptive", base=1.0, min_seconds=0.05, max_seconds=0.3):
+    controller = WindowController(base)
+    controller.mode = mode
+    controller.min_seconds = min_seconds
+    controller.max_seconds = max_seconds
+    return controller
+
+
+def _run(controller, expected, seen_after=None, allow_extension=True):
+    async def run():
+        controller.begin(expected)
+        if seen_after is not None:
+            async def advertise():
+                await asyncio.sleep(seen_after)
+                for mac in expected:
+                    controller.seen(mac)
+            asyncio.get_running_loop().create_task(advertise())
+        return await controller.wait(allow_extension=allow_extension)
+    return asyncio.run(run())
+
+
+def test_fixed_window_ignores_completion():
+    window = _run(_controller("fixed", base=0.1), MACS, seen_after=0.0)
+    assert window["reason"] == END_FIXED
+    assert window["seconds"] >= 0.1
+    assert window["saved_seconds"] == 0.0
+
+
+def test_adaptive_window_ends_when_all_expected_seen():
+    window = _run(_controller(), MACS, seen_after=0.1)
+    assert window["reason"] == END_COMPLETE
+    assert not window["extended"]
+    assert 0.1 <= window["seconds"] < 0.5
+    assert window["saved_seconds"] > 0.5
+    assert window["completion_seconds"] == pytest.approx(0.1, abs=0.05)
+
+
+def test_adaptive_window_extends_for_missing_devices():
+    controller = _controller(base=0.1, min_seconds=0.05, max_seconds=0.3)
+    window = _run(controller, MACS)
+    assert (window["reason"], window["extended"], window["missing"]) == (END_TIMEOUT, True, 2)
+    assert window["seconds"] >= 0.3
+    assert window["saved_seconds"] < 0
+
+    window = _run(controller, MACS, allow_extension=False)
+    assert (window["reason"], window["extended"]) == (END_TIMEOUT, False)
+    assert 0.1 <= window["seconds"] < 0.3
+
+
+def test_target_from_history():
+    controller = _controller(base=10.0, min_seconds=0.5, max_seconds=20.0)
+    assert controller.target_seconds() == 10.0
+    controller._history.extend([2.0] * MIN_HISTORY_CYCLES)
+    assert controller.target_seconds() == 3.0
+    # Ein Fenster, in dem nicht alle gesehen wurden, zählt als unendlich lang
+    controller._history.extend([None] * MIN_HISTORY_CYCLES)
+    assert controller.target_seconds() == 10.0
+
+
+def test_configure_clamps_window_bounds():
+    controller = WindowController(10)
+    config = configparser.ConfigParser()
+    config.read_dict({"Scan": {"window_mode": "adaptive", "min_window_seconds": "30", "max_window_seconds": "5"}})
+    controller.configure(config)
+    assert (controller.min_seconds, controller.max_seconds, controller.longest_seconds()) == (10, 10, 10)
+
+
+def test_scan_window_completes_with_advertisements_during_start(tmp_path, monkeypatch):
+    pytest.importorskip("bleak")
+    pytest.importorskip("paho.mqtt.client")
+    import ble_tool
+    from ble_registry import DeviceRegistry
+
+    devices = tmp_path / "known_devices.txt"
+    devices.write_text("".join(f"{mac},Geraet,0\n" for mac in MACS))
+    registry = DeviceRegistry(str(devices), str(tmp_path / "device_options.ini"))
+    registry.reload()
+    config = configparser.ConfigParser()
+    config.read_dict({"Scan": {"window_mode": "adaptive", "min_window_seconds": "0.5", "publish_policy": "never"}})
+    controller = WindowController(10)
+    controller.configure(config)
+    monkeypatch.setattr(ble_tool, "presence_model", None)
+
+    class StartScanner:
+        """Alle bekannten Geräte senden, noch während scanner.start() läuft."""
+
+        def __init__(self, callback):
+            self.callback = callback
+
+        async def start(self):
+            for mac in MACS:
+                self.callback(SimpleNamespace(address=mac, name=None), SimpleNamespace(rssi=-60))
+
+        async def stop(self):
+            pass
+
+    stats = asyncio.run(ble_tool.scan_and_report(10, config, registry, None, scanner_factory=StartScanner,
+                                                 window_controller=controller))
+    assert stats["known_seen"] == 2
+    assert stats["window"]["reason"] == END_COMPLETE
+    assert stats["window"]["seconds"] < 2
+
+
+def test_time_scale_does_not_scale_overhead():
+    controller = _controller(base=10.0, min_seconds=3.0, max_seconds=20.0)
+
+    async def run(expected, seen):
+        controller.begin(expected)
+        # Verwaltungsaufwand in Echtzeit, im Zeitraffer wären das 10000s
+        await asyncio.sleep(0.01)
+        for mac in seen:
+            controller.seen(mac)
+        return await controller.wait(time_scale=1e6)
+
+    window = asyncio.run(run(MACS, MACS))
+    assert (window["reason"], window["seconds"], window["saved_seconds"]) == (END_COMPLETE, 3.0, 7.0)
+    assert window["completion_seconds"] == 3.0
+    window = asyncio.run(run(MACS, MACS[:1]))
+    assert (window["reason"], window["extended"], window["seconds"]) == (END_TIMEOUT, True, 20.0)
@@ -169,6 +169,19 @@ else
     echo "✓ clients.json existiert bereits"
 fi
 
+# === 4d. HERSTELLERTABELLEN (OUI / COMPANY-IDS) ERZEUGEN ===
+echo "--- (4d/15) Erzeuge Herstellertabellen für Discover ---"
+VENDOR_TMP=$(mktemp -d)
+if curl -fsSL --max-time 60 -o "$VENDOR_TMP/oui.csv" "https://standards-oui.ieee.org/oui/oui.csv" && \
+   curl -fsSL --max-time 60 -o "$VENDOR_TMP/company_identifiers.yaml" "https://bitbucket.org/bluetooth-SIG/public/raw/main/assigned_numbers/company_identifiers/company_identifiers.yaml"; then
+    (cd "$APP_DIR" && python3 ble_vendor.py build --oui "$VENDOR_TMP/oui.csv" --company "$VENDOR_TMP/company_identifiers.yaml") \
+        && echo "✓ vendor_tables.bin erstellt" \
+        || echo "✗ vendor_tables.bin konnte nicht erstellt werden (eingebaute Tabelle wird verwendet)"
+else
+    echo "✗ Download der Herstellerlisten fehlgeschlagen (eingebaute Tabelle wird verwendet)"
+fi
+rm -rf "$VENDOR_TMP"
+
 # === 5. HELFER-SKRIPTE ERSTELLEN ===
 echo "--- (5/15) Erstelle Helfer-Skripte (Hostname, Netzwerk, Reboot) ---"
 HOSTNAME_SCRIPT="/usr/local/bin/ble_set_hostname.sh"